@@ -1,12 +1,13 @@
-from .models import Cone, CarPose, Path2D
+from .models import Cone, ConeArray, CarPose, Path2D, PathArray
 from .path_planning import PathPlanning
-from .tester import PathTester
 from .scenarios import get_scenario_names, make_scenario
 
 __all__ = [
     "Cone",
+    "ConeArray",
     "CarPose",
     "Path2D",
+    "PathArray",
     "PathPlanning",
     "PathTester",
     "get_scenario_names",
@@ -14,3 +15,10 @@ __all__ = [
 ]
 
 
+def __getattr__(name):
+    # PathTester pulls in matplotlib; only import it when actually used.
+    if name == "PathTester":
+        from .tester import PathTester
+
+        return PathTester
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .models import ConeArray
+
+HALF_LANE = 2.5
+FORWARD_STEP = 2.5
+
+
+def generate_paths(poses: np.ndarray, cones: np.ndarray, step: float = 0.4, num_points: int = 25) -> np.ndarray:
+    """Plan many frames at once.
+
+    poses: (N, 3) array of car poses as (x, y, yaw).
+    cones: (N, M, 3) array of cones as (x, y, color). Frames with fewer than
+        M cones are padded with rows whose color is not 0/1 (e.g. -1) or whose
+        coordinates are NaN.
+
+    Returns an (N, num_points, 2) array holding, for every frame, the same path
+    that ``PathPlanning(pose, cones).generatePath()`` produces. Frames for which
+    the scalar planner returns an empty path are filled with NaN.
+    """
+    poses = np.asarray(poses, dtype=np.float64)
+    cones = np.asarray(cones, dtype=np.float64)
+    if poses.ndim != 2 or poses.shape[1] != 3:
+        raise ValueError(f"poses must have shape (N, 3), got {poses.shape}")
+    if cones.ndim != 3 or cones.shape[2] != 3 or cones.shape[0] != poses.shape[0]:
+        raise ValueError(f"cones must have shape ({poses.shape[0]}, M, 3), got {cones.shape}")
+
+    px, py, yaw = poses[:, 0], poses[:, 1], poses[:, 2]
+
+    blue, n_blue = _nearest_forward(poses, cones, 1)
+    yellow, n_yellow = _nearest_forward(poses, cones, 0)
+
+    waypoints = np.full((len(poses), 4, 2), np.nan)
+    waypoints[:, 0, 0] = px
+    waypoints[:, 0, 1] = py
+    n_waypoints = np.zeros(len(poses), dtype=np.intp)
+
+    both = (n_blue > 0) & (n_yellow > 0)
+    if both.any():
+        _waypoints_both(blue[both], n_blue[both], yellow[both], n_yellow[both], yaw[both], waypoints, n_waypoints, both)
+    blue_only = (n_blue > 0) & (n_yellow == 0)
+    if blue_only.any():
+        _waypoints_one_side(blue[blue_only], n_blue[blue_only], yaw[blue_only], -1.0, waypoints, n_waypoints, blue_only)
+    yellow_only = (n_yellow > 0) & (n_blue == 0)
+    if yellow_only.any():
+        _waypoints_one_side(yellow[yellow_only], n_yellow[yellow_only], yaw[yellow_only], 1.0, waypoints, n_waypoints, yellow_only)
+
+    paths = _interpolate_paths(waypoints, n_waypoints, yaw, step, num_points)
+
+    straight = n_waypoints == 0
+    if straight.any():
+        i = np.arange(1, num_points + 1)
+        paths[straight, :, 0] = px[straight, None] + (np.cos(yaw[straight]) * step)[:, None] * i
+        paths[straight, :, 1] = py[straight, None] + (np.sin(yaw[straight]) * step)[:, None] * i
+
+    return paths
+
+
+def frames_to_arrays(frames) -> tuple[np.ndarray, np.ndarray]:
+    """Pack ``(cones, car_pose)`` frames into the padded arrays used by :func:`generate_paths`."""
+    frames = list(frames)
+    max_cones = max((len(cones) for cones, _ in frames), default=0)
+    poses = np.empty((len(frames), 3))
+    packed = np.full((len(frames), max_cones, 3), np.nan)
+    packed[:, :, 2] = -1.0
+    for i, (cones, car_pose) in enumerate(frames):
+        poses[i] = (car_pose.x, car_pose.y, car_pose.yaw)
+        if isinstance(cones, ConeArray):
+            packed[i, : len(cones), 0] = cones.x
+            packed[i, : len(cones), 1] = cones.y
+            packed[i, : len(cones), 2] = cones.color
+            continue
+        for j, cone in enumerate(cones):
+            packed[i, j] = (cone.x, cone.y, cone.color)
+    return poses, packed
+
+
+def _nearest_forward(poses: np.ndarray, cones: np.ndarray, color: int) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized ``_filter_and_sort_cones``: the three nearest forward cones of one color.
+
+    Returns their (N, 3, 2) positions and the (N,) number of valid ones (at most 3).
+    """
+    dx = cones[:, :, 0] - poses[:, 0, None]
+    dy = cones[:, :, 1] - poses[:, 1, None]
+    dist = np.hypot(dx, dy)
+    forward_dist = dx * np.cos(poses[:, 2, None]) + dy * np.sin(poses[:, 2, None])
+
+    keep = (cones[:, :, 2] == color) & (dist >= 0.5) & (forward_dist > -0.5)
+    key = np.where(keep, dist, np.inf)
+    if key.shape[1] < 3:
+        key = np.pad(key, ((0, 0), (0, 3 - key.shape[1])), constant_values=np.inf)
+        xy = np.pad(cones[:, :, :2], ((0, 0), (0, 3 - cones.shape[1]), (0, 0)), constant_values=np.nan)
+    else:
+        xy = cones[:, :, :2]
+
+    # Stable sort keeps the scalar planner's tie-breaking on equal distances.
+    order = np.argsort(key, axis=1, kind="stable")[:, :3]
+    selected = np.take_along_axis(xy, order[:, :, None], axis=1)
+    count = np.minimum(keep.sum(axis=1), 3)
+    return selected, count
+
+
+def _waypoints_both(blue, n_blue, yellow, n_yellow, yaw, waypoints, n_waypoints, rows) -> None:
+    B1, Y1 = blue[:, 0], yellow[:, 0]
+    W1 = (B1 + Y1) / 2
+    W2 = np.empty_like(W1)
+
+    cos_yaw = np.cos(yaw)
+    sin_yaw = np.sin(yaw)
+
+    # Fallback forward direction: perpendicular to the B1-Y1 gate, or the car heading.
+    across = B1 - Y1
+    forward = np.stack([across[:, 1], -across[:, 0]], axis=1)
+    forward_len = np.hypot(forward[:, 0], forward[:, 1])
+    gate_ok = forward_len > 0.1
+    forward = np.where(
+        gate_ok[:, None],
+        forward / np.where(gate_ok, forward_len, 1.0)[:, None],
+        np.stack([cos_yaw, sin_yaw], axis=1),
+    )
+    W2_option2 = W1 + forward * FORWARD_STEP
+
+    pairs = (n_blue >= 2) & (n_yellow >= 2)
+    W2[pairs] = (blue[pairs, 1] + yellow[pairs, 1]) / 2
+
+    blue_pair = (n_blue >= 2) & (n_yellow < 2)
+    W2_option1 = (blue[blue_pair, 1] + Y1[blue_pair]) / 2
+    W2[blue_pair] = 0.7 * W2_option1 + 0.3 * W2_option2[blue_pair]
+
+    yellow_pair = (n_yellow >= 2) & (n_blue < 2)
+    W2_option1 = (B1[yellow_pair] + yellow[yellow_pair, 1]) / 2
+    W2[yellow_pair] = 0.7 * W2_option1 + 0.3 * W2_option2[yellow_pair]
+
+    single = (n_blue < 2) & (n_yellow < 2)
+    W2[single, 0] = W1[single, 0] + cos_yaw[single] * FORWARD_STEP
+    W2[single, 1] = W1[single, 1] + sin_yaw[single] * FORWARD_STEP
+
+    idx = np.flatnonzero(rows)
+    waypoints[idx, 1] = W1
+    waypoints[idx, 2] = W2
+    n_waypoints[idx] = 2
+
+
+def _waypoints_one_side(cones, count, yaw, side: float, waypoints, n_waypoints, rows) -> None:
+    """Waypoints offset HALF_LANE from a single visible boundary.
+
+    side is -1 for the blue (left) boundary and +1 for the yellow (right) one.
+    """
+    idx = np.flatnonzero(rows)
+    C1 = cones[:, 0]
+
+    fit = count >= 3
+    if fit.any():
+        c = cones[fit]
+        angle = _fit_track_boundary(c, yaw[fit])
+        offset_angle = angle + side * np.pi / 2
+        direction = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+        offset = np.stack([np.cos(offset_angle), np.sin(offset_angle)], axis=1) * HALF_LANE
+        for k in range(3):
+            proj = (c[:, k, 0] - c[:, 0, 0]) * direction[:, 0] + (c[:, k, 1] - c[:, 0, 1]) * direction[:, 1]
+            waypoints[idx[fit], k + 1] = c[:, 0] + proj[:, None] * direction + offset
+        n_waypoints[idx[fit]] = 3
+
+    pair = count == 2
+    if pair.any():
+        c = cones[pair]
+        d = c[:, 1] - c[:, 0]
+        degenerate = (np.abs(d[:, 0]) < 1e-6) & (np.abs(d[:, 1]) < 1e-6)
+        boundary_angle = np.where(degenerate, yaw[pair], np.arctan2(d[:, 1], d[:, 0]))
+        offset_angle = boundary_angle + side * np.pi / 2
+        mid = (c[:, 0] + c[:, 1]) / 2
+        W1 = mid + np.stack([np.cos(offset_angle), np.sin(offset_angle)], axis=1) * HALF_LANE
+        W2 = W1 + np.stack([np.cos(boundary_angle), np.sin(boundary_angle)], axis=1) * FORWARD_STEP
+        waypoints[idx[pair], 1] = W1
+        waypoints[idx[pair], 2] = W2
+        n_waypoints[idx[pair]] = 2
+
+    single = count == 1
+    if single.any():
+        path_angle = yaw[single]
+        offset_angle = path_angle + side * np.pi / 2
+        W1 = C1[single] + np.stack([np.cos(offset_angle), np.sin(offset_angle)], axis=1) * HALF_LANE
+        W2 = W1 + np.stack([np.cos(path_angle), np.sin(path_angle)], axis=1) * FORWARD_STEP
+        waypoints[idx[single], 1] = W1
+        waypoints[idx[single], 2] = W2
+        n_waypoints[idx[single]] = 2
+
+
+def _fit_track_boundary(cones: np.ndarray, yaw: np.ndarray) -> np.ndarray:
+    """Vectorized ``PathPlanning._fit_track_boundary`` over (N, 3, 2) cone triples."""
+    xs = cones[:, :, 0]
+    ys = cones[:, :, 1]
+    mean_x = xs.mean(axis=1, keepdims=True)
+    mean_y = ys.mean(axis=1, keepdims=True)
+    cov_xx = ((xs - mean_x) ** 2).mean(axis=1)
+    cov_yy = ((ys - mean_y) ** 2).mean(axis=1)
+    cov_xy = ((xs - mean_x) * (ys - mean_y)).mean(axis=1)
+
+    angle = 0.5 * np.arctan2(2 * cov_xy, cov_xx - cov_yy)
+    forward_angle = np.arctan2(ys[:, -1] - ys[:, 0], xs[:, -1] - xs[:, 0])
+    angle_diff = np.mod(forward_angle - angle + np.pi, 2 * np.pi) - np.pi
+    angle = np.where(np.abs(angle_diff) > np.pi / 2, angle + np.pi, angle)
+
+    isotropic = (np.abs(cov_xy) < 1e-6) & (np.abs(cov_xx - cov_yy) < 1e-6)
+    return np.where(isotropic, yaw, angle)
+
+
+def _interpolate_paths(waypoints, n_waypoints, yaw, step: float, num_points: int) -> np.ndarray:
+    """Vectorized ``_interpolate_path`` + ``_extend_path`` over (N, 4, 2) waypoint sets."""
+    n = len(waypoints)
+    start = waypoints[:, :-1]
+    end = waypoints[:, 1:]
+    delta = end - start
+    seg_len = np.hypot(delta[:, :, 0], delta[:, :, 1])
+
+    active = (np.arange(3) < n_waypoints[:, None]) & (seg_len >= 1e-6)
+    with np.errstate(invalid="ignore"):
+        num_steps = np.where(active, np.maximum(2, np.floor(np.nan_to_num(seg_len) / step).astype(np.intp) + 1), 0)
+
+    # Every segment after the first one shares its start point with the previous
+    # segment's end, which the scalar loop drops as a duplicate.
+    first = active & (np.cumsum(active, axis=1) == 1)
+    contrib = np.where(first, num_steps, np.maximum(num_steps - 1, 0))
+    cum_end = np.cumsum(contrib, axis=1)
+    total = cum_end[:, -1]
+
+    def sample(index: np.ndarray) -> np.ndarray:
+        seg = np.minimum((index[:, :, None] >= cum_end[:, None, :]).sum(axis=2), 2)
+        seg_start = np.take_along_axis(cum_end - contrib, seg, axis=1)
+        j = index - seg_start + np.where(np.take_along_axis(first, seg, axis=1), 0, 1)
+        steps = np.take_along_axis(num_steps, seg, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = j / (steps - 1)
+        a = np.take_along_axis(start, seg[:, :, None], axis=1)
+        d = np.take_along_axis(delta, seg[:, :, None], axis=1)
+        return a + t[:, :, None] * d
+
+    index = np.broadcast_to(np.arange(num_points), (n, num_points))
+    paths = sample(index)
+
+    short = total < num_points
+    extend = short & (total >= 2)
+    if extend.any():
+        rows = np.flatnonzero(extend)
+        tail_index = np.stack([total - 2, total - 1], axis=1)
+        last_two = sample(np.maximum(tail_index, 0))[rows]
+        d = last_two[:, 1] - last_two[:, 0]
+        degenerate = np.hypot(d[:, 0], d[:, 1]) < 1e-6
+        angle = np.where(degenerate, yaw[rows], np.arctan2(d[:, 1], d[:, 0]))
+        k = np.arange(num_points)[None, :] - total[rows, None] + 1
+        ext = last_two[:, 1, None, :] + (k * step)[:, :, None] * np.stack([np.cos(angle), np.sin(angle)], axis=1)[:, None, :]
+        beyond = k > 0
+        paths[rows] = np.where(beyond[:, :, None], ext, paths[rows])
+
+    paths[short & (total < 2)] = np.nan
+    return paths
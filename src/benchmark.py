@@ -0,0 +1,446 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Ensure project root is on sys.path when running as a script: e.g., `python src/benchmark.py`
+_CURRENT_DIR = os.path.dirname(__file__)
+_PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, os.pardir))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src.models import CarPose, ConeArray
+from src.path_planning import PathPlanning, PlanScratch
+from src.profiling import PlannerProfile
+from src.raceline import GlobalRaceline
+from src.scenarios import _SCENARIOS, iter_scenario_frames
+from src.spatial_index import ConeGrid
+from src.track_generator import generate_map
+
+
+BRANCHES = ("no_cones", "one_side", "both_sides", "three_cone_fit")
+
+# Synthetic scenarios: name -> number of cones
+SYNTHETIC_SIZES = {"synthetic-100": 100, "synthetic-1000": 1000, "synthetic-10000": 10000}
+
+# Mean microseconds per default plan of a shipped scenario that --small-frame-budget
+# is usually run with; the plain-Python planner these frames started from took about 30
+SMALL_FRAME_BUDGET_US = 60.0
+
+
+def classify_branch(car_pose: CarPose, cones) -> str:
+    """Which branch of ``PathPlanning.generatePath`` a frame goes through."""
+    blue, yellow = PathPlanning(car_pose, cones)._select_forward_cones()
+    if not blue and not yellow:
+        return "no_cones"
+    if blue and yellow:
+        return "both_sides"
+    if len(blue) >= 3 or len(yellow) >= 3:
+        return "three_cone_fit"
+    return "one_side"
+
+
+def synthetic_scenario(n_cones: int, seed: int = 0) -> Tuple[ConeArray, CarPose]:
+    """A gently winding track with n_cones cones, plus the car at its start."""
+    rng = np.random.default_rng(seed)
+    n_side = max(n_cones // 2, 1)
+    s = np.arange(n_side) * 2.0
+    center_y = 8.0 * np.sin(s / 40.0)
+    heading = np.arctan(8.0 / 40.0 * np.cos(s / 40.0))
+    nx, ny = -np.sin(heading), np.cos(heading)
+    x = np.concatenate([s + 2.5 * nx, s - 2.5 * nx]) + rng.normal(0.0, 0.05, 2 * n_side)
+    y = np.concatenate([center_y + 2.5 * ny, center_y - 2.5 * ny]) + rng.normal(0.0, 0.05, 2 * n_side)
+    color = np.concatenate([np.ones(n_side, dtype=np.int32), np.zeros(n_side, dtype=np.int32)])
+    return ConeArray(x[:n_cones], y[:n_cones], color[:n_cones]), CarPose(x=0.0, y=0.0, yaw=float(heading[0]))
+
+
+def benchmark_frame(
+    car_pose: CarPose,
+    cones,
+    iterations: int,
+    engine: str = "heuristic",
+    use_index: bool = False,
+    interpolation: str = "linear",
+    profiler: Optional[PlannerProfile] = None,
+) -> Dict[str, object]:
+    """Time ``iterations`` planning calls on one frame and trace their allocations."""
+    cones = cones if isinstance(cones, ConeArray) else ConeArray.from_cones(cones)
+    index = ConeGrid(cones) if use_index else None
+    # Like the index, the raceline is built once per map and only looked up per call
+    raceline = None
+    if engine == "raceline":
+        try:
+            raceline = GlobalRaceline(cones, car_pose)
+        except ValueError:
+            pass  # too few cones for a line: every call falls back to the heuristic
+
+    def plan(profiler=profiler):
+        return PathPlanning(
+            car_pose,
+            cones,
+            spatial_index=index,
+            engine=engine,
+            interpolation=interpolation,
+            profiler=profiler,
+            raceline=raceline,
+        ).generatePath()
+
+    plan()  # warm-up
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        plan()
+        samples[i] = time.perf_counter_ns() - start
+
+    alloc_calls = min(iterations, 50)
+    tracemalloc.start()
+    try:
+        plan(None)
+        blocks_before = _traced_blocks()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(alloc_calls):
+            plan(None)
+        current, peak = tracemalloc.get_traced_memory()
+        blocks_after = _traced_blocks()
+        # tracemalloc only sees live blocks, so count those of plans kept alive;
+        # keeping several also drains the free lists a single plan would reuse
+        paths = [plan(None) for _ in range(alloc_calls)]
+        result_blocks = (_traced_blocks() - blocks_after) / alloc_calls
+        del paths
+    finally:
+        tracemalloc.stop()
+
+    result = _summarize(samples)
+    result.update(
+        {
+            "cones": len(cones),
+            "branch": classify_branch(car_pose, cones),
+            "alloc_peak_bytes": int(peak - baseline),
+            "alloc_net_bytes_per_call": (current - baseline) / alloc_calls,
+            "alloc_result_blocks": result_blocks,
+            "alloc_net_blocks_per_call": (blocks_after - blocks_before) / alloc_calls,
+            "samples_ns": samples,
+        }
+    )
+    return result
+
+
+def run_suite(
+    iterations: int = 200,
+    synthetic: bool = True,
+    engine: str = "heuristic",
+    use_index: bool = False,
+    interpolation: str = "linear",
+    profiler: Optional[PlannerProfile] = None,
+) -> Dict[str, object]:
+    frames: List[Tuple[str, object, CarPose]] = [
+        (name, list(cones), car) for name, (cones, car) in sorted(_SCENARIOS.items(), key=lambda kv: int(kv[0]))
+    ]
+    if synthetic:
+        for name, n_cones in SYNTHETIC_SIZES.items():
+            cones, car = synthetic_scenario(n_cones)
+            frames.append((name, cones, car))
+
+    scenarios: Dict[str, Dict[str, object]] = {}
+    per_branch: Dict[str, List[np.ndarray]] = {branch: [] for branch in BRANCHES}
+    for name, cones, car in frames:
+        result = benchmark_frame(
+            car, cones, iterations, engine=engine, use_index=use_index, interpolation=interpolation, profiler=profiler
+        )
+        per_branch[result["branch"]].append(result.pop("samples_ns"))
+        scenarios[name] = result
+
+    branches = {
+        branch: _summarize(np.concatenate(samples)) for branch, samples in per_branch.items() if samples
+    }
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "iterations": iterations,
+            "engine": engine,
+            "spatial_index": use_index,
+            "interpolation": interpolation,
+        },
+        "scenarios": scenarios,
+        "branches": branches,
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], tolerance: float) -> List[str]:
+    """Scenarios whose p50 latency grew by more than ``tolerance`` (a fraction) over the baseline."""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        ratio = result["p50_us"] / max(before["p50_us"], 1e-9)
+        if ratio > 1.0 + tolerance:
+            regressions.append(f"{name}: p50 {before['p50_us']:.1f}us -> {result['p50_us']:.1f}us (x{ratio:.2f})")
+    return regressions
+
+
+def measure_import_time(module: str = "src") -> Dict[str, object]:
+    """Import ``module`` in a fresh interpreter and report what it costs.
+
+    NumPy is imported first, so ``own_ms`` covers only the package itself
+    and whatever else it drags in. ``heavy_modules`` lists any visualization
+    modules that the import loaded.
+    """
+    code = (
+        "import sys, numpy; import " + module + "; "
+        "print(','.join(m for m in sys.modules if m.split('.')[0] in ('matplotlib', 'PIL', 'tkinter')))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    own_us = 0
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"; the root
+        # entry of the package is the one with no indentation.
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() == " " + module:
+            own_us = int(parts[1])
+    heavy = proc.stdout.strip()
+    return {"module": module, "own_ms": own_us / 1e3, "heavy_modules": heavy.split(",") if heavy else []}
+
+
+def check_allocations(rounds: int = 5) -> Dict[str, object]:
+    """Memory allocated by ``generatePathInto`` calls on a reused planner and buffers.
+
+    Plans every listed scenario (as a list of cones and as a ``ConeArray``),
+    frames of a generated track and a whole generated map large enough for
+    the NumPy selection, through one planner, ``update``-d per frame, into
+    one output array and ``PlanScratch``. Warm-up rounds run under
+    tracemalloc first so that one-off setup is not counted; the measured
+    rounds must then allocate nothing. Any block allocated during them,
+    even one freed again within the call, raises ``peak_transient_bytes``
+    above 0. The points are also compared with ``generatePath()``.
+    """
+    frames = [(list(cones), car) for cones, car in _SCENARIOS.values()]
+    frames.extend((ConeArray.from_cones(cones), car) for cones, car in _SCENARIOS.values())
+    frames.extend(iter_scenario_frames("gen:0:200", 200))
+    frames.append(generate_map(0, 200))
+    planner = PathPlanning(frames[0][1], frames[0][0])
+    out = np.empty((planner.num_points, 2))
+    scratch = PlanScratch()
+
+    mismatches = 0
+    for cones, car_pose in frames:
+        planner.update(car_pose, cones)
+        n = planner.generatePathInto(out, scratch)
+        expected = PathPlanning(car_pose, cones).generatePath()
+        if n != len(expected) or (n and not np.array_equal(out[:n], expected)):
+            mismatches += 1
+
+    # The measured loops must not allocate either: they are while loops, as a
+    # for loop allocates its iterator, over chunks of at most 256 frames, as
+    # CPython allocates every int above 256
+    chunks = [frames[i : i + 256] for i in range(0, len(frames), 256)]
+
+    def run(k: int) -> None:
+        while k:
+            c = 0
+            while c < len(chunks):
+                chunk = chunks[c]
+                i = 0
+                while i < len(chunk):
+                    cones, car_pose = chunk[i]
+                    planner.update(car_pose, cones)
+                    planner.generatePathInto(out, scratch)
+                    i += 1
+                c += 1
+            k -= 1
+
+    # Readings go into a preallocated array: an int kept in a local would
+    # itself be counted by the second reading
+    marks = np.zeros(3, dtype=np.int64)
+    tracemalloc.start()
+    try:
+        # Python's float free list and NumPy's small-buffer caches fill up over
+        # the first traced calls; they are bounded, so let them settle first.
+        # CPython also allocates when it specializes the code of a function
+        # after its first few calls, so run() itself is called repeatedly too.
+        for _ in range(2 * rounds + 8):
+            run(1)
+        marks[0] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        run(rounds)
+        marks[1:] = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "calls": rounds * len(frames),
+        "net_bytes": int(marks[1] - marks[0]),
+        "peak_transient_bytes": int(marks[2] - marks[0]),
+        "mismatches": mismatches,
+    }
+
+
+def measure_small_frames(rounds: int = 200, repeats: int = 5) -> Dict[str, float]:
+    """Mean microseconds per default ``generatePath`` over the shipped scenarios.
+
+    Single frames of detections hold a handful of cones, where per-call
+    overhead rather than the cone count sets the cost. Both a list of cones
+    and a ``ConeArray`` are timed, each as the best of ``repeats`` runs of
+    ``rounds`` passes over all scenarios, so a busy machine does not count.
+    """
+    lists = [(list(cones), car) for cones, car in _SCENARIOS.values()]
+    arrays = [(ConeArray.from_cones(cones), car) for cones, car in lists]
+    report = {}
+    for name, frames in (("list_us", lists), ("array_us", arrays)):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter_ns()
+            for _ in range(rounds):
+                for cones, car_pose in frames:
+                    PathPlanning(car_pose, cones).generatePath()
+            best = min(best, time.perf_counter_ns() - start)
+        report[name] = best / 1e3 / (rounds * len(frames))
+    return report
+
+
+def _traced_blocks() -> int:
+    """Number of memory blocks tracemalloc traces right now, leaving out its own snapshots."""
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return sum(stat.count for stat in snapshot.statistics("filename"))
+
+
+def _summarize(samples_ns: np.ndarray) -> Dict[str, float]:
+    us = samples_ns / 1e3
+    return {
+        "calls": int(len(us)),
+        "p50_us": float(np.percentile(us, 50)),
+        "p99_us": float(np.percentile(us, 99)),
+        "max_us": float(us.max()),
+        "throughput_per_s": float(len(us) / max(us.sum() / 1e6, 1e-12)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PathPlanning.generatePath over the scenario catalogue.")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per scenario")
+    parser.add_argument("--output", type=str, default=None, help="Write results as JSON to this file")
+    parser.add_argument("--no-synthetic", action="store_true", help="Skip the synthetic large-cone scenarios")
+    parser.add_argument("--engine", choices=PathPlanning.ENGINES, default="heuristic")
+    parser.add_argument("--interpolation", choices=PathPlanning.INTERPOLATIONS, default="linear")
+    parser.add_argument("--spatial-index", action="store_true", help="Plan through a ConeGrid index")
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Also record per-stage planner timings and counters and write them as JSON to FILE",
+    )
+    parser.add_argument("--baseline", type=str, default=None, help="Previous JSON results to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Allowed p50 slowdown vs the baseline, as a fraction"
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=None,
+        metavar="MS",
+        help="Only check that 'import src' (NumPy excluded) takes at most MS milliseconds "
+        "and loads no visualization modules",
+    )
+    parser.add_argument(
+        "--small-frame-budget",
+        type=float,
+        default=None,
+        metavar="US",
+        help=f"Only check that a default plan of a shipped scenario takes at most US microseconds "
+        f"on average, for list and ConeArray input (e.g. {SMALL_FRAME_BUDGET_US:g})",
+    )
+    parser.add_argument(
+        "--alloc-check",
+        action="store_true",
+        help="Only check that generatePathInto with reused buffers allocates no memory "
+        "and matches generatePath",
+    )
+    args = parser.parse_args(argv)
+
+    if args.alloc_check:
+        report = check_allocations()
+        print(
+            f"generatePathInto: {report['calls']} calls, net {report['net_bytes']} B, "
+            f"peak transient {report['peak_transient_bytes']} B, {report['mismatches']} mismatches"
+        )
+        if report["peak_transient_bytes"] or report["net_bytes"] or report["mismatches"]:
+            print("FAIL: generatePathInto allocates memory or differs from generatePath")
+            return 1
+        return 0
+
+    if args.small_frame_budget is not None:
+        report = measure_small_frames()
+        print(
+            f"small frames: {report['list_us']:.1f} us per plan from lists, {report['array_us']:.1f} us from "
+            f"ConeArray (budget {args.small_frame_budget:.1f} us)"
+        )
+        if max(report.values()) > args.small_frame_budget:
+            print("FAIL: small-frame planning over budget")
+            return 1
+        return 0
+
+    if args.import_budget is not None:
+        report = measure_import_time()
+        print(f"import src: {report['own_ms']:.1f} ms (budget {args.import_budget:.1f} ms)")
+        if report["heavy_modules"]:
+            print(f"FAIL: import src loaded {', '.join(report['heavy_modules'])}")
+            return 1
+        if report["own_ms"] > args.import_budget:
+            print("FAIL: import time over budget")
+            return 1
+        return 0
+
+    profiler = PlannerProfile() if args.profile else None
+    results = run_suite(
+        args.iterations, not args.no_synthetic, args.engine, args.spatial_index, args.interpolation, profiler
+    )
+
+    print(f"{'scenario':>16} {'branch':>15} {'cones':>6} {'p50 us':>9} {'p99 us':>9} {'max us':>9} {'peak B':>8} {'blocks':>7}")
+    for name, r in results["scenarios"].items():
+        print(
+            f"{name:>16} {r['branch']:>15} {r['cones']:>6} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f}"
+            f" {r['max_us']:>9.1f} {r['alloc_peak_bytes']:>8} {r['alloc_result_blocks']:>7.0f}"
+        )
+    for branch, r in results["branches"].items():
+        print(f"{branch:>16}: p50 {r['p50_us']:.1f}us  p99 {r['p99_us']:.1f}us  {r['throughput_per_s']:.0f} calls/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if profiler is not None:
+        with open(args.profile, "w") as f:
+            f.write(profiler.to_json(indent=2))
+        for stage, hist in profiler.timings_ns.items():
+            print(f"{stage:>16}: {hist.count:>7} calls  mean {hist.total / hist.count / 1e3:.1f}us")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
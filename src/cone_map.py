@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import ConeArray, ConeSet
+
+
+class ConeMap:
+    """Landmark map accumulating cone detections across frames.
+
+    Each detection is associated with the nearest landmark within
+    ``match_radius`` or starts a new one. Landmarks are bucketed in a hash
+    grid with cells of ``match_radius``, so association only looks at the 3x3
+    cells around a detection: constant time per cone however large the map
+    gets. A landmark's position is the running mean of its detections and its
+    color the majority of their color votes (ties keep the earlier color).
+
+    ``cones()`` gives the deduplicated map as a ``ConeArray`` for
+    ``PathPlanning``, so the planner's input grows with the track rather than
+    with frames x detections.
+    """
+
+    def __init__(self, match_radius: float = 1.0, min_observations: int = 1):
+        if match_radius <= 0:
+            raise ValueError("match_radius must be positive")
+        self.match_radius = match_radius
+        self.min_observations = min_observations
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._sum_x: List[float] = []
+        self._sum_y: List[float] = []
+        self._count: List[int] = []
+        self._votes: List[List[int]] = []  # per landmark: [yellow, blue] votes
+        self._color: List[int] = []
+        self._cones: Optional[ConeArray] = None
+
+    def __len__(self) -> int:
+        return len(self._count)
+
+    def update(self, detections: ConeSet) -> List[int]:
+        """Fold one frame of detections into the map; returns the landmark id of each detection."""
+        if not isinstance(detections, ConeArray):
+            detections = ConeArray.from_cones(detections)
+        self._cones = None
+        ids = []
+        for x, y, color in zip(detections.x.tolist(), detections.y.tolist(), detections.color.tolist()):
+            ids.append(self._add(x, y, int(color)))
+        return ids
+
+    def cones(self, min_observations: Optional[int] = None) -> ConeArray:
+        """Landmarks seen at least ``min_observations`` times (default: the map's setting)."""
+        if min_observations is None:
+            min_observations = self.min_observations
+        if self._cones is None:
+            count = np.asarray(self._count, dtype=np.float64)
+            self._cones = ConeArray(
+                np.asarray(self._sum_x) / np.maximum(count, 1.0),
+                np.asarray(self._sum_y) / np.maximum(count, 1.0),
+                np.asarray(self._color, dtype=np.int32),
+            )
+        if min_observations <= 1:
+            return self._cones
+        return self._cones[self.observations() >= min_observations]
+
+    def observations(self) -> np.ndarray:
+        """Number of detections folded into each landmark."""
+        return np.asarray(self._count, dtype=np.int64)
+
+    def clear(self) -> None:
+        self._grid.clear()
+        self._sum_x.clear()
+        self._sum_y.clear()
+        self._count.clear()
+        self._votes.clear()
+        self._color.clear()
+        self._cones = None
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.match_radius), math.floor(y / self.match_radius)
+
+    def _add(self, x: float, y: float, color: int) -> int:
+        ci, cj = self._cell(x, y)
+        best, best_d2 = -1, self.match_radius * self.match_radius
+        for i in (ci - 1, ci, ci + 1):
+            for j in (cj - 1, cj, cj + 1):
+                for k in self._grid.get((i, j), ()):
+                    n = self._count[k]
+                    dx = self._sum_x[k] / n - x
+                    dy = self._sum_y[k] / n - y
+                    d2 = dx * dx + dy * dy
+                    if d2 <= best_d2:
+                        best, best_d2 = k, d2
+
+        if best < 0:
+            best = len(self._count)
+            self._sum_x.append(x)
+            self._sum_y.append(y)
+            self._count.append(1)
+            self._votes.append([0, 0])
+            self._color.append(color)
+            self._grid.setdefault((ci, cj), []).append(best)
+        else:
+            old_cell = self._cell(self._sum_x[best] / self._count[best], self._sum_y[best] / self._count[best])
+            self._sum_x[best] += x
+            self._sum_y[best] += y
+            self._count[best] += 1
+            new_cell = self._cell(self._sum_x[best] / self._count[best], self._sum_y[best] / self._count[best])
+            if new_cell != old_cell:
+                self._grid[old_cell].remove(best)
+                if not self._grid[old_cell]:
+                    del self._grid[old_cell]
+                self._grid.setdefault(new_cell, []).append(best)
+
+        if color in (0, 1):
+            votes = self._votes[best]
+            votes[color] += 1
+            current = self._color[best]
+            if current not in (0, 1) or votes[color] > votes[current]:
+                self._color[best] = color
+        return best
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .models import CarPose, ConeArray, ConeSet
+
+
+Edge = Tuple[int, int]
+
+# Vertices 0..2 are the corners of the enclosing super-triangle.
+_SUPER = 3
+
+
+class ConeTriangulation:
+    """Incremental Delaunay triangulation of a cone map.
+
+    Cones are inserted one at a time with the Bowyer-Watson algorithm: the
+    triangle containing the new cone is found by walking from the last
+    inserted triangle, the cavity of triangles whose circumcircle contains
+    the cone is removed and re-fanned around it. Edges joining a blue and a
+    yellow cone cross the track, so their midpoints are centerline
+    candidates; they are tracked as triangles come and go and bucketed in a
+    hash grid, so a planning query only looks at the neighbourhood of the car
+    no matter how large the map grows.
+    """
+
+    def __init__(self, cones: Optional[ConeSet] = None, cell_size: float = 5.0, extent: float = 1000.0):
+        self.cell_size = cell_size
+        self._extent = extent
+        self._center: Optional[Tuple[float, float]] = None
+        self._radius = 0.0
+
+        self._xs: List[float] = []
+        self._ys: List[float] = []
+        self._colors: List[int] = []
+        self._tri: List[List[int]] = []
+        self._nbr: List[List[int]] = []
+        self._alive: List[bool] = []
+        self._free: List[int] = []
+        self._hint = 0
+        self._turn = 0
+
+        self._crossing: Dict[Edge, int] = {}
+        self._grid: Dict[Tuple[int, int], Set[Edge]] = {}
+
+        if cones is not None:
+            self.add(cones)
+
+    def __len__(self) -> int:
+        return max(len(self._xs) - _SUPER, 0)
+
+    def add(self, cones: ConeSet) -> None:
+        """Insert a batch of cones.
+
+        The batch is inserted in a shuffled (but deterministic) order: feeding
+        cones in track order keeps every new cone on the hull of the
+        triangulation and makes each cavity span most of the hull.
+        """
+        if not isinstance(cones, ConeArray):
+            cones = ConeArray.from_cones(cones)
+        order = np.random.default_rng(len(self)).permutation(len(cones))
+        for x, y, color in zip(cones.x[order].tolist(), cones.y[order].tolist(), cones.color[order].tolist()):
+            self.insert(x, y, int(color))
+
+    def insert(self, x: float, y: float, color: int) -> int:
+        """Insert one cone and return its vertex id (the existing id for a duplicate)."""
+        if self._center is None:
+            self._reset(x, y, self._extent)
+        elif math.hypot(x - self._center[0], y - self._center[1]) > self._radius:
+            self._grow(x, y)
+
+        t = self._locate(x, y)
+        for v in self._tri[t]:
+            if v >= _SUPER and abs(self._xs[v] - x) < 1e-9 and abs(self._ys[v] - y) < 1e-9:
+                return v
+
+        p = len(self._xs)
+        self._xs.append(x)
+        self._ys.append(y)
+        self._colors.append(color)
+        self._carve(t, p)
+        return p
+
+    def crossing_midpoints(self) -> np.ndarray:
+        """(K, 2) midpoints of every blue-yellow edge in the triangulation."""
+        return self._midpoints(list(self._crossing))
+
+    def centerline(
+        self,
+        car_pose: CarPose,
+        horizon: float = 20.0,
+        max_gap: float = 6.0,
+        max_turn: float = math.pi / 3,
+        min_gap: float = 0.5,
+    ) -> List[Tuple[float, float]]:
+        """Ordered centerline waypoints ahead of the car.
+
+        Midpoints of blue-yellow edges within ``horizon`` are chained greedily
+        from the car: each step takes the nearest unused midpoint that lies
+        ahead of the current heading, no farther than ``max_gap`` and turning
+        by at most ``max_turn``. Midpoints closer than ``min_gap`` to the
+        current point are skipped as duplicates.
+        """
+        cs = self.cell_size
+        x0, y0 = car_pose.x, car_pose.y
+        edges: List[Edge] = []
+        for i in range(math.floor((x0 - horizon) / cs), math.floor((x0 + horizon) / cs) + 1):
+            for j in range(math.floor((y0 - horizon) / cs), math.floor((y0 + horizon) / cs) + 1):
+                bucket = self._grid.get((i, j))
+                if bucket:
+                    edges.extend(bucket)
+        if not edges:
+            return []
+
+        mids = self._midpoints(edges)
+        dx = mids[:, 0] - x0
+        dy = mids[:, 1] - y0
+        ahead = (np.hypot(dx, dy) <= horizon) & (dx * math.cos(car_pose.yaw) + dy * math.sin(car_pose.yaw) > 0.0)
+        mids = mids[ahead]
+
+        waypoints: List[Tuple[float, float]] = []
+        used = np.zeros(len(mids), dtype=bool)
+        cx, cy, heading = x0, y0, car_pose.yaw
+        while not used.all():
+            dx = mids[:, 0] - cx
+            dy = mids[:, 1] - cy
+            dist = np.hypot(dx, dy)
+            used |= dist < min_gap
+            turn = np.abs((np.arctan2(dy, dx) - heading + math.pi) % (2 * math.pi) - math.pi)
+            ok = ~used & (dist <= max_gap) & (turn <= max_turn)
+            if not ok.any():
+                break
+            k = int(np.argmin(np.where(ok, dist, np.inf)))
+            used[k] = True
+            heading = math.atan2(dy[k], dx[k])
+            cx, cy = float(mids[k, 0]), float(mids[k, 1])
+            waypoints.append((cx, cy))
+        return waypoints
+
+    def _midpoints(self, edges: List[Edge]) -> np.ndarray:
+        if not edges:
+            return np.empty((0, 2))
+        # Only the edges' own end points are read, so a query stays independent of the map size
+        xs, ys = self._xs, self._ys
+        return np.array([((xs[u] + xs[v]) / 2, (ys[u] + ys[v]) / 2) for u, v in edges])
+
+    def _reset(self, cx: float, cy: float, radius: float) -> None:
+        self._center = (cx, cy)
+        self._radius = radius
+        # Super-triangle with an incircle of 4x the safe radius, so inserted
+        # cones stay well clear of its corners.
+        r = 8.0 * radius
+        self._xs = [cx + r * math.cos(a) for a in (math.pi / 2, 7 * math.pi / 6, 11 * math.pi / 6)]
+        self._ys = [cy + r * math.sin(a) for a in (math.pi / 2, 7 * math.pi / 6, 11 * math.pi / 6)]
+        self._colors = [-1, -1, -1]
+        self._tri = [[0, 1, 2]]
+        self._nbr = [[-1, -1, -1]]
+        self._alive = [True]
+        self._free = []
+        self._hint = 0
+        self._crossing = {}
+        self._grid = {}
+
+    def _grow(self, x: float, y: float) -> None:
+        """Rebuild around a larger super-triangle when a cone lands outside it."""
+        cones = ConeArray(self._xs[_SUPER:], self._ys[_SUPER:], self._colors[_SUPER:])
+        cx, cy = self._center
+        self._reset(cx, cy, max(2.0 * self._radius, 2.0 * math.hypot(x - cx, y - cy)))
+        self.add(cones)
+
+    def _orient(self, a: int, b: int, px: float, py: float) -> float:
+        xs, ys = self._xs, self._ys
+        return (xs[b] - xs[a]) * (py - ys[a]) - (ys[b] - ys[a]) * (px - xs[a])
+
+    def _in_circumcircle(self, t: int, px: float, py: float) -> bool:
+        a, b, c = self._tri[t]
+        xs, ys = self._xs, self._ys
+        adx, ady = xs[a] - px, ys[a] - py
+        bdx, bdy = xs[b] - px, ys[b] - py
+        cdx, cdy = xs[c] - px, ys[c] - py
+        ad = adx * adx + ady * ady
+        bd = bdx * bdx + bdy * bdy
+        cd = cdx * cdx + cdy * cdy
+        det = adx * (bdy * cd - bd * cdy) - ady * (bdx * cd - bd * cdx) + ad * (bdx * cdy - bdy * cdx)
+        # Treat (nearly) co-circular points as outside: any triangulation of
+        # them is Delaunay, and it keeps cavities small on evenly spaced arcs.
+        permanent = (
+            (abs(bdx * cdy) + abs(bdy * cdx)) * ad
+            + (abs(cdx * ady) + abs(cdy * adx)) * bd
+            + (abs(adx * bdy) + abs(ady * bdx)) * cd
+        )
+        return det > 1e-10 * permanent
+
+    def _locate(self, px: float, py: float) -> int:
+        t = self._hint if self._alive[self._hint] else self._alive.index(True)
+        while True:
+            tri = self._tri[t]
+            # Rotate the first edge tested so the walk cannot cycle.
+            self._turn = (self._turn + 1) % 3
+            for k in range(3):
+                i = (self._turn + k) % 3
+                if self._orient(tri[(i + 1) % 3], tri[(i + 2) % 3], px, py) < 0.0:
+                    t = self._nbr[t][i]
+                    break
+            else:
+                return t
+
+    def _carve(self, t: int, p: int) -> None:
+        px, py = self._xs[p], self._ys[p]
+        cavity = {t}
+        stack = [t]
+        boundary: List[Tuple[int, int, int]] = []
+        while stack:
+            s = stack.pop()
+            for i in range(3):
+                n = self._nbr[s][i]
+                if n in cavity:
+                    continue
+                if n != -1 and self._in_circumcircle(n, px, py):
+                    cavity.add(n)
+                    stack.append(n)
+                else:
+                    boundary.append((self._tri[s][(i + 1) % 3], self._tri[s][(i + 2) % 3], n))
+
+        for s in cavity:
+            self._alive[s] = False
+            self._free.append(s)
+            self._track(self._tri[s], -1)
+
+        starts: Dict[int, int] = {}
+        ends: Dict[int, int] = {}
+        created = []
+        for u, v, n in boundary:
+            new = self._free.pop() if self._free else self._new_slot()
+            self._tri[new] = [u, v, p]
+            self._nbr[new] = [-1, -1, n]
+            self._alive[new] = True
+            if n != -1:
+                tri_n = self._tri[n]
+                for j in range(3):
+                    if tri_n[j] != u and tri_n[j] != v:
+                        self._nbr[n][j] = new
+                        break
+            starts[u] = new
+            ends[v] = new
+            created.append(new)
+            self._track(self._tri[new], 1)
+
+        for new in created:
+            u, v, _ = self._tri[new]
+            self._nbr[new][0] = starts[v]
+            self._nbr[new][1] = ends[u]
+        self._hint = created[-1]
+
+    def _new_slot(self) -> int:
+        self._tri.append([0, 0, 0])
+        self._nbr.append([-1, -1, -1])
+        self._alive.append(False)
+        return len(self._tri) - 1
+
+    def _track(self, tri: List[int], delta: int) -> None:
+        """Reference-count the blue-yellow edges of a triangle being added or removed."""
+        colors = self._colors
+        for k in range(3):
+            u, v = tri[k], tri[(k + 1) % 3]
+            if colors[u] + colors[v] != 1 or colors[u] < 0 or colors[v] < 0:
+                continue
+            edge = (u, v) if u < v else (v, u)
+            count = self._crossing.get(edge, 0) + delta
+            cell = (
+                math.floor((self._xs[u] + self._xs[v]) / 2 / self.cell_size),
+                math.floor((self._ys[u] + self._ys[v]) / 2 / self.cell_size),
+            )
+            if count > 0:
+                self._crossing[edge] = count
+                self._grid.setdefault(cell, set()).add(edge)
+            else:
+                self._crossing.pop(edge, None)
+                bucket = self._grid.get(cell)
+                if bucket is not None:
+                    bucket.discard(edge)
+                    if not bucket:
+                        del self._grid[cell]
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Ensure project root is on sys.path when running as a script: e.g., `python src/evaluation.py`
+_CURRENT_DIR = os.path.dirname(__file__)
+_PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, os.pardir))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src.batch import generate_paths
+from src.models import CarPose, ConeArray
+from src.path_planning import DEFAULT_NUM_POINTS, PathPlanning
+from src.run import expand_scenarios
+from src.scenarios import make_scenario
+from src.validation import boundary_segments
+
+
+# Scenes are cropped to this radius around the car before perturbing; a
+# DEFAULT_NUM_POINTS path is 10 m long, so farther cones never matter for the scores
+DEFAULT_REACH = 30.0
+
+# The heading error is measured along the chord to the first path point this far from the start
+HEADING_LOOKAHEAD = 1.0
+
+# Upper bound on the elements of one broadcast scoring array, to cap memory on large maps
+_CHUNK_ELEMENTS = 2_000_000
+
+
+def perturb(
+    cones: ConeArray,
+    n_variants: int,
+    rng: np.random.Generator,
+    noise: float = 0.1,
+    drop_rate: float = 0.1,
+    swap_rate: float = 0.02,
+) -> np.ndarray:
+    """(n_variants, M, 3) perturbed copies of ``cones`` in the padded ``generate_paths`` layout.
+
+    Every cone gets Gaussian position noise of std-dev ``noise``, is dropped
+    (color -1, NaN position) with probability ``drop_rate`` and otherwise has
+    its color swapped with probability ``swap_rate``.
+    """
+    m = len(cones)
+    out = np.empty((n_variants, m, 3))
+    out[:, :, 0] = cones.x + rng.normal(0.0, noise, (n_variants, m))
+    out[:, :, 1] = cones.y + rng.normal(0.0, noise, (n_variants, m))
+    color = np.broadcast_to(cones.color.astype(np.float64), (n_variants, m))
+    swap = (rng.random((n_variants, m)) < swap_rate) & ((color == 0) | (color == 1))
+    out[:, :, 2] = np.where(swap, 1.0 - color, color)
+    drop = rng.random((n_variants, m)) < drop_rate
+    out[drop] = (np.nan, np.nan, -1.0)
+    return out
+
+
+def score_paths(paths: np.ndarray, car_pose: CarPose, cones: ConeArray) -> Dict[str, np.ndarray]:
+    """Per-path robustness metrics of (K, P, 2) paths against the true ``cones``.
+
+    - ``clearance``: minimum distance from any path point to any cone (inf without cones);
+    - ``crossings``: number of path segments crossing a boundary segment;
+    - ``heading_error``: absolute angle between ``car_pose.yaw`` and the chord
+      from the path start to its first point HEADING_LOOKAHEAD away.
+
+    Failed plans (NaN paths) score NaN clearance and heading error and no crossings.
+    """
+    k, p = paths.shape[:2]
+    failed = np.isnan(paths).any(axis=(1, 2))
+    clearance = np.full(k, np.inf)
+    crossings = np.zeros(k, dtype=np.int64)
+
+    xy = np.stack([cones.x, cones.y], axis=1)
+    segments = boundary_segments(cones)
+    if len(xy):
+        chunk = max(1, _CHUNK_ELEMENTS // (p * len(xy)))
+        for lo in range(0, k, chunk):
+            d = paths[lo : lo + chunk, :, None, :] - xy[None, None, :, :]
+            clearance[lo : lo + chunk] = np.sqrt((d * d).sum(axis=3).min(axis=(1, 2)))
+    if len(segments) and p >= 2:
+        chunk = max(1, _CHUNK_ELEMENTS // ((p - 1) * len(segments)))
+        q0, q1 = segments[:, 0], segments[:, 1]
+        for lo in range(0, k, chunk):
+            a = paths[lo : lo + chunk, :-1, None, :]
+            b = paths[lo : lo + chunk, 1:, None, :]
+            # Proper intersection: each segment's endpoints lie strictly on both sides of the other
+            d1 = _cross(q1 - q0, a - q0)
+            d2 = _cross(q1 - q0, b - q0)
+            d3 = _cross(b - a, q0 - a)
+            d4 = _cross(b - a, q1 - a)
+            hit = (d1 * d2 < 0) & (d3 * d4 < 0)
+            crossings[lo : lo + chunk] = hit.sum(axis=(1, 2))
+
+    with np.errstate(invalid="ignore"):
+        offset = paths - paths[:, :1]
+        ahead = np.hypot(offset[:, :, 0], offset[:, :, 1]) >= HEADING_LOOKAHEAD
+        index = np.where(ahead.any(axis=1), ahead.argmax(axis=1), p - 1)
+        chord = offset[np.arange(k), index]
+        heading = np.arctan2(chord[:, 1], chord[:, 0])
+        heading_error = np.abs((heading - car_pose.yaw + np.pi) % (2 * np.pi) - np.pi)
+    clearance[failed] = np.nan
+    heading_error[failed] = np.nan
+    return {"clearance": clearance, "crossings": crossings, "heading_error": heading_error, "failed": failed}
+
+
+def plan_variants(car_pose: CarPose, variants: np.ndarray, engine: str, interpolation: str) -> np.ndarray:
+    """(K, DEFAULT_NUM_POINTS, 2) paths for (K, M, 3) cone variants.
+
+    The default heuristic/linear planner goes through the vectorized
+    ``generate_paths``; other settings plan each variant with ``PathPlanning``.
+    """
+    k = len(variants)
+    if engine == "heuristic" and interpolation == "linear":
+        poses = np.broadcast_to([car_pose.x, car_pose.y, car_pose.yaw], (k, 3))
+        return generate_paths(poses, variants)
+    paths = np.full((k, DEFAULT_NUM_POINTS, 2), np.nan)
+    for i in range(k):
+        keep = variants[i, :, 2] >= 0
+        cones = ConeArray.from_array(variants[i, keep])
+        path = PathPlanning(car_pose, cones, engine=engine, interpolation=interpolation).generatePath(as_array=True)
+        if len(path) == DEFAULT_NUM_POINTS:
+            paths[i] = path.xy
+    return paths
+
+
+def evaluate_scenario(
+    name: str,
+    n_variants: int = 1000,
+    seed: int = 0,
+    noise: float = 0.1,
+    drop_rate: float = 0.1,
+    swap_rate: float = 0.02,
+    engine: str = "heuristic",
+    interpolation: str = "linear",
+    reach: float = DEFAULT_REACH,
+) -> Dict[str, object]:
+    """Plan ``n_variants`` perturbations of one scenario and aggregate their scores; runs inside worker processes."""
+    start = time.perf_counter()
+    cones, car_pose = make_scenario(name)
+    if not isinstance(cones, ConeArray):
+        cones = ConeArray.from_cones(cones)
+    cones = cones[np.hypot(cones.x - car_pose.x, cones.y - car_pose.y) <= reach]
+    # Seeding from the name keeps each scenario's variants fixed whatever else is evaluated
+    rng = np.random.default_rng([seed, *name.encode()])
+    variants = perturb(cones, n_variants, rng, noise, drop_rate, swap_rate)
+    nominal = np.stack([cones.x, cones.y, cones.color.astype(np.float64)], axis=1)[None]
+    paths = plan_variants(car_pose, np.concatenate([nominal, variants]), engine, interpolation)
+
+    scores = score_paths(paths, car_pose, cones)
+    ok = ~scores["failed"][1:]
+    clearance = scores["clearance"][1:][ok]
+    heading = scores["heading_error"][1:][ok]
+    crossings = scores["crossings"][1:]
+    finite = clearance[np.isfinite(clearance)]
+    return {
+        "scenario": name,
+        "cones": len(cones),
+        "variants": n_variants,
+        "failed_rate": float(1.0 - ok.mean()) if n_variants else 0.0,
+        "nominal_clearance": float(scores["clearance"][0]),
+        "clearance_mean": float(finite.mean()) if len(finite) else None,
+        "clearance_p5": float(np.percentile(finite, 5)) if len(finite) else None,
+        "clearance_min": float(finite.min()) if len(finite) else None,
+        "nominal_crossings": int(scores["crossings"][0]),
+        "crossing_rate": float((crossings > 0).mean()) if n_variants else 0.0,
+        "heading_error_mean": float(heading.mean()) if len(heading) else None,
+        "heading_error_p95": float(np.percentile(heading, 95)) if len(heading) else None,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_evaluation(names: List[str], workers: Optional[int] = None, **kwargs) -> List[Dict[str, object]]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(names) == 1:
+        return [evaluate_scenario(name, **kwargs) for name in names]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_scenario, name, **kwargs) for name in names]
+        return [f.result() for f in futures]
+
+
+def _cross(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return format(value, spec) if value is not None else "-"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo robustness of PathPlanning under detection noise, dropped cones and color swaps."
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        metavar="PATTERN",
+        help="Scenario globs, names or gen:<a>-<b>:<n_cones> ranges (default: all listed scenarios)",
+    )
+    parser.add_argument("--variants", type=int, default=1000, help="Perturbed variants per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=0.1, help="Std-dev of cone position noise in meters")
+    parser.add_argument("--drop", type=float, default=0.1, help="Probability of dropping each cone")
+    parser.add_argument("--swap", type=float, default=0.02, help="Probability of swapping each cone's color")
+    parser.add_argument(
+        "--reach", type=float, default=DEFAULT_REACH, help="Only keep cones this close to the car (meters)"
+    )
+    parser.add_argument("--engine", choices=PathPlanning.ENGINES, default="heuristic")
+    parser.add_argument("--interpolation", choices=PathPlanning.INTERPOLATIONS, default="linear")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", type=str, default=None, help="Write per-scenario results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        names = expand_scenarios(args.scenarios)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    results = run_evaluation(
+        names,
+        args.workers,
+        n_variants=args.variants,
+        seed=args.seed,
+        noise=args.noise,
+        drop_rate=args.drop,
+        swap_rate=args.swap,
+        engine=args.engine,
+        interpolation=args.interpolation,
+        reach=args.reach,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{'scenario':>12} {'cones':>6} {'failed':>7} {'clear p5':>9} {'clear min':>9} {'cross':>7} {'head p95':>9}")
+    for r in results:
+        print(
+            f"{r['scenario']:>12} {r['cones']:>6} {r['failed_rate']:>7.1%} {_fmt(r['clearance_p5'], '>9.2f')}"
+            f" {_fmt(r['clearance_min'], '>9.2f')} {r['crossing_rate']:>7.1%} {_fmt(r['heading_error_p95'], '>9.3f')}"
+        )
+    total = sum(r["variants"] for r in results)
+    crossing = sum(r["crossing_rate"] * r["variants"] for r in results) / max(total, 1)
+    print(f"{total} variants of {len(results)} scenarios in {elapsed:.2f}s, {crossing:.1%} with boundary crossings")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .models import CarPose, ConeArray, ConeSet, PathArray
+from .path_planning import PathPlanning
+from .spatial_index import ConeGrid
+
+
+class SharedConeMap:
+    """Immutable cone map and its ``ConeGrid`` index in one shared memory block.
+
+    The creating process builds the grid once and copies the cone columns
+    and the CSR index arrays into a ``SharedMemory`` block. Other processes
+    ``attach(spec)`` to it and get read-only views, so every worker plans on
+    the same physical pages and nothing is pickled or rebuilt per worker.
+    Only the creator may ``unlink`` the block.
+    """
+
+    _FIELDS = ("x", "y", "color", "order", "starts", "xs", "ys")
+
+    def __init__(self, cones: ConeSet, cell_size: Optional[float] = None):
+        grid = ConeGrid(cones, cell_size)
+        arrays = {
+            "x": grid.cones.x,
+            "y": grid.cones.y,
+            "color": grid.cones.color.astype(np.int32),
+            "order": grid.order.astype(np.intp),
+            "starts": grid.starts.astype(np.intp),
+            "xs": grid.xs,
+            "ys": grid.ys,
+        }
+        layout = []
+        offset = 0
+        for field in self._FIELDS:
+            a = np.ascontiguousarray(arrays[field])
+            offset = -(-offset // 8) * 8  # keep every array 8-byte aligned
+            layout.append((field, a.dtype.str, a.shape, offset))
+            offset += a.nbytes
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self._owner = True
+        self.spec = {
+            "name": self._shm.name,
+            "layout": layout,
+            "grid": (grid.x0, grid.y0, grid.cell_size, grid.nx, grid.ny),
+        }
+        for field, _, _, _ in layout:
+            self._view(field)[...] = arrays[field]
+        self._wrap()
+
+    @classmethod
+    def attach(cls, spec: Dict[str, object]) -> "SharedConeMap":
+        """Map an existing block, e.g. in a worker process, from the creator's ``spec``."""
+        shared = cls.__new__(cls)
+        shared._shm = shared_memory.SharedMemory(name=spec["name"])
+        shared._owner = False
+        shared.spec = spec
+        shared._wrap()
+        return shared
+
+    def _view(self, field: str) -> np.ndarray:
+        for name, dtype, shape, offset in self.spec["layout"]:
+            if name == field:
+                return np.ndarray(shape, dtype=np.dtype(dtype), buffer=self._shm.buf, offset=offset)
+        raise KeyError(field)
+
+    def _wrap(self) -> None:
+        views = {}
+        for field in self._FIELDS:
+            view = self._view(field)
+            view.flags.writeable = False
+            views[field] = view
+        self.cones = ConeArray(views["x"], views["y"], views["color"])
+        x0, y0, cell_size, nx, ny = self.spec["grid"]
+        self.grid = ConeGrid.from_index(
+            self.cones, x0, y0, cell_size, nx, ny, views["order"], views["starts"], views["xs"], views["ys"]
+        )
+
+    def __len__(self) -> int:
+        return len(self.cones)
+
+    def close(self) -> None:
+        """Drop this process's mapping; the views handed out must not be used afterwards."""
+        self.cones = None
+        self.grid = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        if self._owner:
+            self._shm.unlink()
+
+
+# Per-worker-process state set up by _init_worker
+_worker_map: Optional[SharedConeMap] = None
+_worker_options: Dict[str, object] = {}
+
+
+def _init_worker(spec: Dict[str, object], options: Dict[str, object]) -> None:
+    global _worker_map, _worker_options
+    _worker_map = SharedConeMap.attach(spec)
+    _worker_options = options
+
+
+def _plan_poses(grid: ConeGrid, poses: np.ndarray, options: Dict[str, object]) -> List[np.ndarray]:
+    paths = []
+    for x, y, yaw in poses.tolist():
+        planner = PathPlanning(CarPose(x=x, y=y, yaw=yaw), grid.cones, spatial_index=grid, **options)
+        paths.append(planner.generatePath(as_array=True).xy)
+    return paths
+
+
+def _plan_in_worker(poses: np.ndarray) -> List[np.ndarray]:
+    return _plan_poses(_worker_map.grid, poses, _worker_options)
+
+
+class FleetPlanner:
+    """Plans for many vehicles on one shared, pre-indexed cone map.
+
+    mode="process" (the default) puts the map in a ``SharedConeMap`` and
+    runs a process pool whose workers attach to it once at startup; only
+    poses go in and path points come out, so throughput scales with cores.
+    mode="thread" shares the in-process ``ConeGrid`` with a thread pool,
+    which avoids process startup but mostly serializes on the GIL.
+
+    Use as a context manager, or call ``close()`` to stop the pool and free
+    the shared block.
+    """
+
+    MODES = ("process", "thread")
+
+    def __init__(
+        self,
+        cones: ConeSet,
+        workers: Optional[int] = None,
+        mode: str = "process",
+        engine: str = "heuristic",
+        interpolation: str = "linear",
+        cell_size: Optional[float] = None,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Valid options: {', '.join(self.MODES)}")
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+        self._options = {"engine": engine, "interpolation": interpolation}
+        self.shared: Optional[SharedConeMap] = None
+        self._executor: Executor
+        if mode == "process":
+            self.shared = SharedConeMap(cones, cell_size)
+            self.grid = self.shared.grid
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.shared.spec, self._options)
+            )
+        else:
+            self.grid = ConeGrid(cones, cell_size)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def plan(self, poses) -> List[PathArray]:
+        """One path per car pose; ``poses`` is a sequence of ``CarPose`` or an (N, 3) array of (x, y, yaw)."""
+        poses = _as_pose_array(poses)
+        if not len(poses):
+            return []
+        # A few chunks per worker balances uneven frames without paying per-pose dispatch
+        chunks = np.array_split(poses, min(len(poses), 4 * self.workers))
+        if self.mode == "process":
+            results = self._executor.map(_plan_in_worker, chunks)
+        else:
+            results = self._executor.map(_plan_poses, [self.grid] * len(chunks), chunks, [self._options] * len(chunks))
+        return [PathArray(xy) for chunk in results for xy in chunk]
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self.grid = None
+        if self.shared is not None:
+            self.shared.close()
+            self.shared.unlink()
+            self.shared = None
+
+    def __enter__(self) -> "FleetPlanner":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _as_pose_array(poses) -> np.ndarray:
+    if isinstance(poses, np.ndarray):
+        poses = np.asarray(poses, dtype=np.float64)
+    else:
+        poses = np.array([(p.x, p.y, p.yaw) for p in poses], dtype=np.float64)
+    return poses.reshape(-1, 3)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .models import CONE_DTYPE, CarPose, ConeArray, ConeSet
+
+
+# File layout, all little-endian:
+#   header:  magic (8 bytes), version (u4), frame header size (u4), cone record size (u4), reserved (u4)
+#   frames:  FRAME_DTYPE header followed by ``n_cones`` CONE_DTYPE records, back to back
+MAGIC = b"PPFRMLOG"
+LOG_VERSION = 1
+FRAME_DTYPE = np.dtype(
+    [("timestamp", "<f8"), ("x", "<f8"), ("y", "<f8"), ("yaw", "<f8"), ("n_cones", "<u4"), ("reserved", "<u4")]
+)
+_HEADER = struct.Struct("<8sIIII")
+
+
+class FrameLogWriter:
+    """Appends (cones, car pose) frames to a binary frame log.
+
+    Use as a context manager, or call ``close()``. Cones are written as
+    packed ``CONE_DTYPE`` records straight from the ``ConeArray`` columns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.frames = 0
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, LOG_VERSION, FRAME_DTYPE.itemsize, CONE_DTYPE.itemsize, 0))
+
+    def write(self, car_pose: CarPose, cones: ConeSet, timestamp: Optional[float] = None) -> None:
+        if self._file is None:
+            raise ValueError("write to a closed frame log")
+        if not isinstance(cones, ConeArray):
+            cones = ConeArray.from_cones(cones)
+        header = np.zeros(1, dtype=FRAME_DTYPE)
+        header[0] = (time.time() if timestamp is None else timestamp, car_pose.x, car_pose.y, car_pose.yaw, len(cones), 0)
+        records = np.empty(len(cones), dtype=CONE_DTYPE)
+        records["x"] = cones.x
+        records["y"] = cones.y
+        records["color"] = cones.color
+        self._file.write(header.tobytes())
+        self._file.write(records.tobytes())
+        self.frames += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "FrameLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def record_frames(path: str, frames: Iterable[Tuple[ConeSet, CarPose]]) -> int:
+    """Write (cones, car pose) frames, e.g. from ``iter_scenario_frames``, to ``path``; returns the frame count."""
+    with FrameLogWriter(path) as writer:
+        for cones, car_pose in frames:
+            writer.write(car_pose, cones)
+        return writer.frames
+
+
+class FrameLog:
+    """Read-only, memory-mapped view of a frame log.
+
+    Frames come back as ``(ConeArray, CarPose)`` like
+    ``scenarios.iter_scenario_frames``; the cone columns are views into the
+    mapped file, so nothing is parsed or copied until the planner touches
+    it and the page cache is the only buffer. Iterating walks the file once
+    front to back; indexing builds a frame offset table on first use. A
+    frame cut short at the end of the file (a recording that was killed) is
+    ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{path}: not a frame log (file too short)")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, frame_size, cone_size, _ = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path}: not a frame log (bad magic)")
+        if version != LOG_VERSION or frame_size != FRAME_DTYPE.itemsize or cone_size != CONE_DTYPE.itemsize:
+            self._mmap.close()
+            raise ValueError(f"{path}: unsupported frame log version {version}")
+        self._buffer = np.frombuffer(self._mmap, dtype=np.uint8)
+        self._offsets: Optional[np.ndarray] = None
+
+    def _frame_at(self, offset: int) -> Tuple[ConeArray, CarPose]:
+        header = np.frombuffer(self._buffer, dtype=FRAME_DTYPE, count=1, offset=offset)[0]
+        cones = ConeArray.from_buffer(self._buffer, count=int(header["n_cones"]), offset=offset + FRAME_DTYPE.itemsize)
+        return cones, CarPose(x=float(header["x"]), y=float(header["y"]), yaw=float(header["yaw"]))
+
+    def _scan(self) -> Iterator[int]:
+        offset, end = _HEADER.size, len(self._buffer)
+        while offset + FRAME_DTYPE.itemsize <= end:
+            n = int(np.frombuffer(self._buffer, dtype=FRAME_DTYPE, count=1, offset=offset)[0]["n_cones"])
+            next_offset = offset + FRAME_DTYPE.itemsize + n * CONE_DTYPE.itemsize
+            if next_offset > end:
+                break
+            yield offset
+            offset = next_offset
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Byte offset of every complete frame."""
+        if self._offsets is None:
+            self._offsets = np.fromiter(self._scan(), dtype=np.int64)
+        return self._offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> Tuple[ConeArray, CarPose]:
+        return self._frame_at(int(self.offsets[index]))
+
+    def __iter__(self) -> Iterator[Tuple[ConeArray, CarPose]]:
+        for offset in self._scan() if self._offsets is None else self._offsets.tolist():
+            yield self._frame_at(offset)
+
+    def timestamps(self) -> np.ndarray:
+        """(N,) recording timestamp of every frame, in seconds."""
+        out = np.empty(len(self))
+        for i, offset in enumerate(self.offsets.tolist()):
+            out[i] = np.frombuffer(self._buffer, dtype=FRAME_DTYPE, count=1, offset=offset)[0]["timestamp"]
+        return out
+
+    def close(self) -> None:
+        # Views handed out keep the mapping alive; drop ours and let them go
+        self._buffer = None
+        self._offsets = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "FrameLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
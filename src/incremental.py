@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import CarPose, Cone, ConeArray, ConeSet, Path2D
+from .path_planning import DEFAULT_NUM_POINTS, DEFAULT_STEP, PathPlanning
+from .spatial_index import ConeGrid
+
+
+# Cones, waypoints and car positions closer than this (meters) count as unchanged
+DEFAULT_TOLERANCE = 0.05
+
+# Heading changes below this (radians) count as unchanged
+DEFAULT_YAW_TOLERANCE = 0.01
+
+
+class IncrementalPlanner:
+    """Stateful wrapper around ``PathPlanning`` that reuses the previous plan.
+
+    The planner, the ``ConeArray`` and the forward cone selection are kept
+    between frames, and changes are detected within ``tolerance`` meters
+    (``yaw_tolerance`` radians for the heading), so detection noise does not
+    throw the plan away:
+
+    - with the same cone set and the car within the tolerances of the cones
+      and pose the path was last built from, that path is shifted to the new
+      pose;
+    - otherwise the forward cones are selected again, and if they match the
+      previous selection the waypoints are reused;
+    - new waypoints within ``tolerance`` of the previous ones are snapped
+      to them (except the last two, which set the direction the path is
+      extended in), and only the path segments between waypoints that actually
+      moved are resampled;
+    - the first segment, from the car to the first waypoint, always follows
+      the new pose, and the path is re-joined and extended from there.
+
+    With both tolerances at 0 the result is identical to a fresh
+    ``PathPlanning(...).generatePath()``. Otherwise the path stays within
+    about ``tolerance`` of the fresh one, except where a fresh plan would
+    jump to another cone selection within the tolerances of the last one.
+    """
+
+    def __init__(
+        self,
+        step: float = DEFAULT_STEP,
+        num_points: int = DEFAULT_NUM_POINTS,
+        tolerance: float = DEFAULT_TOLERANCE,
+        yaw_tolerance: float = DEFAULT_YAW_TOLERANCE,
+    ):
+        self.step = step
+        self.num_points = num_points
+        self.tolerance = tolerance
+        self.yaw_tolerance = yaw_tolerance
+        self._planner: Optional[PathPlanning] = None
+        self._source: Optional[ConeSet] = None
+        self._cones: Optional[ConeArray] = None
+        # Cones of the frame the path was last planned from; later frames are
+        # compared with these rather than with the previous frame, so cones
+        # drifting a little every frame cannot add up unnoticed
+        self._planned: Optional[ConeArray] = None
+        self._selection: Optional[Tuple[List[Cone], List[Cone]]] = None
+        self._waypoints: List[Tuple[float, float]] = []
+        self._segments: List[Path2D] = []
+        self._pose: Optional[CarPose] = None
+        self._path: Path2D = []
+        self.stats: Dict[str, int] = {
+            "frames": 0,
+            "shifted": 0,
+            "waypoints_reused": 0,
+            "segments_reused": 0,
+            "segments_resampled": 0,
+        }
+
+    def reset(self) -> None:
+        """Forget the previous plan; the next update plans from scratch."""
+        self._planned = None
+        self._selection = None
+        self._waypoints = []
+        self._segments = []
+        self._pose = None
+        self._path = []
+
+    def update(self, car_pose: CarPose, cones: ConeSet, spatial_index: Optional[ConeGrid] = None) -> Path2D:
+        self.stats["frames"] += 1
+        same_cones = self._set_cones(cones, bool(self._path) and self._near(car_pose, self._pose))
+        planner = self._planner
+        if planner is None:
+            planner = PathPlanning(car_pose, self._cones, spatial_index, step=self.step, num_points=self.num_points)
+            self._planner = planner
+        else:
+            planner.car_pose = car_pose
+            planner.cones = self._cones
+            planner.spatial_index = spatial_index
+
+        if same_cones:
+            self.stats["shifted"] += 1
+            dx, dy = car_pose.x - self._pose.x, car_pose.y - self._pose.y
+            return [(x + dx, y + dy) for x, y in self._path]
+
+        blue_forward, yellow_forward = planner._select_forward_cones()
+        if not blue_forward and not yellow_forward:
+            self.reset()
+            return planner._path_straight(self.step, self.num_points)
+
+        if (
+            self._selection is not None
+            and self._close_selection(blue_forward, self._selection[0])
+            and self._close_selection(yellow_forward, self._selection[1])
+            and abs(_angle_diff(car_pose.yaw, self._pose.yaw)) <= self.yaw_tolerance
+        ):
+            blue_forward, yellow_forward = self._selection
+            waypoints = self._waypoints
+            self.stats["waypoints_reused"] += 1
+        else:
+            waypoints = planner._compute_waypoints(blue_forward, yellow_forward)
+            if not waypoints:
+                self.reset()
+                return planner._path_straight(self.step, self.num_points)
+            # Waypoints that only moved by noise keep their old position, so their
+            # segments stay valid. The last two are left alone: the path is
+            # extended along their direction, where snapping would be amplified.
+            tol = self.tolerance
+            for i in range(min(len(waypoints) - 2, len(self._waypoints))):
+                (x, y), (ox, oy) = waypoints[i], self._waypoints[i]
+                if math.hypot(x - ox, y - oy) <= tol:
+                    waypoints[i] = (ox, oy)
+
+        # Segment i joins waypoints[i] and waypoints[i + 1]; keep it if both
+        # ends are where they were last frame.
+        segments: List[Path2D] = []
+        for i in range(len(waypoints) - 1):
+            if (
+                i + 1 < len(self._waypoints)
+                and waypoints[i] == self._waypoints[i]
+                and waypoints[i + 1] == self._waypoints[i + 1]
+            ):
+                segments.append(self._segments[i])
+                self.stats["segments_reused"] += 1
+            else:
+                segments.append(planner._sample_segment(waypoints[i], waypoints[i + 1], self.step, self.num_points))
+                self.stats["segments_resampled"] += 1
+
+        head = planner._sample_segment((car_pose.x, car_pose.y), waypoints[0], self.step, self.num_points)
+        path = planner._join_segments([head] + segments, self.step, self.num_points)
+
+        self._planned = self._cones
+        self._selection = (blue_forward, yellow_forward)
+        self._waypoints = waypoints
+        self._segments = segments
+        self._pose = car_pose
+        self._path = path
+        return list(path)
+
+    def _set_cones(self, cones: ConeSet, compare: bool) -> bool:
+        """Keep the ``ConeArray`` of the frame; with ``compare``, True if the cone set is
+        the same as the one the path was last planned from."""
+        if cones is self._source:
+            # Last frame's cones: planned from, or already found the same as those
+            return compare
+        array = cones if isinstance(cones, ConeArray) else ConeArray.from_cones(cones)
+        planned = self._planned
+        self._source = cones
+        self._cones = array
+        return compare and self._close(array, planned) and np.array_equal(array.color, planned.color)
+
+    def _close(self, a: ConeArray, b: ConeArray) -> bool:
+        if len(a) != len(b):
+            return False
+        tol = self.tolerance
+        if len(a) > 16:
+            return max(float(np.abs(a.x - b.x).max()), float(np.abs(a.y - b.y).max())) <= tol
+        # A single frame of detections is small enough for plain floats to be faster
+        return all(abs(u - v) <= tol for u, v in zip(a.x.tolist() + a.y.tolist(), b.x.tolist() + b.y.tolist()))
+
+    def _close_selection(self, a: List[Cone], b: List[Cone]) -> bool:
+        tol = self.tolerance
+        return len(a) == len(b) and all(abs(u.x - v.x) <= tol and abs(u.y - v.y) <= tol for u, v in zip(a, b))
+
+    def _near(self, pose: CarPose, previous: CarPose) -> bool:
+        return (
+            math.hypot(pose.x - previous.x, pose.y - previous.y) <= self.tolerance
+            and abs(_angle_diff(pose.yaw, previous.yaw)) <= self.yaw_tolerance
+        )
+
+
+def _angle_diff(a: float, b: float) -> float:
+    return (a - b + math.pi) % (2 * math.pi) - math.pi
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .models import CarPose, ConeArray
+
+
+# Bump when the primitive layout changes so stale cache files are ignored
+LATTICE_VERSION = 1
+
+# Curvatures (1/m) each half of a primitive may take
+MAX_CURVATURE = 0.4
+CURVATURE_STEPS = 21
+
+# Cost weights, see LatticePlanner.score
+CLEARANCE = 1.2
+W_CLEARANCE = 20.0
+W_CENTER = 1.0
+W_HEADING = 0.2
+
+_libraries: Dict[Tuple[float, int], np.ndarray] = {}
+
+
+def build_primitives(step: float, num_points: int) -> np.ndarray:
+    """(P, num_points, 3) library of (x, y, heading) arcs in the car frame.
+
+    Each primitive drives num_points steps of ``step`` meters from the car
+    (at the origin, facing +x): the first half at one curvature and the
+    second half at another, out of CURVATURE_STEPS values in
+    [-MAX_CURVATURE, MAX_CURVATURE]. That covers straights, constant arcs
+    and S-bends.
+    """
+    kappa = np.linspace(-MAX_CURVATURE, MAX_CURVATURE, CURVATURE_STEPS)
+    k1, k2 = np.meshgrid(kappa, kappa, indexing="ij")
+    half = num_points // 2
+    curvature = np.concatenate(
+        [np.repeat(k1.reshape(-1, 1), half, axis=1), np.repeat(k2.reshape(-1, 1), num_points - half, axis=1)], axis=1
+    )
+    # Exact integration of piecewise-constant curvature, one step at a time
+    heading_end = np.cumsum(curvature * step, axis=1)
+    heading_start = heading_end - curvature * step
+    mid = (heading_start + heading_end) / 2
+    # Chord of an arc of length step turning by curvature * step
+    chord = step * np.sinc(curvature * step / (2 * math.pi))
+    xy = np.cumsum(np.stack([chord * np.cos(mid), chord * np.sin(mid)], axis=2), axis=1)
+    return np.concatenate([xy, heading_end[:, :, None]], axis=2)
+
+
+def primitive_library(step: float, num_points: int, cache_dir: Optional[str] = None) -> np.ndarray:
+    """The primitive library for (step, num_points), memory-mapped from disk when cached.
+
+    The first call for a configuration builds the library and writes it to
+    ``cache_dir`` (default ``$PATH_PLANNING_CACHE`` or ``~/.cache/path_planning``);
+    later startups map that file read-only instead of rebuilding. An
+    unwritable cache directory only costs the rebuild.
+    """
+    key = (float(step), int(num_points))
+    library = _libraries.get(key)
+    if library is not None:
+        return library
+
+    if cache_dir is None:
+        cache_dir = os.environ.get("PATH_PLANNING_CACHE") or os.path.join(
+            os.path.expanduser("~"), ".cache", "path_planning"
+        )
+    filename = os.path.join(
+        cache_dir,
+        f"lattice-v{LATTICE_VERSION}-k{MAX_CURVATURE:g}x{CURVATURE_STEPS}-step{step:g}-n{num_points}.npy",
+    )
+    try:
+        library = np.load(filename, mmap_mode="r")
+    except (OSError, ValueError):
+        library = build_primitives(step, num_points)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file first so concurrent starters never map a partial file
+            fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, library)
+            os.replace(tmp, filename)
+            library = np.load(filename, mmap_mode="r")
+        except OSError:
+            library.flags.writeable = False
+    _libraries[key] = library
+    return library
+
+
+class LatticePlanner:
+    """Picks the best primitive of a fixed library against the cones in one vectorized pass.
+
+    The cost is bounded by the library size and the number of cones in
+    reach, whatever the cone layout, so it also works where the waypoint
+    heuristic degenerates.
+    """
+
+    def __init__(self, step: float, num_points: int, cache_dir: Optional[str] = None, half_lane: float = 2.5):
+        self.step = step
+        self.num_points = num_points
+        self.half_lane = half_lane
+        self.primitives = primitive_library(step, num_points, cache_dir)
+        # Cones are scored against every other point, which is plenty at
+        # CLEARANCE > 2 * step and halves the work; float32 halves it again
+        self._xs = np.ascontiguousarray(self.primitives[:, 1::2, 0], dtype=np.float32)
+        self._ys = np.ascontiguousarray(self.primitives[:, 1::2, 1], dtype=np.float32)
+        heading = self.primitives[:, :, 2]
+        self._heading_cost = W_HEADING * np.mean(heading * heading, axis=1)
+
+    def score(self, car_pose: CarPose, cones: ConeArray) -> np.ndarray:
+        """(P,) cost of every primitive; lower is better.
+
+        - clearance: squared intrusion of the nearest cone of each color into
+          CLEARANCE around every path point;
+        - centering: with both colors in reach, the squared difference of the
+          distances to the nearest blue and yellow cone; with one color, the
+          squared deviation of that distance from ``half_lane``;
+        - heading: mean squared heading change relative to ``car_pose.yaw``.
+        """
+        cost = self._heading_cost.astype(np.float64)
+
+        reach = self.step * self.num_points + CLEARANCE + self.half_lane
+        c, s = math.cos(car_pose.yaw), math.sin(car_pose.yaw)
+        dx = cones.x - car_pose.x
+        dy = cones.y - car_pose.y
+        near = np.hypot(dx, dy) <= reach
+        if not near.any():
+            return cost
+        lx = c * dx[near] + s * dy[near]
+        ly = -s * dx[near] + c * dy[near]
+        color = cones.color[near]
+
+        # (P, N, C) squared distances from every primitive point to the cones
+        # in reach, per color; only the (P, N) minimum needs a square root
+        px, py = self._xs[:, :, None], self._ys[:, :, None]
+        nearest = []
+        for side in (1, 0):
+            mask = color == side
+            if not mask.any():
+                nearest.append(None)
+                continue
+            ddx = px - lx[mask].astype(np.float32)
+            ddy = py - ly[mask].astype(np.float32)
+            dist = np.sqrt((ddx * ddx + ddy * ddy).min(axis=2))
+            intrusion = np.maximum(CLEARANCE - dist, 0.0)
+            cost += W_CLEARANCE * np.einsum("pn,pn->p", intrusion, intrusion)
+            nearest.append(dist)
+
+        blue, yellow = nearest
+        if blue is not None and yellow is not None:
+            gap = blue - yellow
+        else:
+            gap = (blue if blue is not None else yellow) - self.half_lane
+        cost += W_CENTER * np.mean(gap * gap, axis=1)
+        return cost
+
+    def plan(self, car_pose: CarPose, cones: ConeArray) -> np.ndarray:
+        """(num_points, 2) world-frame points of the cheapest primitive."""
+        best = self.primitives[int(np.argmin(self.score(car_pose, cones))), :, :2]
+        c, s = math.cos(car_pose.yaw), math.sin(car_pose.yaw)
+        return np.stack([car_pose.x + c * best[:, 0] - s * best[:, 1], car_pose.y + s * best[:, 0] + c * best[:, 1]], axis=1)
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .models import CarPose, ConeArray
+from .spatial_index import ConeGrid
+
+
+# Same corridor assumption as PathPlanning._compute_waypoints: with only one
+# boundary visible, the centerline runs HALF_LANE from it.
+HALF_LANE = 2.5
+
+# Blue-yellow cones farther apart than this are not across the track from each other
+MAX_TRACK_WIDTH = 8.0
+
+# Neighbors looked up per point when chaining; the walk only falls back to a
+# wider grid query once all of them are visited
+CHAIN_NEIGHBORS = 8
+
+
+class Corridor:
+    """Drivable corridor: reference points with a left normal and the room on either side.
+
+    A point of the racing line is ``centers[i] + alpha[i] * normals[i]`` with
+    ``-right[i] <= alpha[i] <= left[i]``.
+    """
+
+    __slots__ = ("centers", "normals", "left", "right")
+
+    def __init__(self, centers, normals, left, right):
+        self.centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        self.normals = np.asarray(normals, dtype=np.float64).reshape(-1, 2)
+        self.left = np.asarray(left, dtype=np.float64).reshape(-1)
+        self.right = np.asarray(right, dtype=np.float64).reshape(-1)
+
+    def __len__(self) -> int:
+        return len(self.centers)
+
+    def points(self, alpha: np.ndarray) -> np.ndarray:
+        return self.centers + alpha[:, None] * self.normals
+
+
+def corridor_from_cones(
+    car_pose: CarPose,
+    blue: ConeArray,
+    yellow: ConeArray,
+    half_lane: float = HALF_LANE,
+) -> Corridor:
+    """Corridor through the given forward cones, ordered from the car outwards.
+
+    With both colors visible every blue cone is paired with the nearest
+    yellow one and the corridor is the segment between them. With a single
+    color the reference point sits ``half_lane`` to the inside of each cone,
+    with ``half_lane`` of room on both sides.
+    """
+    if len(blue) and len(yellow):
+        # Only yellow cones within MAX_TRACK_WIDTH can pair, so a grid of that
+        # cell size answers every blue cone from its own and adjacent cells
+        grid = ConeGrid(ConeArray(yellow.x, yellow.y, np.zeros(len(yellow), dtype=np.int32)), MAX_TRACK_WIDTH)
+        j = grid.nearest_within(blue.x, blue.y, 0, 1, MAX_TRACK_WIDTH)[:, 0]
+        keep = j >= 0
+        if not keep.any():
+            return Corridor(np.empty((0, 2)), np.empty((0, 2)), [], [])
+        j = j[keep]
+        b = np.stack([blue.x[keep], blue.y[keep]], axis=1)
+        y = np.stack([yellow.x[j], yellow.y[j]], axis=1)
+        width = np.hypot(*(b - y).T)
+        centers = (b + y) / 2
+        normals = (b - y) / np.maximum(width, 1e-9)[:, None]
+        half = width / 2
+        order = _chain(car_pose, centers)
+        return Corridor(centers[order], normals[order], half[order], half[order])
+
+    cones, side = (blue, 1.0) if len(blue) else (yellow, -1.0)
+    if not len(cones):
+        return Corridor(np.empty((0, 2)), np.empty((0, 2)), [], [])
+    xy = np.stack([cones.x, cones.y], axis=1)
+    xy = xy[_chain(car_pose, xy)]
+    if len(xy) >= 2:
+        tangents = np.gradient(xy, axis=0)
+    else:
+        tangents = np.array([[math.cos(car_pose.yaw), math.sin(car_pose.yaw)]])
+    tangents /= np.maximum(np.hypot(tangents[:, 0], tangents[:, 1]), 1e-9)[:, None]
+    normals = np.stack([-tangents[:, 1], tangents[:, 0]], axis=1)
+    # Blue is the left boundary, so the track center lies to its right
+    centers = xy - side * half_lane * normals
+    room = np.full(len(xy), half_lane)
+    return Corridor(centers, normals, room, room)
+
+
+def min_curvature_offsets(
+    corridor: Corridor,
+    margin: float = 0.5,
+    smoothing: float = 1e-3,
+    start: Optional[Tuple[CarPose, float]] = None,
+    max_iter: int = 30,
+) -> np.ndarray:
+    """Lateral offsets of the minimum-curvature line through ``corridor``.
+
+    Minimizes the summed squared second differences of the line points (a
+    discrete curvature measure for evenly spaced points) plus ``smoothing``
+    times the squared offsets, keeping each point ``margin`` inside the
+    corridor. The normal equations are pentadiagonal and solved in O(n);
+    the corridor bounds are handled with a small active-set loop that
+    re-solves the system at most ``max_iter`` times.
+
+    start: optional (car pose, spacing). The line is then anchored at the
+    car and leaves it along its heading, by fixing the car position and a
+    point ``spacing`` behind it as the first two points.
+    """
+    centers, normals = corridor.centers, corridor.normals
+    lower = -np.maximum(corridor.right - margin, 0.0)
+    upper = np.maximum(corridor.left - margin, 0.0)
+    fixed = np.zeros(len(corridor), dtype=bool)
+    values = np.zeros(len(corridor))  # offsets of fixed (and later pinned) points
+    if start is not None:
+        car_pose, spacing = start
+        heading = np.array([math.cos(car_pose.yaw), math.sin(car_pose.yaw)])
+        car = np.array([car_pose.x, car_pose.y])
+        left = np.array([-heading[1], heading[0]])
+        centers = np.vstack([car - spacing * heading, car, centers])
+        normals = np.vstack([left, left, normals])
+        lower = np.concatenate([[0.0, 0.0], lower])
+        upper = np.concatenate([[0.0, 0.0], upper])
+        fixed = np.concatenate([[True, True], fixed])
+        values = np.concatenate([[0.0, 0.0], values])
+
+    n = len(centers)
+    if n < 3:
+        alpha = np.clip(values, lower, upper)
+        return alpha[2:] if start is not None else alpha
+
+    # Second difference i (points i, i+1, i+2) is D + a*alpha[i] + b*alpha[i+1] + c*alpha[i+2]
+    d = centers[:-2] - 2 * centers[1:-1] + centers[2:]
+    a, b, c = normals[:-2], -2 * normals[1:-1], normals[2:]
+    aa, bb, cc = (a * a).sum(1), (b * b).sum(1), (c * c).sum(1)
+    diag = np.full(n, float(smoothing))
+    diag[:-2] += aa
+    diag[1:-1] += bb
+    diag[2:] += cc
+    off1 = np.zeros(n - 1)
+    off1[:-1] += (a * b).sum(1)
+    off1[1:] += (b * c).sum(1)
+    off2 = (a * c).sum(1)
+    rhs = np.zeros(n)
+    rhs[:-2] -= (a * d).sum(1)
+    rhs[1:-1] -= (b * d).sum(1)
+    rhs[2:] -= (c * d).sum(1)
+
+    # Primal active set: pin offsets that leave the corridor to its edge and
+    # release pinned ones whose gradient pulls them back inside.
+    pinned = np.zeros(n, dtype=bool)
+    for _ in range(max_iter):
+        alpha = _solve_fixed(diag, off1, off2, rhs, fixed | pinned, values)
+        grad = diag * alpha - rhs
+        grad[:-1] += off1 * alpha[1:]
+        grad[1:] += off1 * alpha[:-1]
+        grad[:-2] += off2 * alpha[2:]
+        grad[2:] += off2 * alpha[:-2]
+        release = pinned & (((values <= lower) & (grad < 0.0)) | ((values >= upper) & (grad > 0.0)))
+        low = ~fixed & ~pinned & (alpha < lower - 1e-9)
+        high = ~fixed & ~pinned & (alpha > upper + 1e-9)
+        if not (release.any() or low.any() or high.any()):
+            break
+        values = np.where(low, lower, np.where(high, upper, values))
+        pinned = (pinned & ~release) | low | high
+    alpha = np.clip(alpha, lower, upper)
+    return alpha[2:] if start is not None else alpha
+
+
+def min_curvature_waypoints(
+    car_pose: CarPose,
+    blue: ConeArray,
+    yellow: ConeArray,
+    half_lane: float = HALF_LANE,
+    margin: float = 0.5,
+) -> List[Tuple[float, float]]:
+    """Minimum-curvature waypoints through the corridor of the given forward cones.
+
+    The line starts at the car along its heading. Second differences only
+    measure curvature for evenly spaced points, so the anchor behind the car
+    sits one typical corridor spacing back, and corridor points closer than
+    half of that to the car are dropped.
+    """
+    corridor = corridor_from_cones(car_pose, blue, yellow, half_lane)
+    if not len(corridor):
+        return []
+    steps = np.hypot(*np.diff(corridor.centers, axis=0).T)
+    spacing = float(np.median(steps)) if len(steps) else half_lane
+    near = np.hypot(corridor.centers[:, 0] - car_pose.x, corridor.centers[:, 1] - car_pose.y) < spacing / 2
+    if near.all():
+        return []
+    if near.any():
+        keep = ~near
+        corridor = Corridor(
+            corridor.centers[keep], corridor.normals[keep], corridor.left[keep], corridor.right[keep]
+        )
+    alpha = min_curvature_offsets(corridor, margin=margin, start=(car_pose, spacing))
+    pts = corridor.points(alpha)
+    return list(zip(pts[:, 0].tolist(), pts[:, 1].tolist()))
+
+
+def solve_pentadiagonal(diag: np.ndarray, off1: np.ndarray, off2: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """Solve a symmetric positive definite pentadiagonal system in O(n).
+
+    diag holds A[i, i], off1 A[i, i + 1] and off2 A[i, i + 2]. This is a
+    banded Cholesky factorization followed by two substitutions.
+    """
+    n = len(diag)
+    diag, off1, off2, rhs = diag.tolist(), off1.tolist(), off2.tolist(), rhs.tolist()
+    # L[i, i] = l0[i], L[i, i - 1] = l1[i], L[i, i - 2] = l2[i]
+    l0 = [0.0] * n
+    l1 = [0.0] * n
+    l2 = [0.0] * n
+    y = [0.0] * n
+    for i in range(n):
+        if i >= 2:
+            l2[i] = off2[i - 2] / l0[i - 2]
+        if i >= 1:
+            l1[i] = (off1[i - 1] - l2[i] * l1[i - 1]) / l0[i - 1]
+        l0[i] = math.sqrt(diag[i] - l1[i] * l1[i] - l2[i] * l2[i])
+        acc = rhs[i]
+        if i >= 1:
+            acc -= l1[i] * y[i - 1]
+        if i >= 2:
+            acc -= l2[i] * y[i - 2]
+        y[i] = acc / l0[i]
+    x = [0.0] * n
+    for i in range(n - 1, -1, -1):
+        acc = y[i]
+        if i + 1 < n:
+            acc -= l1[i + 1] * x[i + 1]
+        if i + 2 < n:
+            acc -= l2[i + 2] * x[i + 2]
+        x[i] = acc / l0[i]
+    return np.array(x)
+
+
+def _solve_fixed(diag, off1, off2, rhs, fixed: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Solve with the fixed unknowns pinned to ``values``, keeping the band structure."""
+    if not fixed.any():
+        return solve_pentadiagonal(diag, off1, off2, rhs)
+    v = np.where(fixed, values, 0.0)
+    # Move the pinned columns to the right-hand side ...
+    rhs = rhs.copy()
+    rhs[:-1] -= off1 * v[1:]
+    rhs[1:] -= off1 * v[:-1]
+    rhs[:-2] -= off2 * v[2:]
+    rhs[2:] -= off2 * v[:-2]
+    # ... and replace their rows by the identity
+    free = ~fixed
+    diag = np.where(fixed, 1.0, diag)
+    off1 = np.where(free[:-1] & free[1:], off1, 0.0)
+    off2 = np.where(free[:-2] & free[2:], off2, 0.0)
+    rhs = np.where(fixed, values, rhs)
+    return solve_pentadiagonal(diag, off1, off2, rhs)
+
+
+def _chain(car_pose: CarPose, xy: np.ndarray) -> np.ndarray:
+    """Order points by greedily walking to the nearest unvisited one, starting at the car.
+
+    Each point's CHAIN_NEIGHBORS nearest points are looked up at once through
+    a ``ConeGrid``; the nearest unvisited one is the first unvisited entry of
+    that list. Only when all of them are visited (the end of a stretch) is the
+    grid queried again, with a doubling k, so the walk costs about O(n) rather
+    than a scan of the remaining points per step.
+    """
+    n = len(xy)
+    if not n:
+        return np.empty(0, dtype=np.int64)
+    grid = ConeGrid(ConeArray(xy[:, 0], xy[:, 1], np.zeros(n, dtype=np.int32)), MAX_TRACK_WIDTH)
+    neighbors = grid.nearest_within(xy[:, 0], xy[:, 1], 0, CHAIN_NEIGHBORS + 1, MAX_TRACK_WIDTH).tolist()
+    visited = [False] * n
+
+    def nearest_unvisited(pose: CarPose) -> int:
+        k = CHAIN_NEIGHBORS
+        while True:
+            found = grid._query(pose, 0, k, 0.0, math.inf).tolist()
+            for i in found:
+                if not visited[i]:
+                    return i
+            k *= 2
+
+    order = [nearest_unvisited(car_pose)]
+    visited[order[0]] = True
+    for _ in range(n - 1):
+        here = order[-1]
+        k = next((i for i in neighbors[here] if i >= 0 and not visited[i]), -1)
+        if k < 0:
+            k = nearest_unvisited(CarPose(x=float(xy[here, 0]), y=float(xy[here, 1]), yaw=0.0))
+        visited[k] = True
+        order.append(k)
+    return np.array(order, dtype=np.int64)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple, Union, overload
+
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -26,5 +28,216 @@ class CarPose:
     yaw: float  # heading in radians, 0 along +x, pi/2 along +y
 
 
+# Packed on-disk/in-memory layout of one cone record, see ConeArray.from_buffer
+CONE_DTYPE = np.dtype([("x", "<f8"), ("y", "<f8"), ("color", "<i4")])
+
+
+class ConeArray:
+    """Columnar (struct-of-arrays) cone container.
+
+    Holds parallel ``x``, ``y`` and ``color`` NumPy columns with the same
+    meaning as the fields of :class:`Cone`. Building from arrays or buffers
+    never copies when the inputs already have a compatible dtype, so large
+    detection sets can be handed to the planner without allocating one
+    object per cone.
+    """
+
+    __slots__ = ("x", "y", "color")
+
+    def __init__(self, x, y, color):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        color = np.asarray(color)
+        if color.dtype.kind not in "iuf":
+            color = color.astype(np.int32)
+        self.color = color
+        if not (self.x.ndim == self.y.ndim == self.color.ndim == 1):
+            raise ValueError("ConeArray columns must be one-dimensional")
+        if not (len(self.x) == len(self.y) == len(self.color)):
+            raise ValueError(
+                f"ConeArray columns differ in length: {len(self.x)}, {len(self.y)}, {len(self.color)}"
+            )
+
+    @classmethod
+    def from_cones(cls, cones: Iterable[Cone]) -> "ConeArray":
+        cones = list(cones)
+        return cls(
+            np.fromiter((c.x for c in cones), dtype=np.float64, count=len(cones)),
+            np.fromiter((c.y for c in cones), dtype=np.float64, count=len(cones)),
+            np.fromiter((c.color for c in cones), dtype=np.int32, count=len(cones)),
+        )
+
+    @classmethod
+    def from_array(cls, xyc) -> "ConeArray":
+        """Wrap an (N, 3) array of (x, y, color) rows; the columns are views."""
+        xyc = np.asarray(xyc, dtype=np.float64)
+        if xyc.ndim != 2 or xyc.shape[1] != 3:
+            raise ValueError(f"expected an (N, 3) array, got shape {xyc.shape}")
+        return cls(xyc[:, 0], xyc[:, 1], xyc[:, 2])
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> "ConeArray":
+        """Wrap a structured array with x, y and color fields; the columns are views."""
+        return cls(records["x"], records["y"], records["color"])
+
+    @classmethod
+    def from_buffer(cls, buffer, count: int = -1, offset: int = 0) -> "ConeArray":
+        """Zero-copy view over packed ``CONE_DTYPE`` records in any buffer object."""
+        return cls.from_records(np.frombuffer(buffer, dtype=CONE_DTYPE, count=count, offset=offset))
+
+    def of_color(self, color: int) -> "ConeArray":
+        return self[self.color == color]
+
+    def to_cones(self) -> List[Cone]:
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @overload
+    def __getitem__(self, index: int) -> Cone: ...
+
+    @overload
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> "ConeArray": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Cone(x=float(self.x[index]), y=float(self.y[index]), color=int(self.color[index]))
+        return ConeArray(self.x[index], self.y[index], self.color[index])
+
+    def __iter__(self) -> Iterator[Cone]:
+        for x, y, color in zip(self.x.tolist(), self.y.tolist(), self.color.tolist()):
+            yield Cone(x=x, y=y, color=int(color))
+
+    def __repr__(self) -> str:
+        return f"ConeArray(n={len(self)})"
+
+
 # Public type alias for a path: list of 2D points in world frame
 Path2D = List[Tuple[float, float]]
+
+
+class PathArray:
+    """Path stored as one contiguous, read-only (N, 2) float64 array.
+
+    The ``arc_length``, ``heading`` and ``curvature`` columns are computed on
+    first access and cached. Heading uses central differences (one-sided at
+    the ends). Curvature is the signed curvature of the circle through
+    each point and its two neighbours, positive when turning left; the end
+    points copy their neighbour. The points can be exported without copying
+    through ``np.asarray(path)``, ``as_buffer()`` or, on Python 3.12+,
+    ``memoryview(path)``.
+    """
+
+    __slots__ = ("xy", "_arc_length", "_heading", "_curvature")
+
+    def __init__(self, xy):
+        xy = np.ascontiguousarray(xy, dtype=np.float64)
+        if xy.size == 0:
+            xy = xy.reshape(0, 2)
+        if xy.ndim != 2 or xy.shape[1] != 2:
+            raise ValueError(f"expected an (N, 2) array, got shape {xy.shape}")
+        # A read-only view, so the cached columns can never go stale
+        self.xy = xy.view()
+        self.xy.flags.writeable = False
+        self._arc_length = None
+        self._heading = None
+        self._curvature = None
+
+    @classmethod
+    def from_points(cls, points: Iterable[Tuple[float, float]]) -> "PathArray":
+        return cls(np.array(list(points), dtype=np.float64))
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.xy[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.xy[:, 1]
+
+    @property
+    def arc_length(self) -> np.ndarray:
+        """(N,) distance along the path from the first point."""
+        if self._arc_length is None:
+            s = np.zeros(len(self))
+            if len(self) > 1:
+                np.cumsum(np.hypot(*np.diff(self.xy, axis=0).T), out=s[1:])
+            s.flags.writeable = False
+            self._arc_length = s
+        return self._arc_length
+
+    @property
+    def length(self) -> float:
+        return float(self.arc_length[-1]) if len(self) else 0.0
+
+    @property
+    def heading(self) -> np.ndarray:
+        """(N,) tangent direction in radians."""
+        if self._heading is None:
+            if len(self) < 2:
+                heading = np.zeros(len(self))
+            else:
+                d = np.gradient(self.xy, axis=0)
+                heading = np.arctan2(d[:, 1], d[:, 0])
+            heading.flags.writeable = False
+            self._heading = heading
+        return self._heading
+
+    @property
+    def curvature(self) -> np.ndarray:
+        """(N,) signed curvature in 1/m."""
+        if self._curvature is None:
+            kappa = np.zeros(len(self))
+            if len(self) >= 3:
+                a = self.xy[1:-1] - self.xy[:-2]
+                b = self.xy[2:] - self.xy[1:-1]
+                c = self.xy[2:] - self.xy[:-2]
+                cross = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+                norms = np.hypot(*a.T) * np.hypot(*b.T) * np.hypot(*c.T)
+                np.divide(2.0 * cross, norms, out=kappa[1:-1], where=norms > 1e-12)
+                kappa[0] = kappa[1]
+                kappa[-1] = kappa[-2]
+            kappa.flags.writeable = False
+            self._curvature = kappa
+        return self._curvature
+
+    def as_buffer(self) -> memoryview:
+        """Zero-copy, read-only memoryview of the (N, 2) points."""
+        return memoryview(self.xy)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self.as_buffer()
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if copy or (dtype is not None and np.dtype(dtype) != self.xy.dtype):
+            return np.array(self.xy, dtype=dtype)
+        return self.xy
+
+    def to_list(self) -> Path2D:
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self.xy)
+
+    @overload
+    def __getitem__(self, index: int) -> Tuple[float, float]: ...
+
+    @overload
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> "PathArray": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            x, y = self.xy[index].tolist()
+            return x, y
+        return PathArray(self.xy[index])
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        for x, y in self.xy.tolist():
+            yield x, y
+
+    def __repr__(self) -> str:
+        return f"PathArray(n={len(self)})"
+
+# Anything the planner accepts as a cone set
+ConeSet = Union[List[Cone], ConeArray]
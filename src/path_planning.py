@@ -1,60 +1,749 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from collections import OrderedDict
+import functools
+import hashlib
 import math
+import threading
+import time
 
-from .models import CarPose, Cone, Path2D
+import numpy as np
+
+from .delaunay import ConeTriangulation
+from .lattice import LatticePlanner
+from .min_curvature import min_curvature_waypoints
+from .models import CarPose, Cone, ConeArray, ConeSet, Path2D, PathArray
+from .profiling import PlannerProfile, waypoint_branch, waypoint_branch_for
+from .spatial_index import ConeGrid
+
+if TYPE_CHECKING:
+    from .raceline import GlobalRaceline
+
+
+DEFAULT_STEP = 0.4
+DEFAULT_NUM_POINTS = 25
+
+# _compute_waypoints never looks past the third-nearest cone of a color
+MAX_FORWARD_CONES = 3
+
+# Up to this many cones the forward cones are picked in plain Python: on a
+# single frame of detections NumPy's per-call overhead costs more than the loop
+SMALL_FRAME_CONES = 96
+
+# Forward cones per color that the min_curvature optimizer builds its corridor from
+OPTIMIZER_CONES = 10
+
+# Factor applied to a stage's cost estimate each time a deadline skips it, so
+# one slow outlier cannot keep the stage from ever being tried again
+SKIP_DECAY = 0.8
+
+# Dense samples per spline segment used to invert its arc length
+SPLINE_SAMPLES = 32
+
+# Cone maps whose raceline is kept for planners built without ``raceline=``
+RACELINE_CACHE_SIZE = 8
+
+# Cubic Hermite basis (h00, h10, h01, h11) at SPLINE_SAMPLES points of [0, 1)
+_u = np.linspace(0.0, 1.0, SPLINE_SAMPLES, endpoint=False)
+_HERMITE_BASIS = np.stack(
+    [2 * _u**3 - 3 * _u**2 + 1, _u**3 - 2 * _u**2 + _u, -2 * _u**3 + 3 * _u**2, _u**3 - _u**2], axis=1
+)
+del _u
+
+# Closed-lap racelines of the cone maps planned without ``raceline=``, keyed
+# by step, num_points and a digest of the cones, least recently used first,
+# so per-frame planners on the same maps build each line only once. Shared
+# by all planners, hence the lock.
+_RACELINES: OrderedDict[bytes, GlobalRaceline] = OrderedDict()
+_RACELINES_LOCK = threading.Lock()
+
+
+def _first(item: tuple) -> float:
+    return item[0]
+
+
+def _sum(values: List[float]) -> float:
+    """Left-to-right sum. sum() compensates rounding from Python 3.12 on, which
+    neither NumPy's mean in ``src.batch`` nor the unrolled sums of
+    ``PathPlanning._fit_boundary3`` do."""
+    total = values[0]
+    for value in values[1:]:
+        total += value
+    return total
+
+
+def _profiled(stage: str):
+    """Time a PathPlanning method into ``self.profiler`` under ``stage``, if one is set."""
+
+    def decorate(method):
+        # self stays in args: method(self, *args) would build a new argument
+        # tuple through a list, an allocation on every call
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            profiler = args[0].profiler
+            if profiler is None:
+                return method(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profiler.time(stage, time.perf_counter_ns() - start)
+
+        return timed
+
+    return decorate
+
+
+class PlanScratch:
+    """Reusable work space for ``PathPlanning.generatePathInto``.
+
+    NumPy work arrays sized for ``capacity`` cones (grown, once, when a frame
+    holds more) and plain lists for the picked cones and the waypoints, so a
+    steady stream of similar frames allocates nothing. Views of the arrays
+    are built once per frame size up to ``VIEW_CACHE_CONES`` and kept.
+    """
+
+    # CPython creates a new int object for every int above 256, so frames
+    # larger than this allocate their cone counts and indices regardless
+    VIEW_CACHE_CONES = 256
+
+    __slots__ = (
+        "capacity", "dx", "dy", "dist", "ahead", "key", "mask", "candidate", "views",
+        "px", "py", "cos_yaw", "sin_yaw", "near", "behind", "blue", "yellow", "argmin",
+        "best", "index", "count", "coords", "waypoints",
+    )
+
+    def __init__(self, capacity: int = 256):
+        self._allocate(capacity)
+        # Scalars as 0-d arrays: a Python float operand makes a ufunc allocate
+        self.px, self.py = np.zeros(()), np.zeros(())
+        self.cos_yaw, self.sin_yaw = np.zeros(()), np.zeros(())
+        self.near, self.behind = np.full((), 0.5), np.full((), -0.5)
+        self.blue, self.yellow = np.full((), 1, dtype=np.int32), np.full((), 0, dtype=np.int32)
+        self.argmin = np.zeros((), dtype=np.intp)
+        # The picked cones, blue in slots 0-2 and yellow in 3-5: distance,
+        # index and (x, y), plus the number picked per color
+        self.best = [math.inf] * (2 * MAX_FORWARD_CONES)
+        self.index = [0] * (2 * MAX_FORWARD_CONES)
+        self.count = [0, 0]
+        self.coords = [0.0] * (4 * MAX_FORWARD_CONES)
+        self.waypoints = [0.0] * (2 * MAX_FORWARD_CONES)
+
+    def _allocate(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.dx = np.empty(capacity)
+        self.dy = np.empty(capacity)
+        self.dist = np.empty(capacity)
+        self.ahead = np.empty(capacity)
+        self.key = np.empty(capacity)
+        self.mask = np.empty(capacity, dtype=bool)
+        self.candidate = np.empty(capacity, dtype=bool)
+        self.views: Dict[int, tuple] = {}
+
+    def reserve(self, n: int) -> None:
+        if n > self.capacity:
+            self._allocate(max(n, 2 * self.capacity))
+
+    def views_for(self, n: int) -> tuple:
+        """(dx, dy, dist, ahead, key, mask, candidate) views of the first n entries."""
+        views = self.views.get(n)
+        if views is None:
+            views = (
+                self.dx[:n], self.dy[:n], self.dist[:n], self.ahead[:n],
+                self.key[:n], self.mask[:n], self.candidate[:n],
+            )
+            if n <= self.VIEW_CACHE_CONES:
+                self.views[n] = views
+        return views
 
 
 class PathPlanning:
 
-    def __init__(self, car_pose: CarPose, cones: List[Cone]):
+    ENGINES = ("heuristic", "delaunay", "lattice", "raceline")
+    INTERPOLATIONS = ("linear", "spline")
+    OPTIMIZERS = ("min_curvature",)
+    # Anytime planning stages, cheapest first; see generatePath
+    STAGES = ("straight", "waypoints", "refined")
+
+    # Decaying peak of each stage's recent run time in seconds, used to skip
+    # stages that would not finish before a deadline. Planners are usually
+    # built per frame, so the estimates are shared, keyed by the stage and
+    # the settings that drive its cost (see _stage_key).
+    _stage_cost: Dict[tuple, float] = {}
+
+    def __init__(
+        self,
+        car_pose: CarPose,
+        cones: ConeSet,
+        spatial_index: Optional[ConeGrid] = None,
+        engine: str = "heuristic",
+        triangulation: Optional[ConeTriangulation] = None,
+        interpolation: str = "linear",
+        profiler: Optional[PlannerProfile] = None,
+        optimizer: Optional[str] = None,
+        step: float = DEFAULT_STEP,
+        num_points: int = DEFAULT_NUM_POINTS,
+        raceline: Optional[GlobalRaceline] = None,
+    ):
+        """spatial_index: optional prebuilt ``ConeGrid`` over ``cones``. When given,
+        the nearest forward cones are looked up in the grid instead of scanning
+        every cone, which pays off for large accumulated track maps.
+
+        engine: "heuristic" builds waypoints from the nearest cone pairs;
+        "delaunay" follows the midpoints of blue-yellow edges of a Delaunay
+        triangulation, falling back to the heuristic when it finds none;
+        "lattice" picks the best of a fixed library of arcs by clearance to
+        the cones, centering and heading change (see ``src.lattice``);
+        "raceline" follows a full-lap line precomputed over the mapped track
+        (see ``src.raceline``), falling back to the heuristic when the car is
+        off it.
+        triangulation: persistent ``ConeTriangulation`` of the cone map for the
+        delaunay engine; without it the forward cones are triangulated per call.
+
+        interpolation: "linear" joins the waypoints with straight segments;
+        "spline" fits a cubic spline through them and resamples it every
+        ``step`` meters of arc length.
+
+        profiler: optional ``PlannerProfile`` collecting per-stage timings,
+        cone counts, waypoint branches and fallbacks.
+
+        optimizer: "min_curvature" replaces the midpoint waypoints of the
+        heuristic engine with the minimum-curvature line through the
+        corridor of the nearest OPTIMIZER_CONES forward cones of each color
+        (see ``src.min_curvature``), falling back to the heuristic when no
+        corridor can be built.
+
+        step, num_points: spacing in meters and number of the path points.
+
+        raceline: ``GlobalRaceline`` of the track map for the raceline engine,
+        built with the same step and num_points. Without it the line is
+        built from ``cones`` and the car pose. A closed lap is then kept and
+        reused by later planners on the same cone set (for the last
+        RACELINE_CACHE_SIZE cone sets); an open line depends on the pose it
+        was walked from and is built again for every plan."""
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'. Valid options: {', '.join(self.ENGINES)}")
+        if interpolation not in self.INTERPOLATIONS:
+            raise ValueError(
+                f"Unknown interpolation '{interpolation}'. Valid options: {', '.join(self.INTERPOLATIONS)}"
+            )
+        if optimizer is not None and optimizer not in self.OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer '{optimizer}'. Valid options: {', '.join(self.OPTIMIZERS)}")
+        if step <= 0:
+            raise ValueError("step must be positive")
+        if num_points < 1:
+            raise ValueError("num_points must be at least 1")
         self.car_pose = car_pose
         self.cones = cones
+        self.step = float(step)
+        self.num_points = int(num_points)
+        self._scratch: Optional[PlanScratch] = None
+        if raceline is not None and (raceline.step != self.step or raceline.num_points != self.num_points):
+            raise ValueError("raceline must be built with the planner's step and num_points")
+        self.raceline = raceline
+        self.spatial_index = spatial_index
+        self.engine = engine
+        self.triangulation = triangulation
+        self.interpolation = interpolation
+        self.stage: Optional[str] = None
+        self.profiler = profiler
+        self.optimizer = optimizer
+
+    @property
+    def cones(self) -> ConeArray:
+        """The frame's cones as a ``ConeArray``; a list of cones is converted on first use."""
+        if self._cones is None:
+            self._cones = ConeArray.from_cones(self._cone_list)
+        return self._cones
 
-    def generatePath(self) -> Path2D:
+    @cones.setter
+    def cones(self, cones: ConeSet) -> None:
+        if isinstance(cones, ConeArray):
+            self._cones, self._cone_list = cones, None
+        else:
+            # Kept as given, so small frames are planned without building arrays
+            self._cones, self._cone_list = None, cones if isinstance(cones, list) else list(cones)
+
+    def generatePath(self, as_array: bool = False, deadline: Optional[float] = None) -> Union[Path2D, PathArray]:
+        """Plan the path ahead of the car.
+
+        Returns a list of (x, y) tuples, or with as_array=True a ``PathArray``
+        carrying the same points along with arc length, heading and curvature.
+
+        deadline: absolute ``time.perf_counter()`` time by which a path is
+        needed. The planner then works through ``STAGES``: the straight
+        fallback, the heuristic waypoint plan with linear interpolation, and,
+        when the engine, optimizer or interpolation asks for more, the
+        refined plan. A
+        stage is skipped if its recent run time would overshoot the deadline,
+        and the best path so far is returned. Without a deadline only the
+        final plan is computed. Either way ``self.stage`` tells which stage
+        produced the result.
+        """
+        if deadline is None:
+            path = self._plan()
+        else:
+            path = self._plan_anytime(deadline)
+        if self.profiler is not None:
+            self.profiler.count("plans")
+            self.profiler.count(f"stage:{self.stage}")
+        return PathArray.from_points(path) if as_array else path
+
+    def update(self, car_pose: CarPose, cones: ConeSet) -> None:
+        """Point the planner at a new frame, so one instance and its scratch space serve a whole run."""
+        self.car_pose = car_pose
+        self.cones = cones
+
+    def generatePathInto(self, out: np.ndarray, scratch: Optional[PlanScratch] = None) -> int:
+        """Plan into the caller's (num_points, 2) float64 array; returns the number of points written.
+
+        With the default heuristic engine and linear interpolation (and no
+        optimizer or spatial index) the forward cones are picked in
+        ``scratch`` (the planner's own ``PlanScratch`` if not given) and the
+        path is written straight into ``out`` from plain floats. A planner
+        reused through ``update`` then allocates no memory at all per call on
+        frames of up to ``PlanScratch.VIEW_CACHE_CONES`` cones, once each
+        frame size has been seen (see ``tests/test_allocations.py``). Other
+        settings plan as usual and copy the result. The points match
+        ``generatePath()``.
+        """
+        if out.shape != (self.num_points, 2) or out.dtype != np.float64:
+            raise ValueError(f"out must be a ({self.num_points}, 2) float64 array, got {out.shape} {out.dtype}")
+        if (
+            self.engine != "heuristic"
+            or self.optimizer is not None
+            or self.interpolation != "linear"
+            or self.spatial_index is not None
+        ):
+            path = self._plan()
+            if path:
+                out[: len(path)] = path
+            return len(path)
+
+        if scratch is None:
+            if self._scratch is None:
+                self._scratch = PlanScratch(max(self._cone_count(), 256))
+            scratch = self._scratch
+        self._select_forward_into(scratch)
+        if not scratch.count[0] and not scratch.count[1]:
+            self.stage = "straight"
+            self._count("fallback:no_cones")
+            return self._straight_into(out)
+        num_waypoints = self._waypoints_into(scratch)
+        self.stage = "waypoints"
+        return self._linear_into(out, scratch, num_waypoints)
+
+    def _plan(self) -> Path2D:
+        
+        step = self.step
+        num_points = self.num_points
+        
+        if self.engine == "lattice":
+            self.stage = "refined"
+            return self._lattice_path(step, num_points)
+        
+        if self.engine == "raceline":
+            path = self._raceline_path()
+            if path is not None:
+                self.stage = "refined"
+                return path
+            self._count("fallback:raceline_off_track")
         
-        blue_cones = [c for c in self.cones if c.color == 1]
-        yellow_cones = [c for c in self.cones if c.color == 0] 
+        if self.engine == "delaunay":
+            waypoints = self._delaunay_waypoints()
+            if waypoints:
+                full_waypoints = [(self.car_pose.x, self.car_pose.y)] + waypoints
+                self.stage = "refined"
+                return self._interpolate_path(full_waypoints, step, num_points)
+            self._count("fallback:delaunay_empty")
         
-        step = 0.4
-        num_points = 25
+        if self.optimizer is not None:
+            waypoints = self._optimized_waypoints()
+            if waypoints:
+                full_waypoints = [(self.car_pose.x, self.car_pose.y)] + waypoints
+                self.stage = "refined"
+                return self._interpolate_path(full_waypoints, step, num_points)
+            self._count("fallback:optimizer_empty")
         
-        blue_forward = self._filter_and_sort_cones(blue_cones)
-        yellow_forward = self._filter_and_sort_cones(yellow_cones)
+        blue_forward, yellow_forward = self._select_forward_cones()
         
         if not blue_forward and not yellow_forward:
+            self.stage = "straight"
+            self._count("fallback:no_cones")
             return self._path_straight(step, num_points)
         
         waypoints = self._compute_waypoints(blue_forward, yellow_forward)
         
         if not waypoints:
+            self.stage = "straight"
+            self._count("fallback:no_waypoints")
             return self._path_straight(step, num_points)
         
         full_waypoints = [(self.car_pose.x, self.car_pose.y)] + waypoints
         
         path = self._interpolate_path(full_waypoints, step, num_points)
+        self.stage = "waypoints" if self.interpolation == "linear" else "refined"
         
         return path
-    
-    def _filter_and_sort_cones(self, cones: List[Cone]) -> List[Cone]:
-        """Filter cones ahead of the car and sort by distance."""
-        forward = []
-        for cone in cones:
-            dx = cone.x - self.car_pose.x
-            dy = cone.y - self.car_pose.y
+
+    def _plan_anytime(self, deadline: float) -> Path2D:
+        step = self.step
+        num_points = self.num_points
+        
+        path = self._path_straight(step, num_points)
+        self.stage = "straight"
+        
+        full_waypoints = None
+        if self._stage_fits("waypoints", deadline):
+            start = time.perf_counter()
+            blue_forward, yellow_forward = self._select_forward_cones()
+            if blue_forward or yellow_forward:
+                waypoints = self._compute_waypoints(blue_forward, yellow_forward)
+                if waypoints:
+                    full_waypoints = [(self.car_pose.x, self.car_pose.y)] + waypoints
+                    candidate = self._linear_path(full_waypoints, step, num_points)
+                    if candidate:
+                        path, self.stage = candidate, "waypoints"
+            self._record_stage("waypoints", start)
+        
+        refine = self.engine != "heuristic" or self.optimizer is not None or self.interpolation != "linear"
+        if refine and self._stage_fits("refined", deadline):
+            start = time.perf_counter()
+            raceline_path = self._raceline_path() if self.engine == "raceline" else None
+            if self.engine == "lattice":
+                path, self.stage = self._lattice_path(step, num_points), "refined"
+            elif raceline_path is not None:
+                path, self.stage = raceline_path, "refined"
+            else:
+                refined_waypoints = None
+                if self.engine == "delaunay":
+                    waypoints = self._delaunay_waypoints()
+                    if waypoints:
+                        refined_waypoints = [(self.car_pose.x, self.car_pose.y)] + waypoints
+                if refined_waypoints is None and self.optimizer is not None:
+                    waypoints = self._optimized_waypoints()
+                    if waypoints:
+                        refined_waypoints = [(self.car_pose.x, self.car_pose.y)] + waypoints
+                if refined_waypoints is None and self.interpolation != "linear":
+                    refined_waypoints = full_waypoints
+                if refined_waypoints is not None:
+                    candidate = self._interpolate_path(refined_waypoints, step, num_points)
+                    if candidate:
+                        path, self.stage = candidate, "refined"
+            self._record_stage("refined", start)
+        
+        return path
+
+    def _stage_key(self, stage: str) -> tuple:
+        # Cone counts are bucketed by powers of two
+        return (
+            stage,
+            self.engine,
+            self.interpolation,
+            self.optimizer,
+            self.spatial_index is not None,
+            self._cone_count().bit_length(),
+        )
+
+    def _stage_fits(self, stage: str, deadline: float) -> bool:
+        key = self._stage_key(stage)
+        cost = self._stage_cost.get(key, 0.0)
+        if time.perf_counter() + cost <= deadline:
+            return True
+        # A skipped stage is not measured, so its estimate decays until it is probed again
+        self._stage_cost[key] = SKIP_DECAY * cost
+        self._count(f"deadline_skip:{stage}")
+        return False
+
+    def _count(self, name: str) -> None:
+        if self.profiler is not None:
+            self.profiler.count(name)
+
+    def _record_stage(self, stage: str, start: float) -> None:
+        # A decaying peak rather than a mean: overrunning a hard deadline
+        # costs more than occasionally skipping a stage that would have fit.
+        elapsed = time.perf_counter() - start
+        key = self._stage_key(stage)
+        self._stage_cost[key] = max(elapsed, 0.9 * self._stage_cost.get(key, 0.0))
+
+    @staticmethod
+    def generatePathBatch(poses, cones, step: float = DEFAULT_STEP, num_points: int = DEFAULT_NUM_POINTS):
+        """Plan N frames in one vectorized call.
+
+        poses is an (N, 3) array of (x, y, yaw) and cones an (N, M, 3) array of
+        (x, y, color) padded with color -1. Returns an (N, num_points, 2) array;
+        see ``src.batch.generate_paths``.
+        """
+        from .batch import generate_paths
+
+        return generate_paths(poses, cones, step, num_points)
+
+    @_profiled("select")
+    def _select_forward_cones(self) -> tuple[List[Cone], List[Cone]]:
+        """Nearest forward blue and yellow cones, at most MAX_FORWARD_CONES each."""
+        profiler = self.profiler
+        if self.spatial_index is not None:
+            blue_forward = self.spatial_index.nearest_forward(self.car_pose, 1, MAX_FORWARD_CONES).to_cones()
+            yellow_forward = self.spatial_index.nearest_forward(self.car_pose, 0, MAX_FORWARD_CONES).to_cones()
+        elif self._cone_count() <= SMALL_FRAME_CONES:
+            blue_forward, yellow_forward = self._select_small()
+        else:
+            start = time.perf_counter_ns() if profiler is not None else 0
+            blue_cones = self.cones.of_color(1)
+            yellow_cones = self.cones.of_color(0)
+            if profiler is not None:
+                profiler.time("color_split", time.perf_counter_ns() - start)
+            blue_forward = self._filter_and_sort_cones(blue_cones, MAX_FORWARD_CONES).to_cones()
+            yellow_forward = self._filter_and_sort_cones(yellow_cones, MAX_FORWARD_CONES).to_cones()
+        if profiler is not None:
+            profiler.size("cones", self._cone_count())
+            profiler.size("blue_forward", len(blue_forward))
+            profiler.size("yellow_forward", len(yellow_forward))
+        return blue_forward, yellow_forward
+
+    def _cone_count(self) -> int:
+        return len(self._cone_list) if self._cones is None else len(self._cones)
+
+    def _select_small(self) -> tuple[List[Cone], List[Cone]]:
+        """``_filter_and_sort_cones`` of both colors in one plain-Python pass over a small frame."""
+        px, py = self.car_pose.x, self.car_pose.y
+        cos_yaw, sin_yaw = math.cos(self.car_pose.yaw), math.sin(self.car_pose.yaw)
+        if self._cones is None:
+            rows = [(c.x, c.y, c.color) for c in self._cone_list]
+        else:
+            cones = self._cones
+            rows = zip(cones.x.tolist(), cones.y.tolist(), cones.color.tolist())
+        blue, yellow = [], []
+        for x, y, color in rows:
+            dx = x - px
+            dy = y - py
             dist = math.hypot(dx, dy)
-            
-            if dist < 0.5: 
+            if dist >= 0.5 and dx * cos_yaw + dy * sin_yaw > -0.5:
+                if color == 1:
+                    blue.append((dist, x, y))
+                elif color == 0:
+                    yellow.append((dist, x, y))
+        # Sorting on the distance alone keeps the input order among ties
+        blue.sort(key=_first)
+        yellow.sort(key=_first)
+        return (
+            [Cone(x=x, y=y, color=1) for _, x, y in blue[:MAX_FORWARD_CONES]],
+            [Cone(x=x, y=y, color=0) for _, x, y in yellow[:MAX_FORWARD_CONES]],
+        )
+
+    @_profiled("select")
+    def _select_forward_into(self, scratch: PlanScratch) -> None:
+        """Same cones as ``_select_forward_cones``, left as indices and coordinates in ``scratch``."""
+        best, index, coords = scratch.best, scratch.index, scratch.coords
+        # While loops throughout: range() would allocate its iterator
+        k = 0
+        while k < 2 * MAX_FORWARD_CONES:
+            best[k] = math.inf
+            k += 1
+        listed = self._cone_list
+        n = self._cone_count()
+        if n <= SMALL_FRAME_CONES:
+            self._select_small_into(scratch, n)
+        else:
+            self._select_array_into(scratch, n)
+            listed = None
+
+        cones = self._cones
+        k = 0
+        while k < 2 * MAX_FORWARD_CONES:
+            if best[k] < math.inf:
+                i = index[k]
+                if listed is not None:
+                    coords[2 * k] = listed[i].x
+                    coords[2 * k + 1] = listed[i].y
+                else:
+                    coords[2 * k] = cones.x.item(i)
+                    coords[2 * k + 1] = cones.y.item(i)
+            k += 1
+        count = scratch.count
+        count[0] = (best[0] < math.inf) + (best[1] < math.inf) + (best[2] < math.inf)
+        count[1] = (best[3] < math.inf) + (best[4] < math.inf) + (best[5] < math.inf)
+        if self.profiler is not None:
+            self.profiler.size("cones", n)
+            self.profiler.size("blue_forward", count[0])
+            self.profiler.size("yellow_forward", count[1])
+
+    def _select_small_into(self, scratch: PlanScratch, n: int) -> None:
+        """``_select_small`` keeping the nearest cones by insertion into ``scratch.best``."""
+        px, py = self.car_pose.x, self.car_pose.y
+        cos_yaw, sin_yaw = math.cos(self.car_pose.yaw), math.sin(self.car_pose.yaw)
+        best, index = scratch.best, scratch.index
+        listed, cones = self._cone_list, self._cones
+        i = 0
+        while i < n:
+            if listed is not None:
+                cone = listed[i]
+                x, y, color = cone.x, cone.y, cone.color
+            else:
+                x, y, color = cones.x.item(i), cones.y.item(i), cones.color.item(i)
+            i += 1
+            dx = x - px
+            dy = y - py
+            dist = math.hypot(dx, dy)
+            if not (dist >= 0.5 and dx * cos_yaw + dy * sin_yaw > -0.5):
                 continue
-            
-            forward_dist = dx * math.cos(self.car_pose.yaw) + dy * math.sin(self.car_pose.yaw)
-            
-            if forward_dist > -0.5:
-                forward.append(cone)
+            if color == 1:
+                k = 0
+            elif color == 0:
+                k = MAX_FORWARD_CONES
+            else:
+                continue
+            # Strict comparisons keep the input order among ties, like the stable sort
+            if not dist < best[k + 2]:
+                continue
+            if dist < best[k]:
+                best[k + 2], index[k + 2] = best[k + 1], index[k + 1]
+                best[k + 1], index[k + 1] = best[k], index[k]
+            elif dist < best[k + 1]:
+                best[k + 2], index[k + 2] = best[k + 1], index[k + 1]
+                k += 1
+            else:
+                k += 2
+            best[k] = dist
+            index[k] = i - 1
+
+    def _select_array_into(self, scratch: PlanScratch, n: int) -> None:
+        """``_filter_and_sort_cones`` of both colors on ``scratch`` arrays."""
+        cones = self.cones
+        scratch.reserve(n)
+        dx, dy, dist, ahead, key, mask, candidate = scratch.views_for(n)
+        scratch.px.fill(self.car_pose.x)
+        scratch.py.fill(self.car_pose.y)
+        scratch.cos_yaw.fill(math.cos(self.car_pose.yaw))
+        scratch.sin_yaw.fill(math.sin(self.car_pose.yaw))
+        np.subtract(cones.x, scratch.px, out=dx)
+        np.subtract(cones.y, scratch.py, out=dy)
+        np.hypot(dx, dy, out=dist)
+        np.multiply(dx, scratch.cos_yaw, out=ahead)
+        np.multiply(dy, scratch.sin_yaw, out=dx)
+        np.add(ahead, dx, out=ahead)
+        np.greater(ahead, scratch.behind, out=candidate)
+        np.greater_equal(dist, scratch.near, out=mask)
+        np.logical_and(candidate, mask, out=candidate)
+        if scratch.blue.dtype != cones.color.dtype:
+            # Comparing colors of another dtype would allocate a casting buffer
+            scratch.blue = np.full((), 1, dtype=cones.color.dtype)
+            scratch.yellow = np.full((), 0, dtype=cones.color.dtype)
+        self._nearest_into(scratch, scratch.blue, 0, key, mask, candidate, dist)
+        self._nearest_into(scratch, scratch.yellow, MAX_FORWARD_CONES, key, mask, candidate, dist)
+
+    def _nearest_into(
+        self,
+        scratch: PlanScratch,
+        color: np.ndarray,
+        slot: int,
+        key: np.ndarray,
+        mask: np.ndarray,
+        candidate: np.ndarray,
+        dist: np.ndarray,
+    ) -> None:
+        """Pick the nearest candidate cones of ``color`` into ``scratch`` from ``slot`` on."""
+        best, index = scratch.best, scratch.index
+        np.equal(self._cones.color, color, out=mask)
+        np.logical_and(mask, candidate, out=mask)
+        key.fill(math.inf)
+        np.putmask(key, mask, dist)
+        k = 0
+        # argmin returns the first minimum, the same tie-break as the stable sort
+        while k < MAX_FORWARD_CONES:
+            key.argmin(out=scratch.argmin)
+            i = scratch.argmin.item()
+            d = key.item(i)
+            if d == math.inf:
+                break
+            best[slot + k] = d
+            index[slot + k] = i
+            key[i] = math.inf
+            k += 1
+
+    @_profiled("delaunay")
+    def _delaunay_waypoints(self) -> List[tuple[float, float]]:
+        triangulation = self.triangulation
+        if triangulation is None:
+            triangulation = ConeTriangulation(self._filter_and_sort_cones(self.cones))
+        return triangulation.centerline(self.car_pose)
+    
+    @_profiled("lattice")
+    def _lattice_path(self, step: float, num_points: int) -> Path2D:
+        xy = LatticePlanner(step, num_points).plan(self.car_pose, self.cones)
+        return list(zip(xy[:, 0].tolist(), xy[:, 1].tolist()))
+    
+    @_profiled("raceline")
+    def _raceline_path(self) -> Optional[Path2D]:
+        raceline = self.raceline
+        if raceline is None:
+            raceline = self._cached_raceline()
+            if raceline is None:
+                return None
+        return raceline.path(self.car_pose)
+
+    def _cached_raceline(self) -> Optional[GlobalRaceline]:
+        """Raceline of ``self.cones``, shared through ``_RACELINES`` when it is a closed lap."""
+        key = self._raceline_key()
+        with _RACELINES_LOCK:
+            raceline = _RACELINES.get(key)
+            if raceline is not None:
+                _RACELINES.move_to_end(key)
+                return raceline
+        from .raceline import GlobalRaceline
+
+        # Built outside the lock, so planners on other maps are not held up
+        try:
+            raceline = GlobalRaceline(self.cones, self.car_pose, self.step, self.num_points)
+        except ValueError:
+            return None
+        # An open line (or a failed build) depends on the pose it was walked
+        # from, so only a closed lap may serve other poses
+        if raceline.closed:
+            with _RACELINES_LOCK:
+                _RACELINES[key] = raceline
+                while len(_RACELINES) > RACELINE_CACHE_SIZE:
+                    _RACELINES.popitem(last=False)
+        return raceline
+
+    def _raceline_key(self) -> bytes:
+        cones = self.cones
+        digest = hashlib.blake2b(repr((self.step, self.num_points)).encode(), digest_size=16)
+        # Colors as floats too, so an int and a float color column give the same key
+        for column in (cones.x, cones.y, cones.color):
+            digest.update(np.ascontiguousarray(column, dtype=np.float64))
+        return digest.digest()
+    
+    @_profiled("optimize")
+    def _optimized_waypoints(self) -> List[tuple[float, float]]:
+        if self.spatial_index is not None:
+            blue = self.spatial_index.nearest_forward(self.car_pose, 1, OPTIMIZER_CONES)
+            yellow = self.spatial_index.nearest_forward(self.car_pose, 0, OPTIMIZER_CONES)
+        else:
+            blue = self._filter_and_sort_cones(self.cones.of_color(1), OPTIMIZER_CONES)
+            yellow = self._filter_and_sort_cones(self.cones.of_color(0), OPTIMIZER_CONES)
+        return min_curvature_waypoints(self.car_pose, blue, yellow)
+    
+    @_profiled("filter_sort")
+    def _filter_and_sort_cones(self, cones: ConeArray, k: Optional[int] = None) -> ConeArray:
+        """Filter cones ahead of the car and sort by distance.
+
+        With k, only the k nearest are returned; they are picked with a partial
+        selection so only the survivors are sorted.
+        """
+        dx = cones.x - self.car_pose.x
+        dy = cones.y - self.car_pose.y
+        dist = np.hypot(dx, dy)
         
-        forward.sort(key=lambda c: math.hypot(c.x - self.car_pose.x, c.y - self.car_pose.y))
-        return forward
+        forward_dist = dx * math.cos(self.car_pose.yaw) + dy * math.sin(self.car_pose.yaw)
+        
+        forward = np.flatnonzero((dist >= 0.5) & (forward_dist > -0.5))
+        if k is not None and len(forward) > k:
+            kth = np.partition(dist[forward], k - 1)[k - 1]
+            forward = forward[dist[forward] <= kth]
+        order = forward[np.argsort(dist[forward], kind="stable")[:k]]
+        return cones[order]
 
     def _get_boundary_angle(self, cone1: Cone, cone2: Cone) -> float:
         """Calculates the angle from cone1 to cone2."""
@@ -66,6 +755,7 @@ class PathPlanning:
         
         return math.atan2(dy, dx)
     
+    @_profiled("fit_boundary")
     def _fit_track_boundary(self, cones: List[Cone]) -> tuple[float, float]:
 
         if len(cones) < 2:
@@ -74,12 +764,12 @@ class PathPlanning:
         xs = [c.x for c in cones]
         ys = [c.y for c in cones]
         
-        mean_x = sum(xs) / len(xs)
-        mean_y = sum(ys) / len(ys)
+        mean_x = _sum(xs) / len(xs)
+        mean_y = _sum(ys) / len(ys)
         
-        cov_xx = sum((x - mean_x) ** 2 for x in xs) / len(xs)
-        cov_yy = sum((y - mean_y) ** 2 for y in ys) / len(ys)
-        cov_xy = sum((xs[i] - mean_x) * (ys[i] - mean_y) for i in range(len(xs))) / len(xs)
+        cov_xx = _sum([(x - mean_x) ** 2 for x in xs]) / len(xs)
+        cov_yy = _sum([(y - mean_y) ** 2 for y in ys]) / len(ys)
+        cov_xy = _sum([(xs[i] - mean_x) * (ys[i] - mean_y) for i in range(len(xs))]) / len(xs)
         
         if abs(cov_xy) < 1e-6 and abs(cov_xx - cov_yy) < 1e-6:
             angle = self.car_pose.yaw
@@ -97,8 +787,12 @@ class PathPlanning:
         
         return angle, 0.0
     
+    @_profiled("waypoints")
     def _compute_waypoints(self, blue: List[Cone], yellow: List[Cone]) -> List[tuple[float, float]]:
 
+        if self.profiler is not None:
+            self.profiler.count(f"branch:{waypoint_branch(blue, yellow)}")
+
         waypoints = []
         HALF_LANE = 2.5
         FORWARD_STEP = 2.5
@@ -285,24 +979,108 @@ class PathPlanning:
         if len(waypoints) < 2:
             return []
         
+        if self.interpolation == "spline":
+            return self._spline_path(waypoints, step, num_points)
+        return self._linear_path(waypoints, step, num_points)
+    
+    @_profiled("interpolate")
+    def _linear_path(self, waypoints: List[tuple[float, float]], step: float, num_points: int) -> Path2D:
+        # _sample_segment and _join_segments inlined: this runs on every
+        # default plan, where the per-segment lists cost as much as the sampling
         path: Path2D = []
-        
-        for i in range(len(waypoints) - 1):
-            x1, y1 = waypoints[i]
-            x2, y2 = waypoints[i + 1]
-            
+        last_x = last_y = 0.0
+        x1, y1 = waypoints[0]
+        for x2, y2 in waypoints[1:]:
             segment_len = math.hypot(x2 - x1, y2 - y1)
-            if segment_len < 1e-6:
-                continue
-            
-            num_steps = max(2, int(segment_len / step) + 1)
+            if segment_len >= 1e-6:
+                num_steps = max(2, int(segment_len / step) + 1)
+                for j in range(min(num_steps, num_points + 1)):
+                    t = j / (num_steps - 1)
+                    px = x1 + t * (x2 - x1)
+                    py = y1 + t * (y2 - y1)
+                    if not path or math.hypot(px - last_x, py - last_y) > 1e-6:
+                        path.append((px, py))
+                        last_x, last_y = px, py
+                        if len(path) >= num_points:
+                            return path
+            x1, y1 = x2, y2
+        if len(path) >= 2:
+            path = self._extend_path(path, step, num_points)
+        return path
+    
+    @_profiled("interpolate")
+    def _spline_path(self, waypoints: List[tuple[float, float]], step: float, num_points: int) -> Path2D:
+        """Natural cubic spline through the waypoints, resampled every step meters.
+
+        The spline is parametrized by chord length and sampled densely with a
+        precomputed Hermite basis; the samples' cumulative length is then
+        inverted with one ``np.interp`` per axis. Past the last waypoint the
+        path continues along the end tangent.
+        """
+        pts = [waypoints[0]]
+        for x, y in waypoints[1:]:
+            if math.hypot(x - pts[-1][0], y - pts[-1][1]) > 1e-6:
+                pts.append((x, y))
+        if len(pts) < 2:
+            return []
+        
+        tangents = _spline_tangents(pts)
+        # (segments, 4, 2) Hermite geometry: start, start tangent, end, end tangent
+        geometry = []
+        for (x1, y1), (x2, y2), (tx1, ty1), (tx2, ty2) in zip(pts, pts[1:], tangents, tangents[1:]):
+            h = math.hypot(x2 - x1, y2 - y1)
+            geometry.append(((x1, y1), (tx1 * h, ty1 * h), (x2, y2), (tx2 * h, ty2 * h)))
+        dense = np.empty(((len(pts) - 1) * SPLINE_SAMPLES + 1, 2))
+        dense[:-1] = np.matmul(_HERMITE_BASIS, geometry).reshape(-1, 2)
+        dense[-1] = pts[-1]
+        
+        seg = np.diff(dense, axis=0)
+        s = np.empty(len(dense))
+        s[0] = 0.0
+        np.cumsum(np.hypot(seg[:, 0], seg[:, 1]), out=s[1:])
+        targets = step * np.arange(num_points)
+        xs = np.interp(targets, s, dense[:, 0])
+        ys = np.interp(targets, s, dense[:, 1])
+        
+        if targets[-1] > s[-1]:
+            beyond = targets > s[-1]
+            tx, ty = tangents[-1]
+            norm = max(math.hypot(tx, ty), 1e-12)
+            extra = targets[beyond] - s[-1]
+            xs[beyond] = pts[-1][0] + tx / norm * extra
+            ys[beyond] = pts[-1][1] + ty / norm * extra
+        return list(zip(xs.tolist(), ys.tolist()))
+    
+    def _sample_segment(self, start: tuple[float, float], end: tuple[float, float], step: float, num_points: int) -> Path2D:
+        """Evenly spaced points from start to end (inclusive), about step apart.
+
+        Returns [] for a degenerate segment. At most num_points + 1 points are
+        produced since a path never takes more than that from one segment.
+        """
+        x1, y1 = start
+        x2, y2 = end
+        
+        segment_len = math.hypot(x2 - x1, y2 - y1)
+        if segment_len < 1e-6:
+            return []
+        
+        num_steps = max(2, int(segment_len / step) + 1)
+        
+        points: Path2D = []
+        for j in range(min(num_steps, num_points + 1)):
+            t = j / (num_steps - 1) if num_steps > 1 else 0
             
-            for j in range(num_steps):
-                t = j / (num_steps - 1) if num_steps > 1 else 0
-                
-                px = x1 + t * (x2 - x1)
-                py = y1 + t * (y2 - y1)
-                
+            px = x1 + t * (x2 - x1)
+            py = y1 + t * (y2 - y1)
+            points.append((px, py))
+        return points
+    
+    def _join_segments(self, segments, step: float, num_points: int) -> Path2D:
+        """Concatenate sampled segments, dropping repeated joints, and extend to num_points."""
+        path: Path2D = []
+        
+        for points in segments:
+            for px, py in points:
                 if not path or math.hypot(px - path[-1][0], py - path[-1][1]) > 1e-6:
                     path.append((px, py))
                     
@@ -314,6 +1092,7 @@ class PathPlanning:
         
         return path[:num_points]
     
+    @_profiled("extend")
     def _extend_path(self, path: Path2D, step: float, num_points: int) -> Path2D:
         if len(path) < 2:
             return path
@@ -326,18 +1105,228 @@ class PathPlanning:
         else:
             angle = math.atan2(y2 - y1, x2 - x1)
         
-        while len(path) < num_points:
-            last_x, last_y = path[-1]
-            new_x = last_x + math.cos(angle) * step
-            new_y = last_y + math.sin(angle) * step
-            path.append((new_x, new_y))
+        step_x = math.cos(angle) * step
+        step_y = math.sin(angle) * step
+        last_x, last_y = x2, y2
+        for _ in range(num_points - len(path)):
+            last_x += step_x
+            last_y += step_y
+            path.append((last_x, last_y))
         
         return path
     
+    @_profiled("waypoints")
+    def _waypoints_into(self, scratch: PlanScratch) -> int:
+        """``_compute_waypoints`` of the cones picked into ``scratch``, written to
+        ``scratch.waypoints`` as x, y pairs; returns the number of waypoints.
+
+        Mirrors every branch of ``_compute_waypoints`` operation for operation,
+        so both give bit-identical points.
+        """
+        c, w = scratch.coords, scratch.waypoints
+        nb, ny = scratch.count[0], scratch.count[1]
+        if self.profiler is not None:
+            self.profiler.count(f"branch:{waypoint_branch_for(nb, ny)}")
+        yaw = self.car_pose.yaw
+        HALF_LANE = 2.5
+        FORWARD_STEP = 2.5
+        # Blue cone k is at c[2k], c[2k + 1] and yellow cone k at c[6 + 2k], c[7 + 2k]
+        y0 = 2 * MAX_FORWARD_CONES
+
+        if nb and ny:
+            W1x = (c[0] + c[y0]) / 2
+            W1y = (c[1] + c[y0 + 1]) / 2
+            w[0] = W1x
+            w[1] = W1y
+            if nb >= 2 and ny >= 2:
+                w[2] = (c[2] + c[y0 + 2]) / 2
+                w[3] = (c[3] + c[y0 + 3]) / 2
+            elif nb >= 2 or ny >= 2:
+                if nb >= 2:
+                    W2_option1_x = (c[2] + c[y0]) / 2
+                    W2_option1_y = (c[3] + c[y0 + 1]) / 2
+                else:
+                    W2_option1_x = (c[0] + c[y0 + 2]) / 2
+                    W2_option1_y = (c[1] + c[y0 + 3]) / 2
+                across_x = c[0] - c[y0]
+                across_y = c[1] - c[y0 + 1]
+                forward_x = across_y
+                forward_y = -across_x
+                forward_len = math.hypot(forward_x, forward_y)
+                if forward_len > 0.1:
+                    forward_x /= forward_len
+                    forward_y /= forward_len
+                else:
+                    forward_x = math.cos(yaw)
+                    forward_y = math.sin(yaw)
+                w[2] = 0.7 * W2_option1_x + 0.3 * (W1x + forward_x * FORWARD_STEP)
+                w[3] = 0.7 * W2_option1_y + 0.3 * (W1y + forward_y * FORWARD_STEP)
+            else:
+                w[2] = W1x + math.cos(yaw) * FORWARD_STEP
+                w[3] = W1y + math.sin(yaw) * FORWARD_STEP
+            return 2
+
+        # One side only: the center line is HALF_LANE to the right of blue
+        # (the left boundary) or to the left of yellow
+        if nb:
+            n, o, turn = nb, 0, -math.pi / 2
+        else:
+            n, o, turn = ny, y0, math.pi / 2
+        x1, y1 = c[o], c[o + 1]
+        if n >= 3:
+            x2, y2, x3, y3 = c[o + 2], c[o + 3], c[o + 4], c[o + 5]
+            boundary_angle = self._fit_boundary3(x1, y1, x2, y2, x3, y3)
+            offset_angle = boundary_angle + turn
+            cos_b, sin_b = math.cos(boundary_angle), math.sin(boundary_angle)
+            lane_x, lane_y = math.cos(offset_angle) * HALF_LANE, math.sin(offset_angle) * HALF_LANE
+            proj = (x1 - x1) * cos_b + (y1 - y1) * sin_b
+            w[0] = x1 + proj * cos_b + lane_x
+            w[1] = y1 + proj * sin_b + lane_y
+            proj = (x2 - x1) * cos_b + (y2 - y1) * sin_b
+            w[2] = x1 + proj * cos_b + lane_x
+            w[3] = y1 + proj * sin_b + lane_y
+            proj = (x3 - x1) * cos_b + (y3 - y1) * sin_b
+            w[4] = x1 + proj * cos_b + lane_x
+            w[5] = y1 + proj * sin_b + lane_y
+            return 3
+        if n >= 2:
+            x2, y2 = c[o + 2], c[o + 3]
+            dx = x2 - x1
+            dy = y2 - y1
+            boundary_angle = yaw if abs(dx) < 1e-6 and abs(dy) < 1e-6 else math.atan2(dy, dx)
+            offset_angle = boundary_angle + turn
+            W1x = (x1 + x2) / 2 + math.cos(offset_angle) * HALF_LANE
+            W1y = (y1 + y2) / 2 + math.sin(offset_angle) * HALF_LANE
+        else:
+            boundary_angle = yaw
+            offset_angle = yaw + turn
+            W1x = x1 + math.cos(offset_angle) * HALF_LANE
+            W1y = y1 + math.sin(offset_angle) * HALF_LANE
+        w[0] = W1x
+        w[1] = W1y
+        w[2] = W1x + math.cos(boundary_angle) * FORWARD_STEP
+        w[3] = W1y + math.sin(boundary_angle) * FORWARD_STEP
+        return 2
+
+    @_profiled("fit_boundary")
+    def _fit_boundary3(self, x1: float, y1: float, x2: float, y2: float, x3: float, y3: float) -> float:
+        """``_fit_track_boundary`` of three cones given by their coordinates."""
+        mean_x = (x1 + x2 + x3) / 3
+        mean_y = (y1 + y2 + y3) / 3
+        cov_xx = ((x1 - mean_x) ** 2 + (x2 - mean_x) ** 2 + (x3 - mean_x) ** 2) / 3
+        cov_yy = ((y1 - mean_y) ** 2 + (y2 - mean_y) ** 2 + (y3 - mean_y) ** 2) / 3
+        cov_xy = ((x1 - mean_x) * (y1 - mean_y) + (x2 - mean_x) * (y2 - mean_y) + (x3 - mean_x) * (y3 - mean_y)) / 3
+        if abs(cov_xy) < 1e-6 and abs(cov_xx - cov_yy) < 1e-6:
+            return self.car_pose.yaw
+        angle = 0.5 * math.atan2(2 * cov_xy, cov_xx - cov_yy)
+        forward_angle = math.atan2(y3 - y1, x3 - x1)
+        angle_diff = (forward_angle - angle + math.pi) % (2 * math.pi) - math.pi
+        if abs(angle_diff) > math.pi / 2:
+            angle += math.pi
+        return angle
+
+    @_profiled("interpolate")
+    def _linear_into(self, out: np.ndarray, scratch: PlanScratch, num_waypoints: int) -> int:
+        """``_linear_path`` of the car position followed by ``scratch.waypoints``, written into ``out``."""
+        step, num_points = self.step, self.num_points
+        w = scratch.waypoints
+        n = 0
+        last_x = last_y = 0.0
+        x1, y1 = self.car_pose.x, self.car_pose.y
+        k = 0
+        while k < num_waypoints:
+            x2, y2 = w[2 * k], w[2 * k + 1]
+            k += 1
+            segment_len = math.hypot(x2 - x1, y2 - y1)
+            if segment_len >= 1e-6:
+                # Conditionals rather than min() and max(), which allocate an iterator
+                num_steps = int(segment_len / step) + 1
+                if num_steps < 2:
+                    num_steps = 2
+                samples = num_steps if num_steps <= num_points else num_points + 1
+                j = 0
+                while j < samples:
+                    t = j / (num_steps - 1)
+                    j += 1
+                    px = x1 + t * (x2 - x1)
+                    py = y1 + t * (y2 - y1)
+                    if not n or math.hypot(px - last_x, py - last_y) > 1e-6:
+                        out[n, 0] = last_x = px
+                        out[n, 1] = last_y = py
+                        n += 1
+                        if n >= num_points:
+                            return n
+            x1, y1 = x2, y2
+        if n >= 2:
+            # _extend_path; item() reads a float without creating a NumPy scalar
+            px, py = out.item(n - 2, 0), out.item(n - 2, 1)
+            if math.hypot(last_x - px, last_y - py) < 1e-6:
+                angle = self.car_pose.yaw
+            else:
+                angle = math.atan2(last_y - py, last_x - px)
+            step_x = math.cos(angle) * step
+            step_y = math.sin(angle) * step
+            while n < num_points:
+                last_x += step_x
+                last_y += step_y
+                out[n, 0] = last_x
+                out[n, 1] = last_y
+                n += 1
+        return n
+
+    @_profiled("straight")
+    def _straight_into(self, out: np.ndarray) -> int:
+        x, y, yaw = self.car_pose.x, self.car_pose.y, self.car_pose.yaw
+        i = 1
+        while i <= self.num_points:
+            out[i - 1, 0] = x + math.cos(yaw) * self.step * i
+            out[i - 1, 1] = y + math.sin(yaw) * self.step * i
+            i += 1
+        return self.num_points
+
+    @_profiled("straight")
     def _path_straight(self, step: float, num_points: int) -> Path2D:
         path: Path2D = []
         for i in range(1, num_points + 1):
             dx = math.cos(self.car_pose.yaw) * step * i
             dy = math.sin(self.car_pose.yaw) * step * i
             path.append((self.car_pose.x + dx, self.car_pose.y + dy))
-        return path
\ No newline at end of file
+        return path
+
+
+def _spline_tangents(pts: List[tuple[float, float]]) -> List[tuple[float, float]]:
+    """First derivatives (per unit chord length) of the natural cubic spline through pts.
+
+    Solves the tridiagonal system with the Thomas algorithm; there are only a
+    handful of waypoints, so plain floats beat setting up NumPy arrays.
+    """
+    n = len(pts)
+    h = [math.hypot(pts[i + 1][0] - pts[i][0], pts[i + 1][1] - pts[i][1]) for i in range(n - 1)]
+    delta = [((pts[i + 1][0] - pts[i][0]) / h[i], (pts[i + 1][1] - pts[i][1]) / h[i]) for i in range(n - 1)]
+    # Row i reads lower[i] * D[i-1] + diag[i] * D[i] + upper[i] * D[i+1] = rhs[i]
+    lower = [0.0] + h[1:] + [1.0]
+    diag = [2.0] + [2.0 * (h[i - 1] + h[i]) for i in range(1, n - 1)] + [2.0]
+    upper = [1.0] + h[:-1] + [0.0]
+    rhs = (
+        [(3.0 * delta[0][0], 3.0 * delta[0][1])]
+        + [
+            (
+                3.0 * (h[i] * delta[i - 1][0] + h[i - 1] * delta[i][0]),
+                3.0 * (h[i] * delta[i - 1][1] + h[i - 1] * delta[i][1]),
+            )
+            for i in range(1, n - 1)
+        ]
+        + [(3.0 * delta[-1][0], 3.0 * delta[-1][1])]
+    )
+    for i in range(1, n):
+        w = lower[i] / diag[i - 1]
+        diag[i] -= w * upper[i - 1]
+        rhs[i] = (rhs[i][0] - w * rhs[i - 1][0], rhs[i][1] - w * rhs[i - 1][1])
+    tangents = [(0.0, 0.0)] * n
+    tangents[-1] = (rhs[-1][0] / diag[-1], rhs[-1][1] / diag[-1])
+    for i in range(n - 2, -1, -1):
+        tangents[i] = (
+            (rhs[i][0] - upper[i] * tangents[i + 1][0]) / diag[i],
+            (rhs[i][1] - upper[i] * tangents[i + 1][1]) / diag[i],
+        )
+    return tangents
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .models import CarPose, ConeArray, ConeSet, Path2D, PathArray
+from .path_planning import DEFAULT_NUM_POINTS, DEFAULT_STEP, PathPlanning
+
+
+class PlanCache:
+    """LRU cache of plans keyed by the scene as seen from the car.
+
+    Planning commutes with rigid motions of the whole scene, so each frame is
+    moved into the car's local frame (car at the origin, heading along +x)
+    and its cones are snapped to a grid of ``resolution`` meters. Frames with
+    the same planner options and the same snapped local scene share one cached
+    plan, which is stored in local coordinates and moved back to the car's
+    world pose on a hit. The cones must also be listed in the same order: the
+    planner breaks ties between equally distant cones by it. A hit
+    returns the plan of the first frame seen with that key, which usually
+    differs from a fresh plan by up to about ``resolution``. The exception is
+    a frame sitting right at one of the planner's own discontinuities (e.g.
+    a segment length where the sample count changes), where a fresh plan
+    could take either side.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.01,
+        maxsize: int = 1024,
+        engine: str = "heuristic",
+        interpolation: str = "linear",
+        optimizer: Optional[str] = None,
+        step: float = DEFAULT_STEP,
+        num_points: int = DEFAULT_NUM_POINTS,
+    ):
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.resolution = resolution
+        self.maxsize = maxsize
+        self.engine = engine
+        self.interpolation = interpolation
+        self.optimizer = optimizer
+        self.step = step
+        self.num_points = num_points
+        # Every planner option goes into the key, so plans made with different options never mix
+        self._options = repr((engine, interpolation, optimizer, float(step), int(num_points))).encode()
+        self._plans: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        self._plans.clear()
+
+    def generatePath(self, car_pose: CarPose, cones: ConeSet, as_array: bool = False) -> Union[Path2D, PathArray]:
+        """Same as ``PathPlanning(car_pose, cones, ...).generatePath(as_array)``, served from the cache when possible."""
+        if not isinstance(cones, ConeArray):
+            cones = ConeArray.from_cones(cones)
+        c, s = math.cos(car_pose.yaw), math.sin(car_pose.yaw)
+        key = self._key(car_pose, cones, c, s)
+
+        local = self._plans.get(key)
+        if local is not None:
+            self._plans.move_to_end(key)
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            planner = PathPlanning(
+                car_pose,
+                cones,
+                engine=self.engine,
+                interpolation=self.interpolation,
+                optimizer=self.optimizer,
+                step=self.step,
+                num_points=self.num_points,
+            )
+            world = planner.generatePath(as_array=True).xy
+            dx = world[:, 0] - car_pose.x
+            dy = world[:, 1] - car_pose.y
+            local = np.stack([c * dx + s * dy, -s * dx + c * dy], axis=1)
+            self._plans[key] = local
+            if len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+                self.stats["evictions"] += 1
+
+        xy = np.empty_like(local)
+        xy[:, 0] = car_pose.x + c * local[:, 0] - s * local[:, 1]
+        xy[:, 1] = car_pose.y + s * local[:, 0] + c * local[:, 1]
+        if as_array:
+            return PathArray(xy)
+        return list(zip(xy[:, 0].tolist(), xy[:, 1].tolist()))
+
+    def _key(self, car_pose: CarPose, cones: ConeArray, c: float, s: float) -> bytes:
+        dx = cones.x - car_pose.x
+        dy = cones.y - car_pose.y
+        qx = np.rint((c * dx + s * dy) / self.resolution).astype(np.int64)
+        qy = np.rint((-s * dx + c * dy) / self.resolution).astype(np.int64)
+        color = cones.color.astype(np.int64)
+        return self._options + np.stack([color, qx, qy]).tobytes()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+from typing import Dict, List, Optional
+
+from .models import ConeArray
+
+
+class Histogram:
+    """Power-of-two histogram of non-negative integers (nanoseconds, cone counts).
+
+    Bucket k counts values v with ``v.bit_length() == k``, i.e. 0 in bucket 0
+    and [2**(k-1), 2**k) in bucket k, so recording is one int method call and
+    a list increment.
+    """
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self.buckets: List[int] = []
+
+    def add(self, value: int) -> None:
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        k = value.bit_length()
+        if k >= len(self.buckets):
+            self.buckets.extend([0] * (k + 1 - len(self.buckets)))
+        self.buckets[k] += 1
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            # Exclusive upper bound of each non-empty bucket -> count
+            "buckets": {str(1 << k): n for k, n in enumerate(self.buckets) if n},
+        }
+
+
+class PlannerProfile:
+    """Opt-in instrumentation for ``PathPlanning``.
+
+    Pass one instance as ``PathPlanning(..., profiler=profile)`` (it can be
+    shared by any number of planners). The planner then records:
+
+    - ``timings_ns``: wall time per stage, one histogram per stage name
+      (select, color_split, filter_sort, waypoints, fit_boundary,
+      interpolate, extend, straight, delaunay, optimize, lattice);
+    - ``sizes``: cone counts going into and out of the forward selection;
+    - ``counters``: plans, the ``_compute_waypoints`` branch taken
+      (``branch:<name>``) and fallbacks used (``fallback:<name>``).
+
+    Planners without a profiler only pay an ``is None`` check per stage.
+    """
+
+    def __init__(self):
+        self.timings_ns: Dict[str, Histogram] = {}
+        self.sizes: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def time(self, stage: str, elapsed_ns: int) -> None:
+        hist = self.timings_ns.get(stage)
+        if hist is None:
+            hist = self.timings_ns[stage] = Histogram()
+        hist.add(elapsed_ns)
+
+    def size(self, name: str, value: int) -> None:
+        hist = self.sizes.get(name)
+        if hist is None:
+            hist = self.sizes[name] = Histogram()
+        hist.add(value)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        self.timings_ns.clear()
+        self.sizes.clear()
+        self.counters.clear()
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "timings_ns": {stage: h.to_dict() for stage, h in self.timings_ns.items()},
+            "sizes": {name: h.to_dict() for name, h in self.sizes.items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def waypoint_branch(blue: ConeArray, yellow: ConeArray) -> str:
+    """Name of the ``PathPlanning._compute_waypoints`` branch taken for these forward cones."""
+    return waypoint_branch_for(len(blue), len(yellow))
+
+
+def waypoint_branch_for(nb: int, ny: int) -> str:
+    """``waypoint_branch`` given the numbers of forward blue and yellow cones."""
+    if nb and ny:
+        if nb >= 2 and ny >= 2:
+            return "both_pairs"
+        if nb >= 2:
+            return "both_blue_extra"
+        if ny >= 2:
+            return "both_yellow_extra"
+        return "both_single"
+    side, n = ("blue", nb) if nb else ("yellow", ny)
+    if n >= 3:
+        return f"{side}_fit"
+    return f"{side}_{n}"
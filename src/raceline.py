@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import math
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from .min_curvature import MAX_TRACK_WIDTH, Corridor, min_curvature_offsets
+from .models import CarPose, ConeArray, ConeSet, Path2D, PathArray
+from .path_planning import DEFAULT_NUM_POINTS, DEFAULT_STEP
+from .spatial_index import ConeGrid
+
+
+# Nearest forward centers considered at each step of the walk along the track
+WALK_CANDIDATES = 6
+
+# Center points of the corridor farther apart than this are not consecutive
+MAX_CENTER_GAP = 15.0
+
+# A car farther than this from the line is not on the mapped track
+MAX_OFFSET = MAX_TRACK_WIDTH / 2
+
+# Room the minimum-curvature line keeps to the cones; the boundary between
+# two cones cuts into the corridor, so this is more than min_curvature's default
+MARGIN = 1.0
+
+# Corridor points repeated on either end when optimizing a closed loop, so the
+# seam is solved like any other part of the lap
+_LOOP_OVERLAP = 20
+
+
+class GlobalRaceline:
+    """Full-lap line over a mapped track, built once and looked up every frame.
+
+    Every cone is paired with the nearest cone of the other color (as in
+    ``min_curvature.corridor_from_cones``), and the midpoints are chained by
+    walking from the one nearest the car along ``car_pose.yaw`` to the
+    nearest unvisited forward midpoint until the walk gets back to the start
+    (a closed lap) or runs out of track. With ``optimizer="min_curvature"``
+    the chained corridor is replaced by its minimum-curvature line.
+
+    The line is resampled to ``step`` spacing (a closed lap is split into
+    equal parts, so the spacing differs from ``step`` by less than
+    ``step / samples``) with a cumulative arc-length index, and padded with
+    ``num_points`` extra samples: the wrapped-around start of a lap, or a
+    straight continuation of an open line. ``path`` then projects the car
+    onto the line through a ``ConeGrid`` over the samples and returns the
+    next ``num_points`` samples as a slice, so the cost per frame does not
+    depend on the size of the track.
+    """
+
+    OPTIMIZERS = ("min_curvature",)
+
+    def __init__(
+        self,
+        cones: ConeSet,
+        car_pose: CarPose,
+        step: float = DEFAULT_STEP,
+        num_points: int = DEFAULT_NUM_POINTS,
+        optimizer: Optional[str] = None,
+        max_offset: float = MAX_OFFSET,
+        margin: float = MARGIN,
+    ):
+        if optimizer is not None and optimizer not in self.OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer '{optimizer}'. Valid options: {', '.join(self.OPTIMIZERS)}")
+        if step <= 0:
+            raise ValueError("step must be positive")
+        if num_points < 1:
+            raise ValueError("num_points must be at least 1")
+        if not isinstance(cones, ConeArray):
+            cones = ConeArray.from_cones(cones)
+        self.step = float(step)
+        self.num_points = int(num_points)
+        self.max_offset = max_offset
+
+        corridor = _track_corridor(cones)
+        order, self.closed = _walk(corridor.centers, car_pose)
+        if len(order) < 2:
+            raise ValueError("not enough paired blue and yellow cones to build a raceline")
+        corridor = Corridor(
+            corridor.centers[order], corridor.normals[order], corridor.left[order], corridor.right[order]
+        )
+        points = corridor.centers
+        if optimizer == "min_curvature":
+            if self.closed:
+                alpha = _loop_offsets(corridor, margin)
+            else:
+                alpha = min_curvature_offsets(corridor, margin=margin)
+            points = corridor.points(alpha)
+
+        # Resample at equal arc length
+        ends = np.vstack([points, points[:1]]) if self.closed else points
+        seg = np.hypot(*np.diff(ends, axis=0).T)
+        cumulative = np.concatenate([[0.0], np.cumsum(seg)])
+        self.length = float(cumulative[-1])
+        if self.closed:
+            n = max(int(round(self.length / self.step)), 3)
+            self.spacing = self.length / n
+        else:
+            n = int(self.length // self.step) + 1
+            self.spacing = self.step
+        self.s = np.arange(n) * self.spacing
+        samples = np.stack([np.interp(self.s, cumulative, ends[:, 0]), np.interp(self.s, cumulative, ends[:, 1])], axis=1)
+
+        if self.closed:
+            tangent = np.roll(samples, -1, axis=0) - np.roll(samples, 1, axis=0)
+            reps = -(-self.num_points // n)
+            padding = np.tile(samples, (reps, 1))[: self.num_points]
+        else:
+            tangent = np.gradient(samples, axis=0) if n >= 2 else ends[-1:] - ends[-2:-1]
+            end = ends[-1] - ends[-2]
+            end /= max(float(np.hypot(*end)), 1e-12)
+            padding = samples[-1] + self.spacing * np.arange(1, self.num_points + 1)[:, None] * end
+        self.heading = np.arctan2(tangent[:, 1], tangent[:, 0])
+        self.xy = np.vstack([samples, padding])
+        self.xy.flags.writeable = False
+        self._grid = ConeGrid(
+            ConeArray(samples[:, 0], samples[:, 1], np.zeros(n, dtype=np.int32)), max(self.max_offset, self.step)
+        )
+
+    def __len__(self) -> int:
+        return len(self.s)
+
+    def project(self, car_pose: CarPose) -> Optional[Tuple[float, float]]:
+        """(arc length, distance) of the car's projection onto the line, or None off the track.
+
+        Of the nearest samples, the first one whose tangent points the same
+        way as the car is taken, so the other side of a hairpin is never
+        picked; the arc length is then refined along that sample's tangent.
+        """
+        c, s = math.cos(car_pose.yaw), math.sin(car_pose.yaw)
+        for i in self._grid._query(car_pose, 0, WALK_CANDIDATES, 0.0, math.inf).tolist():
+            dx = car_pose.x - self.xy[i, 0]
+            dy = car_pose.y - self.xy[i, 1]
+            distance = math.hypot(dx, dy)
+            if distance > self.max_offset:
+                break
+            h = self.heading[i]
+            if math.cos(h) * c + math.sin(h) * s <= 0.0:
+                continue
+            along = dx * math.cos(h) + dy * math.sin(h)
+            arc = float(self.s[i]) + along
+            if self.closed:
+                arc %= self.length
+            else:
+                arc = min(max(arc, 0.0), float(self.s[-1]))
+            return arc, distance
+        return None
+
+    def path(self, car_pose: CarPose, as_array: bool = False) -> Union[Path2D, PathArray, None]:
+        """The ``num_points`` samples from the car's projection on, or None when the car is off the track.
+
+        The first point is the first sample at or ahead of the projection.
+        With as_array=True the ``PathArray`` wraps a view of the samples.
+        """
+        projection = self.project(car_pose)
+        if projection is None:
+            return None
+        i = min(math.ceil(projection[0] / self.spacing - 1e-9), len(self.s))
+        if self.closed:
+            i %= len(self.s)
+        xy = self.xy[i : i + self.num_points]
+        if as_array:
+            return PathArray(xy)
+        return list(zip(xy[:, 0].tolist(), xy[:, 1].tolist()))
+
+
+def _track_corridor(cones: ConeArray) -> Corridor:
+    """Unordered corridor of every cone and its nearest cone of the other color within MAX_TRACK_WIDTH.
+
+    Pairing from both sides keeps the corridor going where a cone of one
+    side was missed; a pair found from both of its cones is kept once.
+    """
+    grid = ConeGrid(cones, MAX_TRACK_WIDTH)
+    pairs = set()
+    for color, other in ((1, 0), (0, 1)):
+        slot = ConeGrid.COLORS.index(other)
+        for i in np.flatnonzero(cones.color == color).tolist():
+            j = grid._query(CarPose(x=float(cones.x[i]), y=float(cones.y[i]), yaw=0.0), slot, 1, 0.0, math.inf)
+            if len(j):
+                pairs.add((i, int(j[0])) if color == 1 else (int(j[0]), i))
+    if not pairs:
+        return Corridor(np.empty((0, 2)), np.empty((0, 2)), [], [])
+    i, j = np.array(sorted(pairs)).T
+    b = np.stack([cones.x[i], cones.y[i]], axis=1)
+    y = np.stack([cones.x[j], cones.y[j]], axis=1)
+    width = np.hypot(*(b - y).T)
+    keep = (width <= MAX_TRACK_WIDTH) & (width > 0.0)
+    b, y, width = b[keep], y[keep], width[keep]
+    return Corridor((b + y) / 2, (b - y) / width[:, None], width / 2, width / 2)
+
+
+def _walk(centers: np.ndarray, car_pose: CarPose) -> Tuple[np.ndarray, bool]:
+    """Chain the corridor centers into driving order; returns (order, closed).
+
+    Starts at the center nearest the car and repeatedly steps to the nearest
+    unvisited center ahead of the current direction, at most MAX_CENTER_GAP
+    away. The lap is closed when the start is the nearest candidate again.
+    """
+    if not len(centers):
+        return np.empty(0, dtype=np.int64), False
+    grid = ConeGrid(ConeArray(centers[:, 0], centers[:, 1], np.zeros(len(centers), dtype=np.int32)), MAX_TRACK_WIDTH)
+    start = int(grid._query(car_pose, 0, 1, 0.0, math.inf)[0])
+    visited = np.zeros(len(centers), dtype=bool)
+    visited[start] = True
+    order = [start]
+    x, y = float(centers[start, 0]), float(centers[start, 1])
+    yaw = car_pose.yaw
+    while True:
+        here = CarPose(x=x, y=y, yaw=yaw)
+        step = None
+        for j in grid._query(here, 0, WALK_CANDIDATES, 1e-6, 0.0).tolist():
+            if math.hypot(centers[j, 0] - x, centers[j, 1] - y) > MAX_CENTER_GAP:
+                break
+            if j == start and len(order) > 2:
+                return np.array(order, dtype=np.int64), True
+            if not visited[j]:
+                step = j
+                break
+        if step is None:
+            return np.array(order, dtype=np.int64), False
+        visited[step] = True
+        order.append(step)
+        nx, ny = float(centers[step, 0]), float(centers[step, 1])
+        yaw = math.atan2(ny - y, nx - x)
+        x, y = nx, ny
+
+
+def _loop_offsets(corridor: Corridor, margin: float) -> np.ndarray:
+    """``min_curvature_offsets`` of a closed corridor, solved on the loop unrolled with some overlap."""
+    n = len(corridor)
+    w = min(_LOOP_OVERLAP, n)
+    index = np.arange(-w, n + w) % n
+    unrolled = Corridor(
+        corridor.centers[index], corridor.normals[index], corridor.left[index], corridor.right[index]
+    )
+    return min_curvature_offsets(unrolled, margin=margin)[w : w + n]
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import csv
+import fnmatch
+import hashlib
+import json
 import os
+import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
 
 # Ensure project root is on sys.path when running as a script: e.g., `python src/run.py`
 _CURRENT_DIR = os.path.dirname(__file__)
@@ -10,8 +18,96 @@ _PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, os.pardir))
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
-from src.scenarios import get_scenario_names, make_scenario
-from src.tester import PathTester
+from src.frame_log import FrameLog, record_frames
+from src.path_planning import PathPlanning
+from src.scenarios import get_scenario_names, is_scenario_name, iter_scenario_frames, make_scenario
+
+
+def expand_scenarios(patterns: List[str]) -> List[str]:
+    """Resolve batch patterns to scenario names.
+
+    Each pattern is a glob over the listed scenarios (``*``, ``1?``, ``gen:*``),
+    an explicit scenario name, or a generated seed range ``gen:<a>-<b>:<n_cones>``.
+    """
+    known = get_scenario_names(include_generated=True)
+    names: List[str] = []
+    for pattern in patterns or ["*"]:
+        seeds = re.fullmatch(r"gen:(\d+)-(\d+):(\d+)", pattern)
+        if seeds:
+            first, last, n_cones = (int(g) for g in seeds.groups())
+            names.extend(f"gen:{seed}:{n_cones}" for seed in range(first, last + 1))
+        elif is_scenario_name(pattern):
+            names.append(pattern)
+        else:
+            matched = fnmatch.filter(known, pattern)
+            if not matched:
+                raise ValueError(f"pattern '{pattern}' matches no scenario")
+            names.extend(matched)
+    return list(dict.fromkeys(names))
+
+
+def plan_scenario(name: str, repeats: int = 1) -> Dict[str, object]:
+    """Plan one scenario headlessly and time it; runs inside batch worker processes."""
+    if repeats < 1:
+        raise ValueError("repeats must be at least 1")
+    cones, car_pose = make_scenario(name)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        path = PathPlanning(car_pose, cones).generatePath()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "scenario": name,
+        "cones": len(cones),
+        "points": len(path),
+        "best_ms": timings[0] * 1e3,
+        "median_ms": timings[len(timings) // 2] * 1e3,
+        "max_ms": timings[-1] * 1e3,
+        "path": [[float(x), float(y)] for x, y in path],
+    }
+
+
+def run_batch(names: List[str], workers: Optional[int], repeats: int) -> List[Dict[str, object]]:
+    if workers is None:
+        workers = os.cpu_count() or 1
+    elif workers < 1:
+        raise ValueError("workers must be at least 1")
+    if workers == 1:
+        return [plan_scenario(name, repeats) for name in names]
+    chunksize = max(1, len(names) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(plan_scenario, names, [repeats] * len(names), chunksize=chunksize))
+
+
+def write_results(results: List[Dict[str, object]], output: str) -> None:
+    if output.endswith(".csv"):
+        fields = ["scenario", "cones", "points", "best_ms", "median_ms", "max_ms", "path"]
+        with open(output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in results:
+                writer.writerow({**row, "path": json.dumps(row["path"])})
+    else:
+        with open(output, "w") as f:
+            json.dump(results, f)
+
+
+def replay_log(path: str) -> Dict[str, object]:
+    """Plan every frame of a recorded frame log in order.
+
+    The digest covers every planned path, so two replays of the same log
+    (or of the same run recorded twice) can be compared for determinism.
+    """
+    digest = hashlib.sha256()
+    frames = 0
+    start = time.perf_counter()
+    with FrameLog(path) as log:
+        for cones, car_pose in log:
+            path_xy = PathPlanning(car_pose, cones).generatePath(as_array=True)
+            digest.update(path_xy.as_buffer())
+            frames += 1
+    return {"frames": frames, "seconds": time.perf_counter() - start, "digest": digest.hexdigest()}
 
 
 def main() -> None:
@@ -20,10 +116,107 @@ def main() -> None:
         "--scenario",
         type=str,
         default="1",
-        choices=get_scenario_names(),
-        help="Scenario name to load",
+        help=f"Scenario name to load: {', '.join(get_scenario_names())}, or gen:<seed>:<n_cones>",
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="*",
+        metavar="PATTERN",
+        default=None,
+        help="Plan scenarios headlessly instead of plotting: globs over scenario names, "
+        "explicit names or gen:<a>-<b>:<n_cones> seed ranges (default: all listed scenarios)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Batch worker processes (default: CPU count)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed planning calls per batch scenario")
+    parser.add_argument("--output", type=str, default=None, help="Batch results file (.json or .csv)")
+    parser.add_argument(
+        "--render",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="With --batch, also render every scenario to PNG files in DIR (off-screen)",
+    )
+    parser.add_argument(
+        "--grid",
+        type=str,
+        default="1x1",
+        metavar="ROWSxCOLS",
+        help="Contact-sheet layout for --render, e.g. 4x4 (default: one image per scenario)",
+    )
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Record the frames of --scenario to a binary frame log instead of plotting",
+    )
+    parser.add_argument("--frames", type=int, default=1000, help="Frames to record from generated scenarios")
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Plan every frame of a recorded frame log and print its timing and path digest",
     )
     args = parser.parse_args()
+    if args.render and args.batch is None:
+        parser.error("--render requires --batch")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.replay is not None:
+        try:
+            result = replay_log(args.replay)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        rate = result["frames"] / result["seconds"] if result["seconds"] > 0 else 0.0
+        print(f"replayed {result['frames']} frames in {result['seconds']:.2f}s ({rate:.0f} frames/s)")
+        print(f"path digest {result['digest']}")
+        return
+
+    if args.record is not None:
+        if not is_scenario_name(args.scenario):
+            parser.error(f"unknown scenario '{args.scenario}'")
+        frames = record_frames(args.record, iter_scenario_frames(args.scenario, args.frames))
+        print(f"recorded {frames} frames of {args.scenario} to {args.record}")
+        return
+
+    if args.batch is not None:
+        try:
+            names = expand_scenarios(args.batch)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.render:
+            # Checked before planning, so a typo does not cost a whole batch
+            try:
+                rows, cols = (int(n) for n in args.grid.lower().split("x"))
+                if rows < 1 or cols < 1:
+                    raise ValueError
+            except ValueError:
+                parser.error(f"invalid --grid '{args.grid}', expected ROWSxCOLS with both at least 1")
+        start = time.perf_counter()
+        results = run_batch(names, args.workers, args.repeat)
+        elapsed = time.perf_counter() - start
+        if args.output:
+            write_results(results, args.output)
+        slowest = max(results, key=lambda r: r["max_ms"], default=None)
+        print(f"planned {len(results)} scenarios in {elapsed:.2f}s", end="")
+        print(f", slowest {slowest['scenario']} at {slowest['max_ms']:.2f} ms" if slowest else "")
+        if args.render:
+            # Drawing was asked for explicitly, so only now load the visualizer
+            from src.tester import render_scenarios
+
+            start = time.perf_counter()
+            files = render_scenarios(names, args.render, rows, cols, workers=args.workers)
+            print(f"rendered {len(files)} images to {args.render} in {time.perf_counter() - start:.2f}s")
+        return
+
+    if not is_scenario_name(args.scenario):
+        parser.error(f"unknown scenario '{args.scenario}'")
+
+    from src.tester import PathTester
 
     cones, car_pose = make_scenario(args.scenario)
     tester = PathTester(cones=cones, car_pose=car_pose)
@@ -32,5 +225,3 @@ def main() -> None:
 
 if __name__ == "__main__":
     main()
-
-
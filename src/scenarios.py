@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from src.models import CarPose, Cone
+from src.models import CarPose, Cone, ConeSet
+from src.track_generator import generate_frames, generate_map
 
 
 _SCENARIOS: Dict[str, Tuple[List[Cone], CarPose]] = {
@@ -254,13 +255,61 @@ _SCENARIOS: Dict[str, Tuple[List[Cone], CarPose]] = {
 }
 
 
-def get_scenario_names() -> List[str]:
-    return sorted(_SCENARIOS.keys(), key=lambda s: int(s))
+# Procedurally generated tracks are named "gen:<seed>:<n_cones>"; these are
+# the ones listed by get_scenario_names(include_generated=True).
+GENERATED_SCENARIOS = ("gen:0:200", "gen:1:1000", "gen:2:10000")
 
 
-def make_scenario(name: str) -> Tuple[List[Cone], CarPose]:
+def get_scenario_names(include_generated: bool = False) -> List[str]:
+    names = sorted(_SCENARIOS.keys(), key=lambda s: int(s))
+    if include_generated:
+        names.extend(GENERATED_SCENARIOS)
+    return names
+
+
+def is_scenario_name(name: str) -> bool:
+    return name in _SCENARIOS or _parse_generated(name) is not None
+
+
+def make_scenario(name: str) -> Tuple[ConeSet, CarPose]:
+    """Cones and car pose of a scenario.
+
+    Generated scenarios return the whole noisy track map as a ``ConeArray``
+    with the car on the start line.
+    """
+    generated = _parse_generated(name)
+    if generated is not None:
+        return generate_map(*generated)
     if name not in _SCENARIOS:
         valid = ", ".join(get_scenario_names())
-        raise ValueError(f"Unknown scenario '{name}'. Valid options: {valid}")
+        raise ValueError(f"Unknown scenario '{name}'. Valid options: {valid}, or gen:<seed>:<n_cones>")
     cones, car = _SCENARIOS[name]
-    return list(cones), CarPose(x=car.x, y=car.y, yaw=car.yaw)
\ No newline at end of file
+    return list(cones), CarPose(x=car.x, y=car.y, yaw=car.yaw)
+
+
+def iter_scenario_frames(name: str, n_frames: Optional[int] = None) -> Iterator[Tuple[ConeSet, CarPose]]:
+    """Lazily yield the frames of a scenario.
+
+    Generated scenarios stream sensor-range detections of a car lapping the
+    track (endlessly when n_frames is None); hand-written ones are a single frame.
+    """
+    generated = _parse_generated(name)
+    if generated is not None:
+        yield from generate_frames(*generated, n_frames=n_frames)
+        return
+    if n_frames != 0:
+        yield make_scenario(name)
+
+
+def _parse_generated(name: str) -> Optional[Tuple[int, int]]:
+    parts = name.split(":")
+    if len(parts) != 3 or parts[0] != "gen":
+        return None
+    try:
+        seed, n_cones = int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+    # np.random.default_rng rejects negative seeds
+    if seed < 0 or n_cones < 1:
+        return None
+    return seed, n_cones
\ No newline at end of file
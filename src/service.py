@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import stat
+import sys
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+# Ensure project root is on sys.path when running as a script: e.g., `python src/service.py`
+_CURRENT_DIR = os.path.dirname(__file__)
+_PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, os.pardir))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src.models import CarPose, ConeArray, ConeSet
+from src.path_planning import PathPlanning
+from src.scenarios import is_scenario_name, iter_scenario_frames
+from src.validation import PathCheck, PathValidator
+
+
+# Protocol, one JSON object per line in each direction:
+#   in:  {"id": 7, "pose": [x, y, yaw], "cones": [[x, y, color], ...]}
+#        {"cmd": "stats"}
+#   out: {"id": 7, "path": [[x, y], ...], "stage": "waypoints", "plan_ms": 0.12, "latency_ms": 0.31}
+#        with --min-clearance also "valid": true/false and "first_violation": index or null
+#        {"stats": {...}}
+#        {"error": "..."}  for lines that are not valid frames
+#        {"id": 7, "error": "..."}  for frames whose planning failed
+# Pose may also be an object {"x": .., "y": .., "yaw": ..}.
+# Lines longer than STREAM_LIMIT bytes are skipped and answered with an error.
+
+# Longest accepted input line; asyncio's 64 KiB default holds only about 1500 cones
+STREAM_LIMIT = 16 * 2**20
+
+
+def parse_frame(message: Dict[str, object]) -> Tuple[object, CarPose, ConeArray]:
+    """Frame id, car pose and cones of a decoded input message; raises ValueError."""
+    pose = message.get("pose")
+    if isinstance(pose, dict):
+        car_pose = CarPose(x=float(pose["x"]), y=float(pose["y"]), yaw=float(pose["yaw"]))
+    elif isinstance(pose, (list, tuple)) and len(pose) == 3:
+        car_pose = CarPose(x=float(pose[0]), y=float(pose[1]), yaw=float(pose[2]))
+    else:
+        raise ValueError("frame needs a pose [x, y, yaw]")
+    if not (math.isfinite(car_pose.x) and math.isfinite(car_pose.y) and math.isfinite(car_pose.yaw)):
+        raise ValueError("pose values must be finite")
+    cones = np.asarray(message.get("cones", []), dtype=np.float64).reshape(-1, 3)
+    if not np.isfinite(cones).all():
+        raise ValueError("cone values must be finite")
+    return message.get("id"), car_pose, ConeArray.from_array(cones)
+
+
+async def read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Next line of ``reader`` (b"" at the end), or None for a line over the reader's limit.
+
+    An oversized line is read past and dropped, so the stream stays usable.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumed = e.consumed
+    while True:
+        # Drop what was scanned; the rest of the line follows up to its newline
+        await reader.readexactly(consumed)
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+
+
+def encode_frame(frame_id: object, car_pose: CarPose, cones: ConeSet) -> bytes:
+    if not isinstance(cones, ConeArray):
+        cones = ConeArray.from_cones(cones)
+    message = {
+        "id": frame_id,
+        "pose": [car_pose.x, car_pose.y, car_pose.yaw],
+        "cones": np.stack([cones.x, cones.y, cones.color], axis=1).tolist(),
+    }
+    return json.dumps(message).encode() + b"\n"
+
+
+class PlanningService:
+    """Long-lived planner serving JSON-lines streams of cone/pose frames.
+
+    Every connection keeps a single-slot mailbox: the reader overwrites it
+    with each new frame and the planner always takes the newest one, so a
+    frame that arrives while the previous one is still being planned
+    replaces any frame waiting in the slot, which is counted as dropped.
+    Planning runs in ``executor`` (one worker thread by default), keeping
+    the event loop free to ingest frames while a slow plan is in progress.
+    With ``deadline_ms`` every frame must be answered that long after it was
+    received, and the planner returns its best stage by then. With
+    ``min_clearance`` every path is checked by a ``PathValidator`` against
+    the frame's cones before it is sent, and flagged invalid (and counted)
+    when it comes closer than that to a cone or crosses a boundary. The
+    validator is rebuilt only when the cone set changes; for runs on a known
+    cone map pass a prebuilt ``validator``, which then checks every frame.
+    """
+
+    def __init__(
+        self,
+        engine: str = "heuristic",
+        interpolation: str = "linear",
+        executor: Optional[Executor] = None,
+        deadline_ms: Optional[float] = None,
+        min_clearance: Optional[float] = None,
+        validator: Optional[PathValidator] = None,
+    ):
+        self.engine = engine
+        self.interpolation = interpolation
+        self.deadline_ms = deadline_ms
+        self.min_clearance = min_clearance
+        self.validator = validator
+        self._validated: Optional[Tuple[ConeArray, PathValidator]] = None  # last frame's cones and their validator
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner")
+        self._pending = 0
+        self.stats: Dict[str, int] = {"received": 0, "planned": 0, "dropped": 0, "malformed": 0, "failed": 0, "invalid": 0, "connections": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        """Frames received but not yet picked up by the planner, over all connections."""
+        return self._pending
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "queue_depth": self.queue_depth}
+
+    def plan(
+        self, car_pose: CarPose, cones: ConeArray, received_at: float
+    ) -> Tuple[np.ndarray, str, float, Optional[PathCheck]]:
+        start = time.perf_counter()
+        deadline = received_at + self.deadline_ms / 1e3 if self.deadline_ms is not None else None
+        planner = PathPlanning(car_pose, cones, engine=self.engine, interpolation=self.interpolation)
+        path = planner.generatePath(as_array=True, deadline=deadline)
+        check = None
+        validator = self.validator
+        if validator is None and self.min_clearance is not None:
+            validator = self._validator_for(cones)
+        if validator is not None:
+            check = validator.check(path)
+        return path.xy, planner.stage, (time.perf_counter() - start) * 1e3, check
+
+    def _validator_for(self, cones: ConeArray) -> PathValidator:
+        """The validator of the last frame if it had the same cones, else a new one."""
+        validated = self._validated
+        if validated is not None:
+            previous, validator = validated
+            if (
+                len(previous) == len(cones)
+                and np.array_equal(previous.x, cones.x)
+                and np.array_equal(previous.y, cones.y)
+                and np.array_equal(previous.color, cones.color)
+            ):
+                return validator
+        validator = PathValidator(cones, self.min_clearance)
+        self._validated = (cones, validator)
+        return validator
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection until its input ends, then flush the last plan."""
+        self.stats["connections"] += 1
+        loop = asyncio.get_running_loop()
+        slot: list = []  # at most one (received_at, frame) waiting for the planner
+        ready = asyncio.Event()
+        closed = False
+        write_lock = asyncio.Lock()
+
+        async def send(message: Dict[str, object]) -> None:
+            async with write_lock:
+                writer.write(json.dumps(message).encode() + b"\n")
+                await writer.drain()
+
+        async def planner() -> None:
+            while True:
+                if not slot:
+                    if closed:
+                        return
+                    await ready.wait()
+                    ready.clear()
+                    continue
+                received_at, (frame_id, car_pose, cones) = slot.pop()
+                self._pending -= 1
+                try:
+                    xy, stage, plan_ms, check = await loop.run_in_executor(
+                        self._executor, self.plan, car_pose, cones, received_at
+                    )
+                except Exception as e:
+                    # One frame the planner chokes on must not stop the connection
+                    self.stats["failed"] += 1
+                    await send({"id": frame_id, "error": f"planning failed: {type(e).__name__}: {e}"})
+                    continue
+                self.stats["planned"] += 1
+                reply = {"id": frame_id, "path": xy.tolist(), "stage": stage, "plan_ms": plan_ms}
+                if check is not None:
+                    reply["valid"] = check.ok
+                    reply["first_violation"] = check.first_violation
+                    if not check.ok:
+                        self.stats["invalid"] += 1
+                reply["latency_ms"] = (time.perf_counter() - received_at) * 1e3
+                await send(reply)
+
+        task = asyncio.create_task(planner())
+        try:
+            while True:
+                line = await read_line(reader)
+                if line is None:
+                    self.stats["malformed"] += 1
+                    await send({"error": "line too long"})
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                    if message.get("cmd") == "stats":
+                        await send({"stats": self.snapshot()})
+                        continue
+                    frame = parse_frame(message)
+                except (ValueError, TypeError, KeyError, AttributeError) as e:
+                    self.stats["malformed"] += 1
+                    await send({"error": str(e)})
+                    continue
+                self.stats["received"] += 1
+                if slot:
+                    slot.pop()
+                    self.stats["dropped"] += 1
+                    self._pending -= 1
+                slot.append((time.perf_counter(), frame))
+                self._pending += 1
+                ready.set()
+        finally:
+            closed = True
+            ready.set()
+            try:
+                await task
+            finally:
+                self._pending -= len(slot)
+                slot.clear()
+                writer.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+async def publish(
+    writer: asyncio.StreamWriter,
+    frames: Iterable[Tuple[ConeSet, CarPose]],
+    rate_hz: Optional[float] = None,
+) -> int:
+    """Stand-in detection publisher: write frames as JSON lines, optionally paced to rate_hz."""
+    period = 1.0 / rate_hz if rate_hz else 0.0
+    start = time.perf_counter()
+    count = 0
+    for count, (cones, car_pose) in enumerate(frames, start=1):
+        writer.write(encode_frame(count, car_pose, cones))
+        await writer.drain()
+        delay = start + count * period - time.perf_counter()
+        # Yield to the loop even unpaced, so the service can ingest in between
+        await asyncio.sleep(max(delay, 0.0))
+    if writer.can_write_eof():
+        writer.write_eof()
+    return count
+
+
+async def run_demo(service: PlanningService, scenario: str, n_frames: int, rate_hz: Optional[float]) -> Dict[str, object]:
+    """Feed a scenario's frames through the service over a local socket pair."""
+    service_sock, client_sock = socket.socketpair()
+    server_reader, server_writer = await asyncio.open_connection(sock=service_sock, limit=STREAM_LIMIT)
+    client_reader, client_writer = await asyncio.open_connection(sock=client_sock, limit=STREAM_LIMIT)
+
+    async def collect() -> list:
+        replies = []
+        while True:
+            line = await client_reader.readline()
+            if not line:
+                return replies
+            replies.append(json.loads(line))
+
+    serving = asyncio.create_task(service.serve(server_reader, server_writer))
+    collecting = asyncio.create_task(collect())
+    start = time.perf_counter()
+    sent = await publish(client_writer, iter_scenario_frames(scenario, n_frames), rate_hz)
+    await serving
+    replies = await collecting
+    elapsed = time.perf_counter() - start
+    client_writer.close()
+
+    latencies = sorted(r["latency_ms"] for r in replies if "latency_ms" in r)
+    return {
+        "sent": sent,
+        "replies": len(replies),
+        "elapsed_s": elapsed,
+        "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+        "latency_max_ms": latencies[-1] if latencies else None,
+        **service.snapshot(),
+    }
+
+
+class _FileWriter:
+    """The part of ``asyncio.StreamWriter`` that ``PlanningService.serve`` uses, over a blocking file."""
+
+    def __init__(self, file):
+        self._file = file
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    async def drain(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._file.flush)
+
+    def close(self) -> None:
+        self._file.flush()
+
+
+_stdin_pumps: set = set()
+
+
+def _is_stream(file) -> bool:
+    """True for pipes, sockets and terminals, the files asyncio pipe transports accept."""
+    mode = os.fstat(file.fileno()).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode)
+
+
+async def _stdio_streams() -> Tuple[asyncio.StreamReader, Union[asyncio.StreamWriter, _FileWriter]]:
+    # Pipe transports refuse regular files (`service.py < frames.jsonl > out.jsonl`),
+    # which are read and written from a worker thread instead
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    if _is_stream(sys.stdin):
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    else:
+
+        async def pump() -> None:
+            while True:
+                line = await loop.run_in_executor(None, sys.stdin.buffer.readline)
+                if not line:
+                    reader.feed_eof()
+                    return
+                reader.feed_data(line)
+
+        # The loop only keeps a weak reference to tasks
+        _stdin_pumps.add(asyncio.ensure_future(pump()))
+    if _is_stream(sys.stdout):
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    else:
+        writer = _FileWriter(sys.stdout.buffer)
+    return reader, writer
+
+
+async def _serve_forever(service: PlanningService, args: argparse.Namespace) -> None:
+    if args.unix:
+        server = await asyncio.start_unix_server(service.serve, path=args.unix, limit=STREAM_LIMIT)
+    else:
+        host, _, port = args.tcp.rpartition(":")
+        server = await asyncio.start_server(service.serve, host or "127.0.0.1", int(port), limit=STREAM_LIMIT)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Serve PathPlanning over JSON lines on stdin/stdout or a local socket."
+    )
+    channel = parser.add_mutually_exclusive_group()
+    channel.add_argument("--unix", type=str, default=None, metavar="PATH", help="Listen on a Unix socket")
+    channel.add_argument("--tcp", type=str, default=None, metavar="[HOST:]PORT", help="Listen on a TCP port")
+    channel.add_argument(
+        "--demo",
+        type=str,
+        default=None,
+        metavar="SCENARIO",
+        help="Feed the frames of a scenario (e.g. gen:0:200) through the service and print its counters",
+    )
+    parser.add_argument("--frames", type=int, default=500, help="Frames to publish with --demo")
+    parser.add_argument("--rate", type=float, default=None, help="Publish rate for --demo in Hz (default: unpaced)")
+    parser.add_argument("--engine", choices=PathPlanning.ENGINES, default="heuristic")
+    parser.add_argument("--interpolation", choices=PathPlanning.INTERPOLATIONS, default="linear")
+    parser.add_argument(
+        "--deadline-ms", type=float, default=None, help="Answer each frame within this many ms of receiving it"
+    )
+    parser.add_argument(
+        "--min-clearance",
+        type=float,
+        default=None,
+        metavar="M",
+        help="Validate every path against the frame's cones and flag it invalid if it comes closer than M "
+        "meters to a cone or crosses a boundary",
+    )
+    args = parser.parse_args(argv)
+
+    if args.demo is not None and not is_scenario_name(args.demo):
+        parser.error(f"unknown scenario '{args.demo}'")
+
+    service = PlanningService(
+        engine=args.engine,
+        interpolation=args.interpolation,
+        deadline_ms=args.deadline_ms,
+        min_clearance=args.min_clearance,
+    )
+    try:
+        if args.demo is not None:
+            report = asyncio.run(run_demo(service, args.demo, args.frames, args.rate))
+            print(json.dumps(report, indent=2))
+        elif args.unix or args.tcp:
+            asyncio.run(_serve_forever(service, args))
+        else:
+
+            async def serve_stdio() -> None:
+                await service.serve(*await _stdio_streams())
+
+            asyncio.run(serve_stdio())
+            print(json.dumps(service.snapshot()), file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from .models import CarPose, ConeArray
+
+
+class ConeGrid:
+    """Uniform grid index over a cone set for nearest-forward-cone queries.
+
+    Cones are bucketed per color into square cells stored in CSR form: one
+    sorted ``order`` array of cone indices plus a ``starts`` offset table with
+    one entry per (color, cell). A query scans a square window of cells around
+    the car, doubling it until no cell outside the window can hold a cone
+    closer than the current k-th best, so the cost depends on the local cone
+    density rather than on the size of the map.
+    """
+
+    COLORS = (0, 1)
+
+    def __init__(self, cones: ConeArray, cell_size: Optional[float] = None):
+        if not isinstance(cones, ConeArray):
+            cones = ConeArray.from_cones(cones)
+        self.cones = cones
+
+        n = len(cones)
+        if n:
+            self.x0 = float(cones.x.min())
+            self.y0 = float(cones.y.min())
+            width = max(float(cones.x.max()) - self.x0, 1e-6)
+            height = max(float(cones.y.max()) - self.y0, 1e-6)
+        else:
+            self.x0 = self.y0 = 0.0
+            width = height = 1e-6
+
+        if cell_size is None:
+            # About one cone per cell, and never more cells than O(n).
+            cell_size = max(math.sqrt(width * height / max(n, 1)), max(width, height) / max(n, 1), 1e-3)
+        self.cell_size = float(cell_size)
+        self.nx = int(width // self.cell_size) + 1
+        self.ny = int(height // self.cell_size) + 1
+        num_cells = self.nx * self.ny
+
+        ix = ((cones.x - self.x0) // self.cell_size).astype(np.intp)
+        iy = ((cones.y - self.y0) // self.cell_size).astype(np.intp)
+        key = np.full(n, len(self.COLORS) * num_cells, dtype=np.intp)
+        for slot, color in enumerate(self.COLORS):
+            key[cones.color == color] = slot * num_cells
+        key += np.where(key < len(self.COLORS) * num_cells, iy * self.nx + ix, 0)
+
+        self.order = np.argsort(key, kind="stable")
+        self.starts = np.searchsorted(key[self.order], np.arange(len(self.COLORS) * num_cells + 1))
+        # Coordinates in bucket order so a cell's cones are contiguous in memory.
+        self.xs = cones.x[self.order]
+        self.ys = cones.y[self.order]
+
+    @classmethod
+    def from_index(
+        cls,
+        cones: ConeArray,
+        x0: float,
+        y0: float,
+        cell_size: float,
+        nx: int,
+        ny: int,
+        order: np.ndarray,
+        starts: np.ndarray,
+        xs: np.ndarray,
+        ys: np.ndarray,
+    ) -> "ConeGrid":
+        """Wrap the arrays of an already built grid without re-bucketing or copying them,
+        e.g. views into shared memory (see ``src.fleet.SharedConeMap``)."""
+        grid = cls.__new__(cls)
+        grid.cones = cones
+        grid.x0, grid.y0, grid.cell_size = float(x0), float(y0), float(cell_size)
+        grid.nx, grid.ny = int(nx), int(ny)
+        grid.order, grid.starts, grid.xs, grid.ys = order, starts, xs, ys
+        return grid
+
+    def __len__(self) -> int:
+        return len(self.cones)
+
+    def nearest_forward(
+        self,
+        car_pose: CarPose,
+        color: int,
+        k: int = 3,
+        min_dist: float = 0.5,
+        back_margin: float = 0.5,
+    ) -> ConeArray:
+        """Return up to k cones of ``color`` nearest to the car, sorted by distance.
+
+        Only cones at least ``min_dist`` away and with a forward projection
+        greater than ``-back_margin`` along the car heading are considered,
+        matching ``PathPlanning._filter_and_sort_cones``. Ties are broken by
+        the original cone order.
+        """
+        idx = self._query(car_pose, self.COLORS.index(color), k, min_dist, back_margin)
+        return self.cones[idx]
+
+    def nearest_within(self, x: np.ndarray, y: np.ndarray, color: int, k: int, max_dist: float) -> np.ndarray:
+        """Indices of the up to k cones of ``color`` within ``max_dist`` of each point (x[i], y[i]).
+
+        Returns an (len(x), k) array, each row sorted by distance with ties
+        broken by the original cone order and padded with -1. All points are
+        answered together from the cells within ``max_dist``, without a
+        Python loop per point.
+        """
+        x = np.asarray(x, dtype=np.float64).reshape(-1)
+        y = np.asarray(y, dtype=np.float64).reshape(-1)
+        m = len(x)
+        out = np.full((m, k), -1, dtype=np.intp)
+        if not m or not k:
+            return out
+        cs = self.cell_size
+        base = self.COLORS.index(color) * self.nx * self.ny
+        cx = np.floor((x - self.x0) / cs).astype(np.intp)
+        cy = np.floor((y - self.y0) / cs).astype(np.intp)
+        r = max(int(math.ceil(max_dist / cs)), 0)
+
+        points, positions = [], []
+        for oy in range(-r, r + 1):
+            gy = cy + oy
+            for ox in range(-r, r + 1):
+                gx = cx + ox
+                valid = (gx >= 0) & (gx < self.nx) & (gy >= 0) & (gy < self.ny)
+                cell = base + np.where(valid, gy * self.nx + gx, 0)
+                lo = self.starts[cell]
+                counts = np.where(valid, self.starts[cell + 1] - lo, 0)
+                points.append(np.repeat(np.arange(m), counts))
+                positions.append(np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum())))
+        q = np.concatenate(points)
+        pos = np.concatenate(positions)
+        dist = np.hypot(self.xs[pos] - x[q], self.ys[pos] - y[q])
+        keep = dist <= max_dist
+        q, idx, dist = q[keep], self.order[pos[keep]], dist[keep]
+
+        top = np.lexsort((idx, dist, q))
+        q, idx = q[top], idx[top]
+        # Rank of each candidate within its point's row
+        rank = np.arange(len(q)) - np.searchsorted(q, q)
+        keep = rank < k
+        out[q[keep], rank[keep]] = idx[keep]
+        return out
+
+    def _query(self, car_pose: CarPose, slot: int, k: int, min_dist: float, back_margin: float) -> np.ndarray:
+        cs = self.cell_size
+        px, py = car_pose.x, car_pose.y
+        cos_yaw, sin_yaw = math.cos(car_pose.yaw), math.sin(car_pose.yaw)
+        base = slot * self.nx * self.ny
+
+        gx = (px - self.x0) / cs
+        gy = (py - self.y0) / cs
+        cx, cy = math.floor(gx), math.floor(gy)
+        fx, fy = gx - cx, gy - cy
+
+        # Start with the smallest window that reaches the grid, then double it.
+        r = max(1, -cx, cx - (self.nx - 1), -cy, cy - (self.ny - 1))
+        r_all = max(cx, self.nx - 1 - cx, cy, self.ny - 1 - cy)
+        while True:
+            x_lo, x_hi = max(cx - r, 0), min(cx + r, self.nx - 1)
+            y_lo, y_hi = max(cy - r, 0), min(cy + r, self.ny - 1)
+
+            # Cells of one grid row are contiguous in the CSR layout, so each
+            # row of the window is a single slice.
+            rows = base + np.arange(y_lo, y_hi + 1) * self.nx
+            lo = self.starts[rows + x_lo]
+            hi = self.starts[rows + x_hi + 1]
+            counts = hi - lo
+            total = int(counts.sum())
+            pos = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(total)
+
+            dx = self.xs[pos] - px
+            dy = self.ys[pos] - py
+            dist = np.hypot(dx, dy)
+            keep = (dist >= min_dist) & (dx * cos_yaw + dy * sin_yaw > -back_margin)
+            idx = self.order[pos[keep]]
+            dist = dist[keep]
+            top = np.lexsort((idx, dist))[:k]
+
+            if r >= r_all:
+                return idx[top]
+            # Anything outside the window is at least this far from the car.
+            bound = min(fx + r, r + 1 - fx, fy + r, r + 1 - fy) * cs
+            if len(top) == k and dist[top[-1]] < bound:
+                return idx[top]
+            r *= 2
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from typing import List
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+from typing import Dict, List, Optional, Sequence, Tuple
 
-import matplotlib.pyplot as plt
+import numpy as np
 
-from src.models import CarPose, Cone, Path2D
+from src.models import CarPose, Cone, ConeArray, ConeSet, Path2D
 from src.path_planning import PathPlanning
+from src.scenarios import make_scenario
 
 
 class PathTester:
@@ -23,15 +28,18 @@ class PathTester:
         return path
 
     def _plot_scene(self, path: Path2D) -> None:
+        # Imported here so that importing the tester does not probe a GUI backend
+        import matplotlib.pyplot as plt
+
         _, ax = plt.subplots(figsize=(8, 6))
         ax.set_aspect("equal", adjustable="box")
         ax.grid(True, linestyle=":", linewidth=0.5)
         ax.set_xlabel("X [m]")
         ax.set_ylabel("Y [m]")
         ax.set_title("FSAI-Style Cone Track Path Planning Test")
-        # Fix the visible world window to 6x6 meters centered at the origin
-        ax.set_xlim(-1.0, 6.0)
-        ax.set_ylim(-1.0, 6.0)
+        xlim, ylim = _view_limits(self.car_pose)
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
 
         # Plot cones by color
         yellow_x = [c.x for c in self.cones if c.color == 0]
@@ -63,9 +71,154 @@ class PathTester:
         plt.show()
 
     def _draw_heading_arrow(self, ax) -> None:
-        import math
-
         length = 1.0
         dx = math.cos(self.car_pose.yaw) * length
         dy = math.sin(self.car_pose.yaw) * length
         ax.arrow(self.car_pose.x, self.car_pose.y, dx, dy, head_width=0.3, head_length=0.4, fc="red", ec="red")
+
+
+class SceneRenderer:
+    """Non-interactive (Agg) renderer for many scenes.
+
+    One figure with a rows x cols grid of axes is created up front, together
+    with the cone, car, heading and path artists of every cell. Rendering a
+    page of scenes only swaps the artists' data and limits before writing the
+    image, instead of building a new figure per scene.
+    """
+
+    def __init__(
+        self,
+        rows: int = 1,
+        cols: int = 1,
+        cell_inches: float = 3.0,
+        dpi: int = 80,
+        ticks: Optional[bool] = None,
+    ):
+        """ticks: draw axis ticks and grid lines. Defaults to on for single
+        scenes and off for contact sheets, where tick layout would dominate
+        the drawing time."""
+        # Plain Figure + Agg canvas: no pyplot, no GUI backend, no window
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.rows = rows
+        self.cols = cols
+        self.figure = Figure(figsize=(cols * cell_inches, rows * cell_inches), dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        axes = self.figure.subplots(rows, cols, squeeze=False).ravel()
+        self.figure.subplots_adjust(left=0.06, right=0.98, bottom=0.05, top=0.95, wspace=0.25, hspace=0.3)
+        ticks = rows * cols == 1 if ticks is None else ticks
+        self._cells = [_SceneArtists(ax, ticks) for ax in axes]
+
+    @property
+    def page_size(self) -> int:
+        return self.rows * self.cols
+
+    def render(self, scenes: Sequence[Tuple[str, ConeSet, CarPose, Path2D]], filename: str) -> None:
+        """Draw up to ``page_size`` (title, cones, car pose, path) scenes into one image file."""
+        if len(scenes) > self.page_size:
+            raise ValueError(f"{len(scenes)} scenes do not fit a {self.rows}x{self.cols} page")
+        for cell, scene in zip_longest(self._cells, scenes):
+            if scene is not None:
+                cell.update(*scene)
+            else:
+                cell.hide()
+        self.figure.savefig(filename)
+
+
+class _SceneArtists:
+    def __init__(self, ax, ticks: bool):
+        self.ax = ax
+        ax.set_aspect("equal", adjustable="box")
+        if ticks:
+            ax.grid(True, linestyle=":", linewidth=0.5)
+            ax.tick_params(labelsize=6)
+        else:
+            ax.set_xticks([])
+            ax.set_yticks([])
+        empty = np.empty((0, 2))
+        self.yellow = ax.scatter(empty[:, 0], empty[:, 1], c="gold", edgecolors="black", s=20)
+        self.blue = ax.scatter(empty[:, 0], empty[:, 1], c="royalblue", edgecolors="black", s=20)
+        (self.path,) = ax.plot([], [], "-", color="limegreen", linewidth=1.5)
+        (self.heading,) = ax.plot([], [], "-", color="red", linewidth=1.5)
+        (self.car,) = ax.plot([], [], "o", color="red", markersize=5)
+        self.title = ax.set_title("", fontsize=8)
+
+    def update(self, title: str, cones: ConeSet, car_pose: CarPose, path: Path2D) -> None:
+        cones = cones if isinstance(cones, ConeArray) else ConeArray.from_cones(cones)
+        xy = np.column_stack([cones.x, cones.y])
+        self.yellow.set_offsets(xy[cones.color == 0])
+        self.blue.set_offsets(xy[cones.color == 1])
+        self.car.set_data([car_pose.x], [car_pose.y])
+        self.heading.set_data(
+            [car_pose.x, car_pose.x + math.cos(car_pose.yaw)],
+            [car_pose.y, car_pose.y + math.sin(car_pose.yaw)],
+        )
+        points = np.asarray(path, dtype=float).reshape(-1, 2)
+        self.path.set_data(points[:, 0], points[:, 1])
+        self.title.set_text(title)
+        xlim, ylim = _view_limits(car_pose)
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+        self.ax.set_visible(True)
+
+    def hide(self) -> None:
+        self.ax.set_visible(False)
+
+
+# Renderer reused by every page a worker process draws, keyed by its layout
+_worker_renderers: Dict[Tuple[int, int, int], SceneRenderer] = {}
+
+
+def render_scenarios(
+    names: Sequence[str],
+    out_dir: str,
+    rows: int = 1,
+    cols: int = 1,
+    workers: Optional[int] = None,
+    dpi: int = 80,
+) -> List[str]:
+    """Plan and render scenarios to PNG files, optionally across worker processes.
+
+    With a 1x1 layout every scenario gets its own ``<name>.png``; larger
+    layouts write contact sheets ``sheet-0000.png``, ``sheet-0001.png``, ...
+    Returns the written file names in page order.
+    """
+    if rows < 1 or cols < 1:
+        raise ValueError(f"rows and cols must be at least 1, got {rows}x{cols}")
+    os.makedirs(out_dir, exist_ok=True)
+    per_page = rows * cols
+    pages = [list(names[i : i + per_page]) for i in range(0, len(names), per_page)]
+    if per_page == 1:
+        files = [os.path.join(out_dir, page[0].replace(":", "_") + ".png") for page in pages]
+    else:
+        files = [os.path.join(out_dir, f"sheet-{i:04d}.png") for i in range(len(pages))]
+
+    jobs = [(page, filename, rows, cols, dpi) for page, filename in zip(pages, files)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        for job in jobs:
+            _render_page(*job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_page, *zip(*jobs), chunksize=max(1, len(jobs) // (4 * workers))))
+    return files
+
+
+def _render_page(names: List[str], filename: str, rows: int, cols: int, dpi: int) -> None:
+    renderer = _worker_renderers.get((rows, cols, dpi))
+    if renderer is None:
+        renderer = _worker_renderers[(rows, cols, dpi)] = SceneRenderer(rows, cols, dpi=dpi)
+    scenes = []
+    for name in names:
+        cones, car_pose = make_scenario(name)
+        scenes.append((name, cones, car_pose, PathPlanning(car_pose, cones).generatePath()))
+    renderer.render(scenes, filename)
+
+
+def _view_limits(car_pose: CarPose) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    # Fix the visible world window to 6x6 meters centered at the origin,
+    # or follow the car on larger (generated) tracks
+    if -1.0 <= car_pose.x <= 6.0 and -1.0 <= car_pose.y <= 6.0:
+        return (-1.0, 6.0), (-1.0, 6.0)
+    return (car_pose.x - 15.0, car_pose.x + 15.0), (car_pose.y - 15.0, car_pose.y + 15.0)
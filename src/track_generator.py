@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from .models import CarPose, ConeArray
+
+
+@dataclass(frozen=True)
+class TrackConfig:
+    """Parameters of a procedurally generated closed track.
+
+    Distances are in meters. Blue cones mark the left boundary and yellow
+    cones the right one for a car driving the track counter-clockwise.
+    """
+
+    cone_spacing: float = 4.0
+    half_width: float = 2.5
+    wiggle: float = 0.3  # relative radius variation of the loop, below 1 so the loop stays simple
+    min_turn_radius: float = 9.0  # tightest centerline turn, keeps the boundaries from folding over
+    position_noise: float = 0.05  # std-dev of detection noise
+    miss_rate: float = 0.05  # probability of a cone not being detected in a frame
+    sensor_range: float = 15.0
+    frame_step: float = 0.5  # distance the car advances between frames
+
+
+@dataclass(frozen=True)
+class Track:
+    centerline: np.ndarray  # (n, 2) evenly spaced points along the loop
+    blue: np.ndarray  # (n, 2) left boundary cones
+    yellow: np.ndarray  # (n, 2) right boundary cones
+    length: float
+
+    def cones(self) -> ConeArray:
+        n = len(self.blue)
+        return ConeArray(
+            np.concatenate([self.blue[:, 0], self.yellow[:, 0]]),
+            np.concatenate([self.blue[:, 1], self.yellow[:, 1]]),
+            np.concatenate([np.ones(n, dtype=np.int32), np.zeros(n, dtype=np.int32)]),
+        )
+
+
+def generate_track(seed: int, n_cones: int, config: TrackConfig = TrackConfig()) -> Track:
+    """Closed track with ``n_cones`` cones (half per side) and curvature from random harmonics."""
+    rng = np.random.default_rng(seed)
+    n_side = max(n_cones // 2, 3)
+    length = n_side * config.cone_spacing
+    radius = length / (2 * math.pi)
+
+    # A circle whose radius is modulated by random harmonics. The radius stays
+    # positive (modulation below ``wiggle`` < 1), so the loop is star-shaped and
+    # never crosses itself. Longer tracks get higher harmonics so corners keep
+    # a realistic size instead of stretching with the loop.
+    harmonics = np.arange(2, min(max(6, int(length / 100.0)), 256))
+    amplitudes = rng.uniform(0.2, 1.0, len(harmonics)) / harmonics
+    amplitudes *= config.wiggle / amplitudes.sum()
+    phases = rng.uniform(0, 2 * math.pi, len(harmonics))
+    theta = np.linspace(0, 2 * math.pi, 8 * n_side, endpoint=False)
+    modulation = np.zeros_like(theta)
+    for k, a, phase in zip(harmonics, amplitudes, phases):
+        modulation += a * np.cos(k * theta + phase)
+    for _ in range(30):
+        r = radius * (1 + modulation)
+        dense = np.stack([r * np.cos(theta), r * np.sin(theta)], axis=1)
+        if _min_turn_radius(dense) >= min(config.min_turn_radius, radius):
+            break
+        modulation *= 0.8
+
+    # Resample at equal arc length, one sample per cone pair.
+    closed = np.vstack([dense, dense[:1]])
+    seg = np.hypot(*np.diff(closed, axis=0).T)
+    s = np.concatenate([[0.0], np.cumsum(seg)])
+    targets = np.linspace(0, s[-1], n_side, endpoint=False)
+    center = np.stack([np.interp(targets, s, closed[:, 0]), np.interp(targets, s, closed[:, 1])], axis=1)
+
+    tangent = np.roll(center, -1, axis=0) - np.roll(center, 1, axis=0)
+    tangent /= np.hypot(*tangent.T)[:, None]
+    left = np.stack([-tangent[:, 1], tangent[:, 0]], axis=1)
+    return Track(
+        centerline=center,
+        blue=center + left * config.half_width,
+        yellow=center - left * config.half_width,
+        length=float(s[-1]),
+    )
+
+
+def generate_map(seed: int, n_cones: int, config: TrackConfig = TrackConfig()) -> Tuple[ConeArray, CarPose]:
+    """The whole track as one noisy detection set, with the car on the start line."""
+    track = generate_track(seed, n_cones, config)
+    rng = np.random.default_rng(seed + 1)
+    cones = track.cones()
+    keep = rng.random(len(cones)) >= config.miss_rate
+    cones = ConeArray(
+        cones.x[keep] + rng.normal(0, config.position_noise, keep.sum()),
+        cones.y[keep] + rng.normal(0, config.position_noise, keep.sum()),
+        cones.color[keep],
+    )
+    return cones, _pose_at(track, 0.0)
+
+
+def generate_frames(
+    seed: int,
+    n_cones: int,
+    n_frames: Optional[int] = None,
+    config: TrackConfig = TrackConfig(),
+) -> Iterator[Tuple[ConeArray, CarPose]]:
+    """Lazily yield (detections, car pose) frames of a car lapping the track.
+
+    Each frame holds the cones within ``sensor_range`` of the car, with
+    independent misses and position noise. With ``n_frames=None`` the stream
+    never ends. Only the track itself is kept in memory.
+    """
+    track = generate_track(seed, n_cones, config)
+    rng = np.random.default_rng(seed + 1)
+    n_side = len(track.centerline)
+    spacing = track.length / n_side
+    # Cones are ordered along the track, so the ones in range of the car are
+    # within a fixed window of indices around it. On a track shorter than the
+    # window it covers each cone once instead of wrapping around the lap.
+    reach = int(config.sensor_range / spacing) + 1
+    if 2 * reach + 1 <= n_side:
+        window = np.arange(-reach, reach + 1)
+    else:
+        window = np.arange(-(n_side // 2), n_side - n_side // 2)
+    colors = np.concatenate([np.ones(len(window), dtype=np.int32), np.zeros(len(window), dtype=np.int32)])
+
+    frame = 0
+    while n_frames is None or frame < n_frames:
+        s = (frame * config.frame_step) % track.length
+        pose = _pose_at(track, s)
+        idx = (int(s / spacing) + window) % n_side
+        xy = np.vstack([track.blue[idx], track.yellow[idx]])
+        dist = np.hypot(xy[:, 0] - pose.x, xy[:, 1] - pose.y)
+        keep = (dist <= config.sensor_range) & (rng.random(len(xy)) >= config.miss_rate)
+        noise = rng.normal(0, config.position_noise, (int(keep.sum()), 2))
+        yield ConeArray(xy[keep, 0] + noise[:, 0], xy[keep, 1] + noise[:, 1], colors[keep]), pose
+        frame += 1
+
+
+def _min_turn_radius(loop: np.ndarray) -> float:
+    d1 = (np.roll(loop, -1, axis=0) - np.roll(loop, 1, axis=0)) / 2
+    d2 = np.roll(loop, -1, axis=0) - 2 * loop + np.roll(loop, 1, axis=0)
+    curvature = np.abs(d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]) / np.hypot(*d1.T) ** 3
+    return float(1.0 / max(curvature.max(), 1e-12))
+
+
+def _pose_at(track: Track, s: float) -> CarPose:
+    """Car pose on the centerline at arc length s, heading along the track."""
+    n = len(track.centerline)
+    pos = s / track.length * n
+    i = int(pos) % n
+    j = (i + 1) % n
+    t = pos - int(pos)
+    a, b = track.centerline[i], track.centerline[j]
+    x, y = a + t * (b - a)
+    return CarPose(x=float(x), y=float(y), yaw=math.atan2(b[1] - a[1], b[0] - a[0]))
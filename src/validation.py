@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .models import ConeArray, ConeSet
+from .spatial_index import ConeGrid
+
+
+# Same-color cones at most this far apart are taken to be joined by the track boundary
+MAX_BOUNDARY_GAP = 6.0
+
+# Below this many segments (a single frame of detections) a grid costs more than it saves
+GRID_MIN_SEGMENTS = 128
+
+
+def boundary_segments(cones: ConeArray, max_gap: float = MAX_BOUNDARY_GAP) -> np.ndarray:
+    """(S, 2, 2) track boundary segments: each cone joined to its two nearest same-color cones within ``max_gap``."""
+    segments = []
+    for color in (0, 1):
+        side = cones.of_color(color)
+        n = len(side)
+        if n < 2:
+            continue
+        # Neighbours come from a grid with max_gap cells, so a track map costs
+        # O(n) rather than an n x n distance matrix
+        grid = ConeGrid(ConeArray(side.x, side.y, np.zeros(n, dtype=np.int32)), max(float(max_gap), 1e-3))
+        nearest = grid.nearest_within(side.x, side.y, 0, 3, max_gap)
+        i = np.repeat(np.arange(n), 3)
+        j = nearest.reshape(-1)
+        # Each cone is its own nearest neighbour; keep the first two others
+        other = (j >= 0) & (j != i)
+        keep = other & (np.cumsum(other.reshape(n, 3), axis=1).reshape(-1) <= 2)
+        # Mutual neighbours would give each segment twice
+        pair = np.unique(np.minimum(i[keep], j[keep]) * n + np.maximum(i[keep], j[keep]))
+        xy = np.stack([side.x, side.y], axis=1)
+        segments.append(np.stack([xy[pair // n], xy[pair % n]], axis=1))
+    return np.concatenate(segments) if segments else np.empty((0, 2, 2))
+
+
+@dataclass(frozen=True)
+class PathCheck:
+    """Outcome of ``PathValidator.check``.
+
+    clearance: (N,) distance from each path point to the nearest cone or
+    boundary segment, exact up to the validator's ``reach`` (inf when
+    nothing is that close). first_violation: index of the first point that
+    is closer than ``min_clearance`` or ends a path segment crossing a
+    boundary, or None.
+    """
+
+    clearance: np.ndarray
+    first_violation: Optional[int]
+    ok: bool
+
+
+class PathValidator:
+    """Checks that a path keeps clear of the cones and never crosses a track boundary.
+
+    The boundaries are the segments of ``boundary_segments``; every cone
+    also counts as a zero-length segment so isolated cones are kept clear
+    of too. On a track map the segments are bucketed once into a uniform
+    grid in CSR form (as in ``ConeGrid``) with cells of ``reach`` meters,
+    so a check only gathers the segments in the cells around the path's
+    bounding box; either way all path points are measured against the
+    candidates in one vectorized pass. Build one validator per cone map
+    and reuse it every planning cycle; a single frame of detections is
+    small enough to validate from scratch.
+    """
+
+    def __init__(
+        self,
+        cones: ConeSet,
+        min_clearance: float = 0.5,
+        max_gap: float = MAX_BOUNDARY_GAP,
+    ):
+        if not isinstance(cones, ConeArray):
+            cones = ConeArray.from_cones(cones)
+        self.min_clearance = min_clearance
+        # Grid cell size and the distance up to which clearances are exact
+        self.reach = max(float(max_gap), 2.0 * min_clearance, 1e-3)
+
+        known = (cones.color == 0) | (cones.color == 1)
+        points = np.stack([cones.x[known], cones.y[known]], axis=1)
+        segments = np.concatenate([boundary_segments(cones[known], max_gap), np.stack([points, points], axis=1)])
+        self.a = segments[:, 0]
+        self.d = segments[:, 1] - segments[:, 0]
+        length2 = (self.d * self.d).sum(axis=1)
+        self.proper = length2 > 0.0  # zero-length segments are cones, never crossed
+        self.inv_length2 = np.where(self.proper, 1.0 / np.where(self.proper, length2, 1.0), 0.0)
+
+        if len(segments) >= GRID_MIN_SEGMENTS:
+            lo = segments.min(axis=1)
+            hi = segments.max(axis=1)
+            self.x0, self.y0 = float(lo[:, 0].min()), float(lo[:, 1].min())
+            self.nx = int((hi[:, 0].max() - self.x0) // self.reach) + 1
+            self.ny = int((hi[:, 1].max() - self.y0) // self.reach) + 1
+            ix0 = ((lo[:, 0] - self.x0) // self.reach).astype(np.intp)
+            iy0 = ((lo[:, 1] - self.y0) // self.reach).astype(np.intp)
+            ix1 = ((hi[:, 0] - self.x0) // self.reach).astype(np.intp)
+            iy1 = ((hi[:, 1] - self.y0) // self.reach).astype(np.intp)
+            # Segments are at most max_gap <= reach long, so each touches at most 2x2 cells
+            keys, ids = [], []
+            for ox in (0, 1):
+                for oy in (0, 1):
+                    ok = (ix0 + ox <= ix1) & (iy0 + oy <= iy1)
+                    keys.append(((iy0 + oy) * self.nx + ix0 + ox)[ok])
+                    ids.append(np.flatnonzero(ok))
+            key = np.concatenate(keys)
+            order = np.argsort(key, kind="stable")
+            self.segment_ids = np.concatenate(ids)[order]
+            self.starts = np.searchsorted(key[order], np.arange(self.nx * self.ny + 1))
+        else:
+            # No grid: every check looks at all segments
+            self.x0 = self.y0 = 0.0
+            self.nx = self.ny = 0
+            self.segment_ids = np.arange(len(segments))
+            self.starts = np.zeros(1, dtype=np.intp)
+
+    def _candidates(self, xy: np.ndarray) -> np.ndarray:
+        """Ids of the segments in the cells within one cell of the path's bounding box."""
+        if not self.nx:
+            return self.segment_ids
+        cs = self.reach
+        x_lo = max(math.floor((float(xy[:, 0].min()) - self.x0) / cs) - 1, 0)
+        x_hi = min(math.floor((float(xy[:, 0].max()) - self.x0) / cs) + 1, self.nx - 1)
+        y_lo = max(math.floor((float(xy[:, 1].min()) - self.y0) / cs) - 1, 0)
+        y_hi = min(math.floor((float(xy[:, 1].max()) - self.y0) / cs) + 1, self.ny - 1)
+        if x_lo > x_hi or y_lo > y_hi:
+            return self.segment_ids[:0]
+        rows = np.arange(y_lo, y_hi + 1) * self.nx
+        lo = self.starts[rows + x_lo]
+        hi = self.starts[rows + x_hi + 1]
+        counts = hi - lo
+        pos = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        return np.unique(self.segment_ids[pos])
+
+    def check(self, path) -> PathCheck:
+        """Validate an (N, 2) path (a ``PathArray``, array or list of points)."""
+        xy = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+        n = len(xy)
+        if not n:
+            return PathCheck(np.empty(0), None, True)
+        ids = self._candidates(xy)
+        clearance = np.full(n, np.inf)
+        violation = n
+        if len(ids):
+            ax, ay = self.a[ids, 0], self.a[ids, 1]
+            dx, dy = self.d[ids, 0], self.d[ids, 1]
+            # (N, S) distance of every point to every nearby segment
+            rx = xy[:, 0, None] - ax
+            ry = xy[:, 1, None] - ay
+            t = (rx * dx + ry * dy) * self.inv_length2[ids]
+            np.clip(t, 0.0, 1.0, out=t)
+            gx = rx - t * dx
+            gy = ry - t * dy
+            clearance = np.sqrt((gx * gx + gy * gy).min(axis=1))
+
+            # A path segment can only cross a boundary within half its length
+            # of one of its end points, so only those near the boundary are tested
+            sx, sy = np.diff(xy[:, 0]), np.diff(xy[:, 1])
+            near = np.flatnonzero(np.minimum(clearance[:-1], clearance[1:]) <= 0.5 * np.hypot(sx, sy))
+            if len(near):
+                proper = self.proper[ids]
+                ax, ay, dx, dy = ax[proper], ay[proper], dx[proper], dy[proper]
+                px, py = xy[near, 0, None], xy[near, 1, None]
+                sx, sy = sx[near, None], sy[near, None]
+                # Proper intersection: each segment's end points lie strictly on both sides of the other
+                s0 = dx * (py - ay) - dy * (px - ax)
+                s1 = dx * (py + sy - ay) - dy * (px + sx - ax)
+                r0 = sx * (ay - py) - sy * (ax - px)
+                r1 = sx * (ay + dy - py) - sy * (ax + dx - px)
+                crossed = ((s0 * s1 < 0) & (r0 * r1 < 0)).any(axis=1)
+                if crossed.any():
+                    violation = int(near[np.argmax(crossed)]) + 1
+
+        close = clearance < self.min_clearance
+        if close.any():
+            violation = min(violation, int(np.argmax(close)))
+        first = violation if violation < n else None
+        return PathCheck(clearance, first, first is None)
+
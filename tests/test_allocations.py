@@ -0,0 +1,37 @@
+from src.benchmark import check_allocations
+from src.path_planning import PathPlanning
+
+
+def test_generate_path_into_allocates_nothing():
+    report = check_allocations()
+    assert report["mismatches"] == 0
+    # Not a single block, not even one freed again within the call
+    assert report["peak_transient_bytes"] == 0
+    assert report["net_bytes"] == 0
+
+
+def test_check_allocations_catches_growth(monkeypatch):
+    kept = []
+    plan_into = PathPlanning.generatePathInto
+
+    def leaky(self, out, scratch=None):
+        kept.append(out.copy())
+        return plan_into(self, out, scratch)
+
+    monkeypatch.setattr(PathPlanning, "generatePathInto", leaky)
+    report = check_allocations(rounds=2)
+    assert report["mismatches"] == 0
+    assert report["net_bytes"] > 0
+
+
+def test_check_allocations_catches_temporaries(monkeypatch):
+    plan_into = PathPlanning.generatePathInto
+
+    def wasteful(self, out, scratch=None):
+        out.copy()
+        return plan_into(self, out, scratch)
+
+    monkeypatch.setattr(PathPlanning, "generatePathInto", wasteful)
+    report = check_allocations(rounds=2)
+    assert report["net_bytes"] == 0
+    assert report["peak_transient_bytes"] > 0
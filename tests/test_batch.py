@@ -0,0 +1,35 @@
+import numpy as np
+
+from src.batch import frames_to_arrays, generate_paths
+from src.models import Cone, CarPose
+from src.path_planning import PathPlanning
+from src.scenarios import get_scenario_names, iter_scenario_frames, make_scenario
+
+
+def _frames():
+    frames = [make_scenario(name) for name in get_scenario_names()]
+    frames += list(iter_scenario_frames("gen:0:200", 40))
+    pose = CarPose(1.0, -2.0, 0.3)
+    # One side only, and nothing to plan from
+    frames.append(([Cone(5.0, 1.0, 1), Cone(9.0, 2.5, 1)], pose))
+    frames.append(([Cone(5.0, -1.0, 0)], pose))
+    frames.append(([], pose))
+    return frames
+
+
+def test_batch_matches_scalar_planner():
+    frames = _frames()
+    poses, cones = frames_to_arrays(frames)
+    paths = generate_paths(poses, cones)
+    assert paths.shape == (len(frames), 25, 2)
+    for (frame_cones, car_pose), batch_path in zip(frames, paths):
+        path = PathPlanning(car_pose, frame_cones).generatePath()
+        if not path:
+            assert np.isnan(batch_path).all()
+            continue
+        np.testing.assert_allclose(batch_path, np.asarray(path), rtol=0, atol=1e-9)
+
+
+def test_generate_path_batch_is_generate_paths():
+    poses, cones = frames_to_arrays(_frames())
+    np.testing.assert_array_equal(PathPlanning.generatePathBatch(poses, cones), generate_paths(poses, cones))
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.fleet import FleetPlanner, SharedConeMap
+from src.models import CarPose
+from src.path_planning import PathPlanning
+from src.track_generator import generate_map
+
+
+def _poses(cones, n):
+    rng = np.random.default_rng(0)
+    pick = rng.choice(len(cones), n, replace=False)
+    return [
+        CarPose(x=float(cones.x[i]) + dx, y=float(cones.y[i]) + dy, yaw=yaw)
+        for i, dx, dy, yaw in zip(pick, *rng.uniform([-1.0, -1.0, -np.pi], [1.0, 1.0, np.pi], (n, 3)).T)
+    ]
+
+
+@pytest.mark.parametrize("mode", FleetPlanner.MODES)
+def test_fleet_matches_per_pose_planning(mode):
+    cones, car_pose = generate_map(0, 500)
+    poses = [car_pose] + _poses(cones, 30)
+    with FleetPlanner(cones, workers=2, mode=mode) as fleet:
+        paths = fleet.plan(poses)
+        as_array = fleet.plan(np.array([(p.x, p.y, p.yaw) for p in poses]))
+        assert fleet.plan([]) == []
+    assert len(paths) == len(poses)
+    for pose, path, same in zip(poses, paths, as_array):
+        expected = PathPlanning(pose, cones).generatePath(as_array=True).xy
+        np.testing.assert_array_equal(path.xy, expected)
+        np.testing.assert_array_equal(same.xy, expected)
+
+
+def test_attached_map_is_a_read_only_view():
+    cones, _ = generate_map(0, 200)
+    shared = SharedConeMap(cones)
+    attached = SharedConeMap.attach(shared.spec)
+    try:
+        np.testing.assert_array_equal(attached.cones.x, cones.x)
+        np.testing.assert_array_equal(attached.grid.order, shared.grid.order)
+        with pytest.raises(ValueError):
+            attached.cones.x[0] = 0.0
+    finally:
+        attached.close()
+        shared.close()
+        shared.unlink()
@@ -0,0 +1,46 @@
+import hashlib
+
+import numpy as np
+
+from src.frame_log import FrameLog, record_frames
+from src.models import ConeArray
+from src.path_planning import PathPlanning
+from src.run import replay_log
+from src.scenarios import iter_scenario_frames
+
+
+def test_replay_digest_is_deterministic(tmp_path):
+    first, second = tmp_path / "a.log", tmp_path / "b.log"
+    assert record_frames(str(first), iter_scenario_frames("gen:0:200", 30)) == 30
+    record_frames(str(second), iter_scenario_frames("gen:0:200", 30))
+    replays = [replay_log(str(first)), replay_log(str(first)), replay_log(str(second))]
+    assert [r["frames"] for r in replays] == [30, 30, 30]
+    assert len({r["digest"] for r in replays}) == 1
+
+    # The same paths as planning the frames straight from memory
+    digest = hashlib.sha256()
+    for cones, car_pose in iter_scenario_frames("gen:0:200", 30):
+        digest.update(PathPlanning(car_pose, cones).generatePath(as_array=True).as_buffer())
+    assert replays[0]["digest"] == digest.hexdigest()
+
+    other = tmp_path / "c.log"
+    record_frames(str(other), iter_scenario_frames("gen:1:200", 30))
+    assert replay_log(str(other))["digest"] != replays[0]["digest"]
+
+
+def test_frames_round_trip_and_cut_frame_is_ignored(tmp_path):
+    path = tmp_path / "run.log"
+    frames = list(iter_scenario_frames("gen:0:200", 5))
+    record_frames(str(path), frames)
+    with FrameLog(str(path)) as log:
+        assert len(log) == 5
+        for (cones, car_pose), (logged, logged_pose) in zip(frames, log):
+            cones = cones if isinstance(cones, ConeArray) else ConeArray.from_cones(cones)
+            assert logged_pose == car_pose
+            np.testing.assert_array_equal(logged.x, cones.x)
+            np.testing.assert_array_equal(logged.y, cones.y)
+            np.testing.assert_array_equal(logged.color, cones.color)
+
+    with open(path, "r+b") as f:
+        f.truncate(path.stat().st_size - 1)
+    assert replay_log(str(path))["frames"] == 4
@@ -0,0 +1,25 @@
+import pytest
+
+from src.benchmark import measure_import_time
+
+
+@pytest.mark.parametrize("module", ["src", "src.path_planning", "src.incremental", "src.batch"])
+def test_planning_core_imports_without_matplotlib(module):
+    assert measure_import_time(module)["heavy_modules"] == []
+
+
+def test_import_src_stays_fast():
+    report = measure_import_time()
+    assert report["own_ms"] > 0
+    # Generous next to the --import-budget check, so a loaded machine does not fail it
+    assert report["own_ms"] < 250.0
+
+
+def test_path_tester_is_loaded_on_first_access():
+    pytest.importorskip("matplotlib")
+    import src
+    from src.tester import PathTester
+
+    assert src.PathTester is PathTester
+    with pytest.raises(AttributeError):
+        src.NoSuchThing
@@ -0,0 +1,30 @@
+import numpy as np
+
+from src.incremental import IncrementalPlanner
+from src.models import ConeArray
+from src.path_planning import PathPlanning
+from src.track_generator import generate_map
+
+
+def _max_gap(path, reference):
+    """Largest distance from a point of ``path`` to the polyline ``reference``."""
+    p = np.asarray(path)[:, None, :]
+    a, b = np.asarray(reference[:-1]), np.asarray(reference[1:])
+    ab = b - a
+    t = np.clip(((p - a) * ab).sum(-1) / np.maximum((ab * ab).sum(-1), 1e-12), 0.0, 1.0)
+    return float(np.hypot(*(a + t[..., None] * ab - p).transpose(2, 0, 1)).min(axis=1).max())
+
+
+def test_slowly_drifting_cones_are_replanned():
+    cones, car_pose = generate_map(0, 200)
+    planner = IncrementalPlanner(tolerance=0.1)
+    step = 0.8 * planner.tolerance
+    for frame in range(30):
+        # Every frame is within the tolerance of the last one, but not of the first
+        drifted = ConeArray(cones.x, cones.y + frame * step, cones.color.copy())
+        path = planner.update(car_pose, drifted)
+        fresh = PathPlanning(car_pose, drifted).generatePath()
+        # The far end of a fixed-length path moves along with its start, so only
+        # the near half is compared
+        assert _max_gap(path[: len(path) // 2], fresh) <= 2 * planner.tolerance, frame
+    assert planner.stats["shifted"] < planner.stats["frames"] - 1
@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.models import CarPose, ConeArray
+from src.path_planning import PathPlanning
+from src.plan_cache import PlanCache
+from src.scenarios import get_scenario_names, make_scenario
+
+RESOLUTION = 0.01
+
+
+def _local_scene(name):
+    """Cones of a scenario in its car's frame, on the cache grid so rounding cannot split keys."""
+    cones, car_pose = make_scenario(name)
+    cones = cones if isinstance(cones, ConeArray) else ConeArray.from_cones(cones)
+    c, s = math.cos(car_pose.yaw), math.sin(car_pose.yaw)
+    dx, dy = cones.x - car_pose.x, cones.y - car_pose.y
+    snap = lambda v: np.rint(v / RESOLUTION) * RESOLUTION
+    return snap(c * dx + s * dy), snap(-s * dx + c * dy), cones.color
+
+
+def _place(local, x, y, yaw):
+    lx, ly, color = local
+    c, s = math.cos(yaw), math.sin(yaw)
+    return CarPose(x, y, yaw), ConeArray(x + c * lx - s * ly, y + s * lx + c * ly, color.copy())
+
+
+@pytest.mark.parametrize("name", get_scenario_names())
+def test_rigidly_moved_scene_hits_and_matches_fresh_plan(name):
+    local = _local_scene(name)
+    cache = PlanCache(resolution=RESOLUTION)
+    rng = np.random.default_rng(0)
+    for x, y, yaw in rng.uniform([-500.0, -500.0, -math.pi], [500.0, 500.0, math.pi], (20, 3)):
+        car_pose, cones = _place(local, x, y, yaw)
+        cached = cache.generatePath(car_pose, cones, as_array=True).xy
+        fresh = PathPlanning(car_pose, cones).generatePath(as_array=True).xy
+        np.testing.assert_allclose(cached, fresh, rtol=0, atol=1e-6)
+    assert cache.stats == {"hits": 19, "misses": 1, "evictions": 0}
+
+
+def test_moved_cone_misses():
+    local = max((_local_scene(name) for name in get_scenario_names()), key=lambda scene: len(scene[0]))
+    car_pose, cones = _place(local, 3.0, -2.0, 0.5)
+    cache = PlanCache(resolution=RESOLUTION)
+    cache.generatePath(car_pose, cones)
+    moved = ConeArray(cones.x.copy(), cones.y.copy(), cones.color.copy())
+    moved.x[0] += 5 * RESOLUTION
+    cache.generatePath(car_pose, moved)
+    assert cache.stats == {"hits": 0, "misses": 2, "evictions": 0}
@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src import path_planning, raceline
+from src.models import CarPose, ConeArray
+from src.path_planning import PathPlanning
+from src.track_generator import generate_map
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count GlobalRaceline constructions, starting from an empty cache."""
+    counter = []
+
+    class Counted(raceline.GlobalRaceline):
+        def __init__(self, *args, **kwargs):
+            counter.append(1)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(raceline, "GlobalRaceline", Counted)
+    monkeypatch.setattr(path_planning, "_RACELINES", path_planning.OrderedDict())
+    return counter
+
+
+def _plan(cones, car_pose):
+    planner = PathPlanning(car_pose, cones, engine="raceline")
+    return planner.generatePath(), planner.stage
+
+
+def test_planners_on_different_maps_keep_their_lines(builds):
+    maps = [generate_map(seed, 200) for seed in range(3)]
+    first = [_plan(cones, car_pose) for cones, car_pose in maps]
+    assert all(stage == "refined" for _, stage in first)
+    for _ in range(3):
+        for (cones, car_pose), expected in zip(maps, first):
+            # A copy of the cones, as a new frame would bring
+            copy = ConeArray(cones.x.copy(), cones.y.copy(), cones.color.copy())
+            assert _plan(copy, car_pose) == expected
+    assert len(builds) == len(maps)
+
+
+def test_least_recently_used_map_is_evicted(builds, monkeypatch):
+    monkeypatch.setattr(path_planning, "RACELINE_CACHE_SIZE", 2)
+    maps = [generate_map(seed, 200) for seed in range(3)]
+    for cones, car_pose in maps:
+        _plan(cones, car_pose)
+    _plan(*maps[2])
+    assert len(builds) == 3
+    _plan(*maps[0])
+    assert len(builds) == 4
+
+
+def test_open_line_is_not_reused_for_other_poses(builds):
+    cones, car_pose = generate_map(0, 200)
+    # A stretch of the track: the walk from the car runs out instead of closing the lap
+    part = cones[np.hypot(cones.x - car_pose.x, cones.y - car_pose.y) < 40.0]
+    line = raceline.GlobalRaceline(part, car_pose)
+    assert not line.closed
+    builds.clear()
+    x, y = line.xy[len(line) // 2]
+    for pose in (car_pose, CarPose(float(x), float(y), car_pose.yaw)):
+        planner = PathPlanning(pose, part, engine="raceline")
+        planner.generatePath()
+    assert len(builds) == 2
+
+
+def test_concurrent_planners_share_the_cache(builds):
+    cones, car_pose = generate_map(0, 200)
+    expected = _plan(cones, car_pose)
+    results = []
+
+    def worker():
+        for _ in range(20):
+            results.append(_plan(cones, car_pose))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * 80
+    assert len(builds) == 1
@@ -0,0 +1,44 @@
+import sys
+
+import pytest
+
+from src import run
+
+
+def _main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["run.py", *argv])
+    run.main()
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ("--batch", "1", "--repeat", "0"),
+        ("--batch", "1", "--workers", "0"),
+        ("--batch", "1", "--workers", "-2"),
+    ],
+)
+def test_invalid_batch_counts_are_usage_errors(monkeypatch, capsys, argv):
+    with pytest.raises(SystemExit) as exit_info:
+        _main(monkeypatch, *argv)
+    assert exit_info.value.code == 2
+    assert "must be at least 1" in capsys.readouterr().err
+
+
+def test_plan_scenario_rejects_zero_repeats():
+    with pytest.raises(ValueError):
+        run.plan_scenario("1", repeats=0)
+
+
+def test_single_worker_batch_runs(monkeypatch, capsys):
+    _main(monkeypatch, "--batch", "1", "--workers", "1", "--repeat", "2")
+    assert capsys.readouterr().out.startswith("planned 1 scenarios")
+
+
+@pytest.mark.parametrize("grid", ["0x3", "3x0", "-1x2", "3", "axb"])
+def test_invalid_grid_is_rejected_before_planning(monkeypatch, capsys, tmp_path, grid):
+    monkeypatch.setattr(run, "run_batch", lambda *args: pytest.fail("planned despite an invalid --grid"))
+    with pytest.raises(SystemExit) as exit_info:
+        _main(monkeypatch, "--batch", "1", "--render", str(tmp_path), f"--grid={grid}")
+    assert exit_info.value.code == 2
+    assert "invalid --grid" in capsys.readouterr().err
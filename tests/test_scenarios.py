@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from src.scenarios import is_scenario_name, make_scenario
+from src.track_generator import TrackConfig, generate_frames, generate_track
+
+
+@pytest.mark.parametrize("name", ["gen:-1:100", "gen:0:0", "gen:x:10"])
+def test_invalid_generated_names_are_rejected(name):
+    assert not is_scenario_name(name)
+    with pytest.raises(ValueError):
+        make_scenario(name)
+
+
+@pytest.mark.parametrize("n_cones", [6, 10, 14, 40])
+def test_frames_of_small_tracks_hold_each_cone_once(n_cones):
+    config = TrackConfig(position_noise=0.0, miss_rate=0.0)
+    n_side = len(generate_track(3, n_cones, config).centerline)
+    for cones, _ in generate_frames(3, n_cones, 50, config):
+        xy = np.stack([cones.x, cones.y, cones.color], axis=1)
+        assert len(cones) <= 2 * n_side
+        assert len(np.unique(xy, axis=0)) == len(xy)
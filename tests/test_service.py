@@ -0,0 +1,116 @@
+import asyncio
+import json
+import socket
+
+import numpy as np
+
+from src.models import CarPose, ConeArray
+from src.path_planning import PathPlanning
+from src.service import STREAM_LIMIT, PlanningService, encode_frame
+
+
+def _serve(service, lines, limit=STREAM_LIMIT):
+    """Send raw lines through ``service.serve`` over a socket pair; returns the decoded replies."""
+
+    async def run():
+        service_sock, client_sock = socket.socketpair()
+        server_reader, server_writer = await asyncio.open_connection(sock=service_sock, limit=limit)
+        client_reader, client_writer = await asyncio.open_connection(sock=client_sock, limit=STREAM_LIMIT)
+        serving = asyncio.create_task(service.serve(server_reader, server_writer))
+        for line in lines:
+            client_writer.write(line)
+            await client_writer.drain()
+            await asyncio.sleep(0)
+        client_writer.write_eof()
+        await serving
+        replies = [json.loads(line) for line in (await client_reader.read()).splitlines()]
+        client_writer.close()
+        return replies
+
+    try:
+        return asyncio.run(run())
+    finally:
+        service.close()
+
+
+def _track(n):
+    rng = np.random.default_rng(0)
+    x = np.repeat(np.arange(n // 2) * 2.0, 2) + rng.uniform(-0.1, 0.1, n)
+    y = np.tile([2.0, -2.0], n // 2) + rng.uniform(-0.1, 0.1, n)
+    return ConeArray(x, y, np.tile([0, 1], n // 2).astype(np.int32))
+
+
+def test_large_frame_is_planned():
+    frame = encode_frame(1, CarPose(x=0.0, y=0.0, yaw=0.0), _track(3000))
+    assert len(frame) > 64 * 1024
+    service = PlanningService()
+    replies = _serve(service, [frame])
+    assert [r["id"] for r in replies] == [1]
+    assert "path" in replies[0]
+    assert service.stats["malformed"] == 0
+
+
+def test_oversized_frame_is_malformed_and_connection_survives():
+    pose = CarPose(x=0.0, y=0.0, yaw=0.0)
+    service = PlanningService()
+    replies = _serve(service, [encode_frame(1, pose, _track(3000)), encode_frame(2, pose, _track(20))], limit=4096)
+    assert replies[0] == {"error": "line too long"}
+    assert replies[1]["id"] == 2 and "path" in replies[1]
+    assert service.stats["malformed"] == 1
+    assert service.stats["planned"] == 1
+
+
+def test_frame_reply_matches_planner():
+    pose = CarPose(x=0.5, y=0.2, yaw=0.1)
+    cones = _track(40)
+    message = json.loads(encode_frame(7, pose, cones))
+    message["pose"] = {"x": pose.x, "y": pose.y, "yaw": pose.yaw}
+    replies = _serve(PlanningService(), [b"\n", json.dumps(message).encode() + b"\n"])
+    assert len(replies) == 1
+    reply = replies[0]
+    assert reply["id"] == 7
+    assert reply["path"] == [list(p) for p in PathPlanning(pose, cones).generatePath()]
+    assert reply["stage"] and reply["plan_ms"] >= 0 and reply["latency_ms"] >= 0
+    assert "valid" not in reply
+
+
+def test_malformed_lines_get_errors_and_connection_survives():
+    bad = [
+        b"{not json\n",
+        b"[1, 2, 3]\n",
+        b'{"id": 1}\n',
+        b'{"id": 2, "pose": [0, 0]}\n',
+        b'{"id": 3, "pose": [0, NaN, 0]}\n',
+        b'{"id": 4, "pose": [0, 0, 0], "cones": [[1, 2, 0], [3, Infinity, 1]]}\n',
+        b'{"id": 5, "pose": [0, 0, 0], "cones": [[1, 2]]}\n',
+    ]
+    service = PlanningService()
+    replies = _serve(service, bad + [encode_frame(6, CarPose(x=0.0, y=0.0, yaw=0.0), _track(20))])
+    assert len(replies) == len(bad) + 1
+    assert all(set(reply) == {"error"} for reply in replies[:-1])
+    assert replies[-1]["id"] == 6 and "path" in replies[-1]
+    assert service.stats["malformed"] == len(bad)
+    assert service.stats["received"] == service.stats["planned"] == 1
+
+
+def test_stats_command():
+    replies = _serve(PlanningService(), [b'{"cmd": "stats"}\n'])
+    assert replies == [{"stats": {"received": 0, "planned": 0, "dropped": 0, "malformed": 0, "failed": 0, "invalid": 0, "connections": 1, "queue_depth": 0}}]
+
+
+def test_planning_failure_is_reported_with_the_frame_id(monkeypatch):
+    def fail(self, *args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(PathPlanning, "generatePath", fail)
+    service = PlanningService()
+    replies = _serve(service, [encode_frame("a", CarPose(x=0.0, y=0.0, yaw=0.0), _track(20))])
+    assert replies == [{"id": "a", "error": "planning failed: RuntimeError: boom"}]
+    assert service.stats["failed"] == 1 and service.stats["planned"] == 0
+
+
+def test_min_clearance_adds_validation():
+    service = PlanningService(min_clearance=0.5)
+    replies = _serve(service, [encode_frame(1, CarPose(x=0.0, y=0.0, yaw=0.0), _track(40))])
+    assert replies[0]["valid"] is True
+    assert replies[0]["first_violation"] is None
@@ -0,0 +1,26 @@
+from src import path_planning
+from src.benchmark import SMALL_FRAME_BUDGET_US, measure_small_frames
+from src.models import ConeArray
+from src.path_planning import PathPlanning
+from src.scenarios import _SCENARIOS, iter_scenario_frames
+
+
+def _frames():
+    frames = [(list(cones), car) for cones, car in _SCENARIOS.values()]
+    frames.extend((cones.to_cones(), car) for cones, car in iter_scenario_frames("gen:0:200", 50))
+    return frames
+
+
+def test_small_frame_path_matches_array_path(monkeypatch):
+    frames = _frames()
+    fast = [PathPlanning(car, cones).generatePath() for cones, car in frames]
+    monkeypatch.setattr(path_planning, "SMALL_FRAME_CONES", -1)
+    for (cones, car), path in zip(frames, fast):
+        assert PathPlanning(car, cones).generatePath() == path
+        assert PathPlanning(car, ConeArray.from_cones(cones)).generatePath() == path
+
+
+def test_small_frames_within_budget():
+    report = measure_small_frames(rounds=50)
+    assert report["list_us"] <= SMALL_FRAME_BUDGET_US
+    assert report["array_us"] <= SMALL_FRAME_BUDGET_US
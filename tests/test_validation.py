@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.models import ConeArray
+from src.path_planning import PathPlanning
+from src.track_generator import generate_map
+from src.validation import PathValidator, boundary_segments
+
+
+def _segment_distance(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0.0 else min(max(((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length2, 0.0), 1.0)
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def _crosses(p, q, a, b):
+    def side(o, u, v):
+        return (u[0] - o[0]) * (v[1] - o[1]) - (u[1] - o[1]) * (v[0] - o[0])
+
+    return side(a, b, p) * side(a, b, q) < 0 and side(p, q, a) * side(p, q, b) < 0
+
+
+def _brute_force(cones, path, min_clearance):
+    """Clearance of every point and first violation, from every segment and cone one by one."""
+    segments = [tuple(map(tuple, s)) for s in boundary_segments(cones)]
+    points = [(x, y) for x, y, c in zip(cones.x, cones.y, cones.color) if c in (0, 1)]
+    clearance = [
+        min(
+            [_segment_distance(p, a, b) for a, b in segments] + [math.hypot(p[0] - x, p[1] - y) for x, y in points],
+            default=math.inf,
+        )
+        for p in map(tuple, path)
+    ]
+    first = None
+    for i, c in enumerate(clearance):
+        if c < min_clearance or (i and any(_crosses(tuple(path[i - 1]), tuple(path[i]), a, b) for a, b in segments)):
+            first = i
+            break
+    return np.array(clearance), first
+
+
+def _paths(cones, car_pose, rng):
+    yield PathPlanning(car_pose, cones).generatePath(as_array=True).xy
+    for _ in range(10):
+        # Random walks from the car, which wander across the boundaries
+        steps = rng.normal(0.0, 1.5, (25, 2)) + 0.8 * np.array([math.cos(car_pose.yaw), math.sin(car_pose.yaw)])
+        yield np.array([car_pose.x, car_pose.y]) + np.cumsum(steps, axis=0)
+
+
+@pytest.mark.parametrize("n_cones", [30, 400])
+def test_clearance_and_first_violation_match_brute_force(n_cones):
+    cones, car_pose = generate_map(0, n_cones)
+    # A frame around the car is validated without the grid, the whole map with it
+    if n_cones == 30:
+        cones = cones[np.hypot(cones.x - car_pose.x, cones.y - car_pose.y) < 20.0]
+    validator = PathValidator(cones, min_clearance=0.5)
+    assert (validator.nx > 0) == (n_cones == 400)
+    rng = np.random.default_rng(0)
+    for path in _paths(cones, car_pose, rng):
+        check = validator.check(path)
+        clearance, first = _brute_force(cones, path, validator.min_clearance)
+        near = clearance <= validator.reach
+        np.testing.assert_allclose(check.clearance[near], clearance[near], rtol=0, atol=1e-9)
+        assert (check.clearance[~near] >= validator.reach).all()
+        assert check.first_violation == first
+        assert check.ok == (first is None)
+
+
+def test_empty_path_and_no_cones():
+    assert PathValidator(ConeArray.from_cones([])).check([]).ok
+    check = PathValidator(ConeArray.from_cones([])).check([(0.0, 0.0), (1.0, 0.0)])
+    assert check.ok and np.isinf(check.clearance).all()